@@ -0,0 +1,179 @@
+import asyncio
+
+from store import Store
+
+# Queued in place of an order to tell the worker to stop.
+_STOP = object()
+
+
+class AsyncStore:
+    """
+    An asyncio front end that queues orders and applies them to a Store in batches.
+
+    Coroutines calling order() put their shopping list on a bounded queue and
+    wait for the result. A single worker task drains whatever is queued, up to
+    max_batch orders, and applies them with Store.order on an executor thread
+    (the loop's default executor unless one is given), so the event loop keeps
+    serving other coroutines meanwhile. When the queue is full, order() waits for
+    room, which pushes back on producers instead of letting the backlog grow.
+
+    Usage:
+        async with AsyncStore(store) as async_store:
+            total = await async_store.order([(product, 2)])
+    """
+    def __init__(self, store: Store, max_pending: int = 10_000, max_batch: int = 512,
+                 executor=None, inline: bool = False):
+        """
+        Initialize the facade. Call start() (or use it as an async context manager)
+        from inside a running event loop before placing orders.
+
+        Args:
+            store (Store): The store to apply orders to.
+            max_pending (int): The queue size at which order() starts waiting.
+            max_batch (int): The most orders applied per batch.
+            executor (concurrent.futures.Executor or None): The executor batches
+                are applied on; the event loop's default executor if None.
+            inline (bool): Apply batches on the event loop thread instead, which
+                saves a thread hand-off per batch but blocks the loop meanwhile.
+
+        Raises:
+            ValueError: If max_pending or max_batch is not positive.
+        """
+        if max_pending <= 0 or max_batch <= 0:
+            raise ValueError("max_pending and max_batch must be positive.")
+        self.store = store
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        self.executor = executor
+        self.inline = inline
+        self._queue = None
+        self._worker = None
+        self._closing = False
+        # Set if the worker task dies; every waiting and later order fails with it.
+        self._failure = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @property
+    def pending(self) -> int:
+        """int: The number of orders waiting to be applied."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        """
+        Start the worker task on the running event loop.
+
+        Raises:
+            RuntimeError: If the facade is already started.
+        """
+        if self._worker is not None:
+            raise RuntimeError("AsyncStore is already started.")
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._closing = False
+        self._failure = None
+        self._worker = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Apply every order queued so far, then stop the worker task."""
+        if self._worker is None or self._closing:
+            return
+        self._closing = True
+        if not self._worker.done():
+            await self._queue.put(_STOP)
+        await self._worker
+        self._worker = None
+
+    async def order(self, shopping_list: list) -> float:
+        """
+        Queue an order and wait until it has been applied.
+
+        Args:
+            shopping_list (list): A list of (Product, quantity) tuples, as for Store.order.
+
+        Returns:
+            float: The total price for the order.
+
+        Raises:
+            RuntimeError: If the facade has not been started, is closing, or its
+                worker has failed.
+            Exception: Whatever Store.order raised for the order, usually a ValueError.
+        """
+        if self._worker is None or self._closing:
+            raise RuntimeError("AsyncStore is not running.")
+        if self._failure is not None:
+            raise RuntimeError("AsyncStore worker failed.") from self._failure
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((shopping_list, future))
+        if not future.done() and (self._failure is not None or self._worker is None
+                                  or self._worker.done()):
+            # Queued after the worker drained the queue and exited; nothing will apply it.
+            future.set_exception(self._failure or RuntimeError("AsyncStore is not running."))
+        return await future
+
+    async def _run(self):
+        """
+        Drain the queue in batches until the stop marker has arrived and the
+        queue is empty.
+
+        If the worker itself fails, every order in the batch being applied and
+        every order still queued fails with the same exception, instead of waiting
+        forever.
+        """
+        loop = asyncio.get_running_loop()
+        batch = []
+        stopping = False
+        try:
+            while not (stopping and self._queue.empty()):
+                batch = [await self._queue.get()]
+                while len(batch) < self.max_batch and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                # Orders whose put() was waiting for room when close() was called
+                # can land after the stop marker; they are still applied.
+                if any(item is _STOP for item in batch):
+                    stopping = True
+                batch = [(shopping_list, future) for shopping_list, future in
+                         (item for item in batch if item is not _STOP)
+                         if not future.cancelled()]
+                if self.inline:
+                    results = self._apply_batch(batch)
+                else:
+                    results = await loop.run_in_executor(self.executor, self._apply_batch, batch)
+                for (_, future), (ok, value) in zip(batch, results):
+                    if future.cancelled():
+                        continue
+                    if ok:
+                        future.set_result(value)
+                    else:
+                        future.set_exception(value)
+                # Let producers and waiting callers run before the next batch.
+                await asyncio.sleep(0)
+        except Exception as error:
+            self._failure = error
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            for item in batch:
+                if item is not _STOP and not item[1].done():
+                    item[1].set_exception(error)
+
+    def _apply_batch(self, batch: list) -> list:
+        """
+        Apply a batch of orders to the store.
+
+        Args:
+            batch (list): (shopping_list, future) pairs in arrival order.
+
+        Returns:
+            list: One (succeeded, total price or exception) pair per order.
+        """
+        results = []
+        for shopping_list, _ in batch:
+            try:
+                results.append((True, self.store.order(shopping_list)))
+            except Exception as error:  # Belongs to this order alone; the batch goes on.
+                results.append((False, error))
+        return results
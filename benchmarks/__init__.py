@@ -0,0 +1 @@
+"""Performance benchmarks for the store. Run each module with ``python -m benchmarks.<name>``."""
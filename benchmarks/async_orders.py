@@ -0,0 +1,67 @@
+"""
+Load-generate concurrent orders through AsyncStore and report throughput and latency.
+
+Usage:
+    python -m benchmarks.async_orders [--clients N] [--orders-per-client N] [--max-pending N]
+                                      [--inline]
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from async_store import AsyncStore
+from products import Product
+from store import Store
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Return the value at the given fraction (0..1) of an ascending list."""
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+async def client(async_store: AsyncStore, products: list, orders: int, seed: int,
+                 latencies: list):
+    """Place `orders` random single- or multi-line orders, recording each latency."""
+    rng = random.Random(seed)
+    for _ in range(orders):
+        cart = [(product, rng.randint(1, 3)) for product in rng.sample(products, rng.randint(1, 3))]
+        start = time.perf_counter()
+        await async_store.order(cart)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(args):
+    """Run the load and print the report."""
+    products = [Product(f"Product {i}", 10 + i, 10**9) for i in range(args.products)]
+    store = Store(products)
+    latencies = []
+    async with AsyncStore(store, max_pending=args.max_pending,
+                          max_batch=args.max_batch, inline=args.inline) as async_store:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(async_store, products, args.orders_per_client, seed, latencies)
+                               for seed in range(args.clients)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f"{len(latencies)} orders from {args.clients} clients in {elapsed:.3f}s")
+    print(f"throughput: {len(latencies) / elapsed:,.0f} orders/sec")
+    print(f"latency p50: {percentile(latencies, 0.50) * 1e3:.3f} ms")
+    print(f"latency p99: {percentile(latencies, 0.99) * 1e3:.3f} ms")
+
+
+def main():
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=2_000)
+    parser.add_argument("--orders-per-client", type=int, default=25)
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--max-pending", type=int, default=10_000)
+    parser.add_argument("--max-batch", type=int, default=512)
+    parser.add_argument("--inline", action="store_true",
+                        help="apply batches on the event loop thread")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compare bulk catalog import with building a Store from per-object constructors.
+
+Writes a CSV catalog of mixed regular and limited products, then times:
+
+    constructors   csv.DictReader, Product(...) / LimitedProduct(...) per row,
+                   then Store(list_of_products)
+    read_catalog   catalog_import.read_catalog on the same file, by default (the
+                   garbage collector keeps running) and with pause_gc=True
+
+Usage:
+    python -m benchmarks.catalog_import [--rows N] [--path FILE]
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+from catalog_import import load_catalog
+from products import Product, LimitedProduct
+from store import Store
+
+
+def write_catalog(path: str, rows: int):
+    """Write a CSV catalog where every tenth product is limited."""
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["name", "price", "quantity", "kind", "maximum"])
+        for i in range(rows):
+            if i % 10 == 0:
+                writer.writerow([f"Product {i}", f"{10 + i % 90}.99", 1 + i % 50, "limited", 2])
+            else:
+                writer.writerow([f"Product {i}", f"{10 + i % 90}.99", 1 + i % 50, "", ""])
+
+
+def load_with_constructors(path: str) -> Store:
+    """Build the store the way callers did before catalog_import existed."""
+    products = []
+    with open(path, encoding="utf-8", newline="") as file:
+        for row in csv.DictReader(file):
+            if row["kind"] == "limited":
+                products.append(LimitedProduct(row["name"], float(row["price"]),
+                                               int(row["quantity"]), int(row["maximum"])))
+            else:
+                products.append(Product(row["name"], float(row["price"]), int(row["quantity"])))
+    return Store(products)
+
+
+def timed(func, *args):
+    """Return func's result and how long it took in seconds."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    """Write the catalog, then time both ways of loading it."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="number of products")
+    parser.add_argument("--path", help="catalog file to use (default: a temporary file)")
+    args = parser.parse_args()
+    path = args.path or os.path.join(tempfile.mkdtemp(), "catalog.csv")
+    write_catalog(path, args.rows)
+
+    store, constructor_time = timed(load_with_constructors, path)
+    expected = store.get_total_quantity()
+    del store
+    store, bulk_time = timed(load_catalog, path)
+    assert store.get_total_quantity() == expected
+    del store
+    store, paused_time = timed(load_catalog, path, None, 10_000, True)
+    assert store.get_total_quantity() == expected
+
+    print(f"{args.rows} rows, {os.path.getsize(path) / 2**20:.1f} MiB CSV")
+    print(f"per-object constructors + Store(): {constructor_time * 1e3:10.1f} ms")
+    print(f"catalog_import.load_catalog:       {bulk_time * 1e3:10.1f} ms")
+    print(f"  with pause_gc=True:              {paused_time * 1e3:10.1f} ms")
+    print(f"speedup, garbage collector on:     {constructor_time / bulk_time:10.2f}x")
+    print(f"speedup with pause_gc:             {constructor_time / paused_time:10.2f}x")
+    if not args.path:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Compare memory use and query throughput of Store and ColumnarStore.
+
+Usage:
+    python -m benchmarks.columnar_store [--size N]
+"""
+import argparse
+import time
+import tracemalloc
+
+from columnar_store import ColumnarStore
+from products import Product
+from store import Store
+
+
+def build_store(size: int) -> Store:
+    """Build a Store holding `size` regular products."""
+    return Store([Product(f"Product {i}", 10 + i % 90, 1 + i % 50) for i in range(size)])
+
+
+def build_columnar_store(size: int) -> ColumnarStore:
+    """Build a ColumnarStore holding `size` regular products."""
+    store = ColumnarStore()
+    for i in range(size):
+        store.append(f"Product {i}", 10 + i % 90, 1 + i % 50)
+    return store
+
+
+def measure_build(builder, size: int):
+    """
+    Build a store and measure the memory it retains and the time it took.
+
+    Returns:
+        tuple: The store, the retained bytes and the elapsed seconds.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    store = builder(size)
+    elapsed = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return store, retained, elapsed
+
+
+def time_call(func, repeat: int = 5) -> float:
+    """Return the best wall-clock time of `repeat` calls to func, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def inventory_value(store: Store) -> float:
+    """Value the stock of a regular Store the only way it allows: one product at a time."""
+    return sum(product.price * product.quantity for product in store.list_of_products)
+
+
+def main():
+    """Run the comparison and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=200_000, help="number of products")
+    args = parser.parse_args()
+
+    store, store_bytes, store_build = measure_build(build_store, args.size)
+    columnar, columnar_bytes, columnar_build = measure_build(build_columnar_store, args.size)
+
+    rows = [
+        ("memory (MiB)", store_bytes / 2**20, columnar_bytes / 2**20),
+        ("build (s)", store_build, columnar_build),
+        ("get_total_quantity (ms)",
+         time_call(store.get_total_quantity) * 1e3, time_call(columnar.get_total_quantity) * 1e3),
+        ("get_all_products (ms)",
+         time_call(store.get_all_products) * 1e3, time_call(columnar.get_all_products) * 1e3),
+        ("inventory value (ms)",
+         time_call(lambda: inventory_value(store)) * 1e3,
+         time_call(columnar.get_inventory_value) * 1e3),
+    ]
+    print(f"{args.size} products")
+    print(f"{'':<26}{'Store':>12}{'ColumnarStore':>16}")
+    for label, regular, columnar_value in rows:
+        print(f"{label:<26}{regular:>12.3f}{columnar_value:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Compare float, integer-cent and decimal.Decimal money arithmetic.
+
+For each representation the benchmark prices a batch of promotional lines
+(SecondHalfPrice, PercentDiscount) and sums them, and places Store orders
+totalled in floats and in cents. The totals are printed too: the cent and
+Decimal totals agree exactly, while the float total carries unrounded
+fractions of a cent from every discounted line.
+
+Usage:
+    python -m benchmarks.money [--lines N] [--repeat N]
+"""
+import argparse
+import random
+import time
+from decimal import Decimal, ROUND_HALF_EVEN
+
+from money import format_cents, to_cents
+from products import Product
+from promotions import PercentDiscount, SecondHalfPrice
+from store import Store
+
+CENT = Decimal("0.01")
+
+
+def best_seconds(func, repeat: int) -> float:
+    """Return the fastest of `repeat` timed calls of func."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def decimal_second_half_price(price: Decimal, quantity: int) -> Decimal:
+    """SecondHalfPrice in Decimal, rounded to the cent like calculate_cents."""
+    pairs = quantity // 2
+    half = (pairs * price / 2).quantize(CENT, ROUND_HALF_EVEN)
+    return (pairs + quantity % 2) * price + half
+
+
+def decimal_percent(price: Decimal, quantity: int, percent: Decimal) -> Decimal:
+    """PercentDiscount in Decimal, rounded to the cent like calculate_cents."""
+    total = price * quantity
+    return total - (total * percent / 100).quantize(CENT, ROUND_HALF_EVEN)
+
+
+def main():
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--order-lines", type=int, default=1_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    prices = [rng.randint(1, 100_000) / 100 for _ in range(args.lines)]
+    quantities = [rng.randint(1, 9) for _ in range(args.lines)]
+    prices_cents = [to_cents(price) for price in prices]
+    prices_decimal = [Decimal(repr(price)) for price in prices]
+    half, percent = SecondHalfPrice(), PercentDiscount(15)
+
+    results = {
+        "float": lambda: (sum(half.apply_batch(prices, quantities))
+                          + sum(percent.apply_batch(prices, quantities))),
+        "cents": lambda: (sum(half.apply_batch_cents(prices_cents, quantities))
+                          + sum(percent.apply_batch_cents(prices_cents, quantities))),
+        "Decimal": lambda: (sum(map(decimal_second_half_price, prices_decimal, quantities))
+                            + sum(decimal_percent(price, quantity, Decimal(15))
+                                  for price, quantity in zip(prices_decimal, quantities))),
+    }
+    totals = {name: func() for name, func in results.items()}
+    # Alternate the representations round by round, so drift in machine load
+    # affects them alike.
+    best = dict.fromkeys(results, float("inf"))
+    for _ in range(args.repeat):
+        for name, func in results.items():
+            best[name] = min(best[name], best_seconds(func, 1))
+    print(f"Pricing and summing {args.lines:,} lines with two promotions:")
+    for name, seconds in best.items():
+        print(f"  {name:<8} {seconds * 1e3:>10.1f} ms  {args.lines * 2 / seconds:>14,.0f} lines/sec")
+    print(f"  float total {totals['float']!r}, cents total {format_cents(totals['cents'])}, "
+          f"Decimal total {totals['Decimal']}")
+
+    products = [Product.from_trusted(f"Product {i}", prices[i], 10**12)
+                for i in range(args.order_lines)]
+    store = Store(products)
+    cart = [(product, quantities[i]) for i, product in enumerate(products)]
+    print(f"Store.order with {args.order_lines:,} lines:")
+    for name, cents in (("float", False), ("cents", True)):
+        seconds = best_seconds(lambda: store.order(cart, cents=cents), args.repeat)
+        print(f"  {name:<8} {seconds * 1e3:>10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Measure per-product memory and Product.buy() cost for a large catalog.
+
+Usage:
+    python -m benchmarks.product_memory [--size N]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from products import Product
+
+
+def build_validated(size: int) -> list:
+    """Build products through the validating constructor."""
+    return [Product(f"Product {i}", 10 + i % 90, 1_000) for i in range(size)]
+
+
+def build_trusted(size: int) -> list:
+    """Build products through the trusted constructor, skipping validation."""
+    return [Product.from_trusted(f"Product {i}", 10 + i % 90, 1_000) for i in range(size)]
+
+
+def bytes_per_product(builder, size: int) -> float:
+    """Return the memory retained per product when building `size` products."""
+    gc.collect()
+    tracemalloc.start()
+    products = builder(size)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del products
+    return retained / size
+
+
+def time_build(builder, size: int):
+    """
+    Build `size` products without tracing and time it.
+
+    Returns:
+        tuple: The products and the elapsed seconds.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    products = builder(size)
+    return products, time.perf_counter() - start
+
+
+def time_buys(products: list) -> float:
+    """Return the average cost of one buy(1) call across all products, in seconds."""
+    start = time.perf_counter()
+    for product in products:
+        product.buy(1)
+    return (time.perf_counter() - start) / len(products)
+
+
+def main():
+    """Run the measurements and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000, help="number of products")
+    args = parser.parse_args()
+
+    builders = [("validated", build_validated)]
+    if hasattr(Product, "from_trusted"):
+        builders.append(("trusted", build_trusted))
+    for label, builder in builders:
+        # Tracing slows allocation down a lot, so memory is sampled on a smaller build.
+        per_product = bytes_per_product(builder, min(args.size, 100_000))
+        products, elapsed = time_build(builder, args.size)
+        buy_cost = time_buys(products)
+        print(f"{label:<10} {args.size} products: {per_product:.0f} bytes/product, "
+              f"build {elapsed:.2f}s, buy() {buy_cost * 1e9:.0f} ns/call")
+        del products
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Compare order throughput of a Store and a ShardedStore under concurrent clients.
+
+Each client thread places random carts of one or more lines; with several
+lines, ShardedStore orders usually span shards and use the two-phase commit.
+
+Usage:
+    python -m benchmarks.sharded_orders [--shards N] [--clients N] [--orders-per-client N] [--lines N]
+"""
+import argparse
+import random
+import threading
+import time
+
+from products import Product
+from sharded_store import ShardedStore
+from store import Store
+
+
+def run_clients(store, products: list, clients: int, orders: int, lines: int) -> float:
+    """Place `orders` carts from each of `clients` threads; return the elapsed seconds."""
+    def client(seed):
+        rng = random.Random(seed)
+        for _ in range(orders):
+            store.order([(product, 1) for product in rng.sample(products, lines)])
+
+    threads = [threading.Thread(target=client, args=(seed,)) for seed in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main():
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--shards", type=int, default=None)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--orders-per-client", type=int, default=2_000)
+    parser.add_argument("--lines", type=int, default=1)
+    parser.add_argument("--products", type=int, default=1_000)
+    args = parser.parse_args()
+    total_orders = args.clients * args.orders_per_client
+
+    products = [Product(f"Product {i}", 10 + i, 10**9) for i in range(args.products)]
+    elapsed = run_clients(Store(products), products, args.clients, args.orders_per_client,
+                          args.lines)
+    print(f"Store:        {total_orders / elapsed:>12,.0f} orders/sec")
+
+    products = [Product(f"Product {i}", 10 + i, 10**9) for i in range(args.products)]
+    with ShardedStore(products, shards=args.shards) as store:
+        elapsed = run_clients(store, store.list_of_products, args.clients,
+                              args.orders_per_client, args.lines)
+        print(f"ShardedStore: {total_orders / elapsed:>12,.0f} orders/sec "
+              f"({store.shards} shards)")
+
+
+if __name__ == "__main__":
+    main()
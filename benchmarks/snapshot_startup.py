@@ -0,0 +1,62 @@
+"""
+Compare startup time of a Store built from Product objects with a snapshot-backed store.
+
+Usage:
+    python -m benchmarks.snapshot_startup [--size N] [--path FILE]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from catalog_snapshot import open_snapshot, write_snapshot
+from products import Product, LimitedProduct
+from store import Store
+
+
+def build_products(size: int) -> list:
+    """Build a mixed catalog of regular and limited products."""
+    return [LimitedProduct(f"Product {i}", 10 + i % 90, 1 + i % 50, 2) if i % 10 == 0
+            else Product(f"Product {i}", 10 + i % 90, 1 + i % 50)
+            for i in range(size)]
+
+
+def main():
+    """Write a snapshot, then time both ways of getting a usable store."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000, help="number of products")
+    parser.add_argument("--path", help="snapshot file to use (default: a temporary file)")
+    args = parser.parse_args()
+    path = args.path or os.path.join(tempfile.mkdtemp(), "catalog.snap")
+
+    start = time.perf_counter()
+    store = Store(build_products(args.size))
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    write_snapshot(store, path)
+    write_time = time.perf_counter() - start
+    del store
+
+    start = time.perf_counter()
+    snapshot_store = open_snapshot(path)
+    open_time = time.perf_counter() - start
+    start = time.perf_counter()
+    product = snapshot_store.get_product(f"Product {args.size // 2}")
+    snapshot_store.order([(product, 1)])
+    first_order_time = time.perf_counter() - start
+    total = snapshot_store.get_total_quantity()
+
+    print(f"{args.size} products, snapshot {os.path.getsize(path) / 2**20:.1f} MiB")
+    print(f"build Store from Product objects: {build_time * 1e3:10.1f} ms")
+    print(f"write snapshot:                   {write_time * 1e3:10.1f} ms")
+    print(f"open snapshot:                    {open_time * 1e3:10.3f} ms")
+    print(f"first lookup + order:             {first_order_time * 1e3:10.3f} ms")
+    print(f"total quantity (no loading):      {total}")
+    snapshot_store.close()
+    if not args.path:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Benchmark suite for the store's hot paths, with JSON output and baseline comparison.
+
+Covers Product/LimitedProduct/NonStockedProduct.buy, Store.order with carts of
+several sizes, Store.order_many batches, Store.get_all_products and Store.get_total_quantity at several
+catalog sizes, and apply_promotion for every promotion. Each result is the best
+time per operation over several repeats, in nanoseconds.
+
+Usage:
+    python -m benchmarks.suite                      # run, print, compare with baseline.json
+    python -m benchmarks.suite --output run.json    # also write the results
+    python -m benchmarks.suite --save-baseline      # make this run the new baseline
+    python -m benchmarks.suite --sizes 1000 10000 --filter order
+
+The exit status is 1 if any benchmark is slower than the baseline by more than
+--tolerance (20% by default).
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+from products import Product, NonStockedProduct, LimitedProduct
+from promotions import PercentDiscount, SecondHalfPrice, ThirdOneFree
+from store import Store
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+# Effectively unlimited stock, so purchases never run out while timing.
+PLENTY = 10**12
+
+
+def best_ns_per_op(func, operations: int, repeat: int) -> float:
+    """
+    Time func (which performs `operations` operations) and return the best ns per operation.
+
+    Args:
+        func (callable): The timed body.
+        operations (int): How many operations one call of func performs.
+        repeat (int): How many times to call func.
+
+    Returns:
+        float: The fastest observed nanoseconds per operation.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        func()
+        best = min(best, time.perf_counter_ns() - start)
+    return best / operations
+
+
+def buy_loop(product, loops: int):
+    """Return a function that buys one unit of product `loops` times."""
+    def run():
+        buy = product.buy
+        for _ in range(loops):
+            buy(1)
+    return run
+
+
+def bench_buys(loops: int, repeat: int) -> dict:
+    """Benchmark buy() on each product class."""
+    products = {
+        "Product.buy": Product("Benchmark Product", 10, PLENTY),
+        "LimitedProduct.buy": LimitedProduct("Benchmark Limited", 10, PLENTY, 5),
+        "NonStockedProduct.buy": NonStockedProduct("Benchmark Warranty", 10),
+    }
+    return {name: best_ns_per_op(buy_loop(product, loops), loops, repeat)
+            for name, product in products.items()}
+
+
+def bench_orders(loops: int, repeat: int) -> dict:
+    """Benchmark Store.order with carts of 1, 10 and 100 lines."""
+    results = {}
+    for cart_size in (1, 10, 100):
+        products = [Product(f"Cart Product {i}", 10 + i, PLENTY) for i in range(cart_size)]
+        store = Store(products)
+        cart = [(product, 1) for product in products]
+        order_loops = max(1, loops // cart_size)
+
+        def run(order=store.order, cart=cart, order_loops=order_loops):
+            for _ in range(order_loops):
+                order(cart)
+
+        results[f"Store.order[cart={cart_size}]"] = best_ns_per_op(run, order_loops, repeat)
+    return results
+
+
+def bench_order_many(loops: int, repeat: int) -> dict:
+    """Benchmark Store.order_many on batches of 10-line carts, per order placed."""
+    results = {}
+    products = [Product(f"Batch Product {i}", 10 + i, PLENTY) for i in range(100)]
+    store = Store(products)
+    for batch_size in (10, 100):
+        orders = [[(products[(order + line * 7) % 100], 1) for line in range(10)]
+                  for order in range(batch_size)]
+        batches = max(1, loops // (10 * batch_size))
+        for atomic in (True, False):
+            def run(order_many=store.order_many, orders=orders, batches=batches, atomic=atomic):
+                for _ in range(batches):
+                    order_many(orders, atomic)
+
+            mode = "atomic" if atomic else "best_effort"
+            results[f"Store.order_many[cart=10,batch={batch_size},{mode}]"] = best_ns_per_op(
+                run, batches * batch_size, repeat)
+    return results
+
+
+def bench_catalog(sizes, repeat: int) -> dict:
+    """Benchmark the whole-catalog queries at each catalog size."""
+    results = {}
+    for size in sizes:
+        store = Store([Product.from_trusted(f"Catalog Product {i}", 10 + i % 90, 1 + i % 50)
+                       for i in range(size)])
+        results[f"Store.get_all_products[n={size}]"] = best_ns_per_op(
+            store.get_all_products, 1, repeat)
+        results[f"Store.get_total_quantity[n={size}]"] = best_ns_per_op(
+            store.get_total_quantity, 1, repeat)
+        del store
+    return results
+
+
+def bench_promotions(loops: int, repeat: int) -> dict:
+    """Benchmark apply_promotion for every promotion class."""
+    product = Product("Promotion Product", 250, PLENTY)
+    results = {}
+    for promotion in (PercentDiscount(30), SecondHalfPrice(), ThirdOneFree()):
+        def run(apply=promotion.apply_promotion):
+            for quantity in range(1, loops + 1):
+                apply(product, quantity)
+
+        results[f"{type(promotion).__name__}.apply_promotion"] = best_ns_per_op(run, loops, repeat)
+    return results
+
+
+def run_suite(sizes, loops: int, repeat: int, name_filter: str = None) -> dict:
+    """
+    Run every benchmark and collect the results.
+
+    Args:
+        sizes (iterable): Catalog sizes for the whole-catalog queries.
+        loops (int): Operations per timed call for the per-operation benchmarks.
+        repeat (int): Timed calls per benchmark; the best is kept.
+        name_filter (str): Only keep benchmarks whose name contains this text.
+
+    Returns:
+        dict: The report, with "meta" describing the run and "results" mapping
+            benchmark names to nanoseconds per operation.
+    """
+    results = {}
+    for group in (lambda: bench_buys(loops, repeat), lambda: bench_orders(loops, repeat),
+                  lambda: bench_order_many(loops, repeat), lambda: bench_catalog(sizes, repeat),
+                  lambda: bench_promotions(loops, repeat)):
+        results.update(group())
+    if name_filter:
+        results = {name: value for name, value in results.items() if name_filter in name}
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "loops": loops,
+            "repeat": repeat,
+        },
+        "results": {name: round(value, 1) for name, value in results.items()},
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Compare a report with a baseline report.
+
+    Args:
+        report (dict): The current run.
+        baseline (dict): The stored baseline run.
+        tolerance (float): The allowed slowdown, e.g. 0.2 for 20%.
+
+    Returns:
+        list: (name, baseline ns, current ns, ratio, regressed) for every benchmark
+            present in both reports.
+    """
+    rows = []
+    for name, current in report["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        ratio = current / previous if previous else float("inf")
+        rows.append((name, previous, current, ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def main(argv=None) -> int:
+    """
+    Run the suite from the command line.
+
+    Returns:
+        int: The exit status; 1 if a regression beyond the tolerance was found.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--loops", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="write the results to the baseline file instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.sizes, args.loops, args.repeat, args.filter)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+            file.write("\n")
+        print(f"Saved baseline to {args.baseline}")
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+    rows = compare(report, baseline, args.tolerance) if baseline else []
+    compared = {row[0]: row for row in rows}
+
+    print(f"{'benchmark':<42}{'ns/op':>14}{'baseline':>14}{'ratio':>8}")
+    for name, value in report["results"].items():
+        row = compared.get(name)
+        if row is None:
+            print(f"{name:<42}{value:>14.1f}")
+        else:
+            flag = "  REGRESSION" if row[4] else ""
+            print(f"{name:<42}{value:>14.1f}{row[1]:>14.1f}{row[3]:>8.2f}{flag}")
+    return 1 if any(row[4] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,428 @@
+"""
+Cart-level promotions: rules that price a whole shopping list.
+
+Per-product promotions (Product.promotion) price each line on its own. Cart
+rules act on the cart those lines make up:
+
+    CartPercentDiscount   a percentage off some products' lines, or every line;
+                          several stack, each applying to what the others left
+    Bundle                a fixed price for each complete set of products
+    SpendAndSave          a fixed saving once the cart reaches a spend threshold
+
+A CartPromotionEngine compiles its rules into an index from product id to the
+rules that mention it, plus the list of rules that apply to every cart. Pricing
+a cart looks up only the rules its products can trigger, so it costs about
+O(lines + applicable rules) however many rules exist. Adding or removing a rule
+updates just that rule's index entries; prices and per-product promotions are
+read when the cart is priced, so product changes need no recompilation.
+
+Carts can also be priced in integer cents (see money.py): line totals,
+discounts and the cart total are then ints, and every rule rounds its own
+discount half to even, so a cart total never passes through a float.
+"""
+from abc import abstractmethod
+from collections import namedtuple
+from itertools import count
+
+from money import divide, to_cents
+from promotions import Promotion
+
+# Rules are applied in stage order: percentages first, so they stack on the
+# per-product promotions, then bundles, then spend thresholds on the result.
+STAGE_PERCENT = 0
+STAGE_BUNDLE = 1
+STAGE_SPEND = 2
+
+
+class CartLine:
+    """
+    The combined quantity and running total of one product in a cart, and how
+    many of its units earlier bundles have already used.
+    """
+    __slots__ = ("product", "quantity", "total", "used")
+
+    def __init__(self, product, quantity: int, total: float):
+        self.product = product
+        self.quantity = quantity
+        self.total = total
+        self.used = 0
+
+
+class Cart:
+    """
+    A cart being priced: its lines by product id and the discounts applied so far.
+
+    In a cart priced in cents (cents is True) every amount is an int number of
+    cents, and rules must return their savings in cents too.
+    """
+    def __init__(self, cents: bool = False):
+        self.lines = {}
+        self.cents = cents
+        self.subtotal = 0 if cents else 0.0
+        self.discount = 0 if cents else 0.0
+
+    @property
+    def total(self):
+        """float or int: The subtotal less every discount applied so far, never below 0."""
+        return max(0 if self.cents else 0.0, self.subtotal - self.discount)
+
+    def lines_for(self, product_ids):
+        """
+        Return the cart lines of the given products, or every line.
+
+        Args:
+            product_ids (frozenset or None): The product ids, or None for every line.
+
+        Returns:
+            list: The matching CartLine objects.
+        """
+        if product_ids is None:
+            return list(self.lines.values())
+        lines = self.lines
+        if len(product_ids) < len(lines):
+            return [lines[product_id] for product_id in product_ids if product_id in lines]
+        return [line for product_id, line in lines.items() if product_id in product_ids]
+
+
+class CartPrice(namedtuple("CartPrice", "total subtotal discounts")):
+    """
+    The price of a cart.
+
+    Attributes:
+        total (float or int): What the cart costs after every rule, never below 0.
+        subtotal (float or int): The sum of the lines after their per-product promotions.
+        discounts (tuple): (rule name, amount) for every rule that saved money.
+
+    Amounts are in integer cents when the cart was priced in cents.
+    """
+    __slots__ = ()
+
+
+class CartRule(Promotion):
+    """
+    Abstract base class for a promotion applied to a whole cart.
+
+    A cart rule never changes a line priced on its own, so calculate_price is
+    the plain total; its effect comes from apply_to_cart.
+    """
+    stage = STAGE_SPEND
+
+    def __init__(self, name: str, products=None):
+        """
+        Initialize a cart rule.
+
+        Args:
+            name (str): The name of the rule.
+            products (iterable or None): The products the rule is about, or None
+                if it applies to every cart.
+        """
+        super().__init__(name)
+        self.product_ids = (None if products is None
+                            else frozenset(product.product_id for product in products))
+
+    def calculate_price(self, price, quantity):
+        """
+        Return the undiscounted total; cart rules only act on whole carts.
+
+        Args:
+            price (float or numpy.ndarray): The unit price(s).
+            quantity (int or numpy.ndarray): The quantity or quantities to purchase.
+
+        Returns:
+            float or numpy.ndarray: price * quantity.
+        """
+        return price * quantity
+
+    @abstractmethod
+    def apply_to_cart(self, cart: Cart):
+        """
+        Apply the rule to a cart.
+
+        Args:
+            cart (Cart): The cart, after the rules of earlier stages.
+
+        Returns:
+            float or int: The amount saved, in cents if cart.cents is set; 0 if
+                the rule does not apply.
+        """
+        pass
+
+
+class CartPercentDiscount(CartRule):
+    """
+    Takes a percentage off the lines of some products, or of every line.
+    """
+    stage = STAGE_PERCENT
+
+    def __init__(self, percent: float, products=None):
+        """
+        Initialize a CartPercentDiscount rule.
+
+        Args:
+            percent (float): The percentage discount to apply.
+            products (iterable or None): The discounted products, or None for every line.
+
+        Raises:
+            ValueError: If percent is not between 0 and 100.
+        """
+        if not 0 <= percent <= 100:
+            raise ValueError("Percent must be between 0 and 100.")
+        super().__init__(f"{percent}% Off", products)
+        self.percent = percent
+
+    def apply_to_cart(self, cart: Cart):
+        """
+        Reduce each matching line by the percentage and return the total saved.
+
+        In cents the percentage is taken to basis points and each line's
+        discount is rounded half to even, as PercentDiscount.calculate_cents does.
+        """
+        lines = cart.lines_for(self.product_ids)
+        if cart.cents:
+            basis_points = round(self.percent * 100)
+            saved = 0
+            for line in lines:
+                discount = divide(line.total * basis_points, 10_000)
+                line.total -= discount
+                saved += discount
+            return saved
+        saved = 0.0
+        for line in lines:
+            discount = line.total * (self.percent / 100)
+            line.total -= discount
+            saved += discount
+        return saved
+
+
+class Bundle(CartRule):
+    """
+    Sells each complete set of products for a fixed price.
+
+    The units in a set are used up: a later bundle only sees the units that
+    earlier ones left, so no unit is discounted by two bundles.
+    """
+    stage = STAGE_BUNDLE
+
+    def __init__(self, products, price: float):
+        """
+        Initialize a Bundle rule.
+
+        Args:
+            products (iterable): The products in one set; repeat a product to
+                require several units of it.
+            price (float): The price of one complete set.
+
+        Raises:
+            ValueError: If there are no products or the price is negative.
+        """
+        products = list(products)
+        if not products:
+            raise ValueError("A bundle needs at least one product.")
+        if price < 0:
+            raise ValueError("Price should not be negative.")
+        super().__init__("Bundle", products)
+        self.price = price
+        self.units = {}
+        for product in products:
+            self.units[product.product_id] = self.units.get(product.product_id, 0) + 1
+
+    def apply_to_cart(self, cart: Cart):
+        """
+        Use up the cart's complete sets and return what they save against the bundle price.
+
+        In cents, the full price of the sets is rounded half to even per product.
+        """
+        lines = cart.lines
+        sets = min((lines[product_id].quantity - lines[product_id].used) // units
+                   if product_id in lines else 0
+                   for product_id, units in self.units.items())
+        if cart.cents:
+            if not sets:
+                return 0
+            # What the sets cost after the earlier stages, at each line's average unit price.
+            full_price = sum(divide(lines[product_id].total * units * sets,
+                                    lines[product_id].quantity)
+                             for product_id, units in self.units.items())
+            bundle_price = sets * to_cents(self.price)
+        else:
+            if not sets:
+                return 0.0
+            full_price = sets * sum(lines[product_id].total / lines[product_id].quantity * units
+                                    for product_id, units in self.units.items())
+            bundle_price = sets * self.price
+        if full_price <= bundle_price:
+            # The bundle would cost more; leave the units for other bundles.
+            return 0 if cart.cents else 0.0
+        for product_id, units in self.units.items():
+            lines[product_id].used += sets * units
+        return full_price - bundle_price
+
+
+class SpendAndSave(CartRule):
+    """
+    Saves a fixed amount once the cart total reaches a threshold.
+    """
+    stage = STAGE_SPEND
+
+    def __init__(self, threshold: float, saving: float):
+        """
+        Initialize a SpendAndSave rule.
+
+        Args:
+            threshold (float): The cart total that unlocks the saving.
+            saving (float): The amount saved.
+
+        Raises:
+            ValueError: If the saving is negative or larger than the threshold.
+        """
+        if not 0 <= saving <= threshold:
+            raise ValueError("Saving must be between 0 and the threshold.")
+        super().__init__(f"Spend {threshold} Save {saving}")
+        self.threshold = threshold
+        self.saving = saving
+
+    def apply_to_cart(self, cart: Cart):
+        """Return the saving if the cart total has reached the threshold."""
+        if cart.cents:
+            return to_cents(self.saving) if cart.total >= to_cents(self.threshold) else 0
+        return self.saving if cart.total >= self.threshold else 0.0
+
+
+def line_price(product, quantity: int) -> float:
+    """Price one line as Product.buy does, applying the product's own promotion."""
+    promotion = product.promotion
+    if promotion is not None:
+        return promotion.apply_promotion(product, quantity)
+    return product.price * quantity
+
+
+class CartPromotionEngine:
+    """
+    Prices carts against a set of cart rules compiled into a per-product index.
+    """
+    def __init__(self, rules=()):
+        """
+        Initialize an engine.
+
+        Args:
+            rules (iterable): The initial cart rules.
+        """
+        # Rule -> sequence number, keeping rules of one stage in the order added.
+        self._rules = {}
+        self._sequence = count()
+        # Product id -> rules mentioning it; rules for every cart are kept apart.
+        self._rules_by_product = {}
+        self._cart_wide = []
+        for rule in rules:
+            self.add_rule(rule)
+
+    def __len__(self):
+        return len(self._rules)
+
+    @property
+    def rules(self) -> list:
+        """list: The rules, in the order they were added."""
+        return list(self._rules)
+
+    def add_rule(self, rule: CartRule):
+        """
+        Add a rule to the plan.
+
+        Args:
+            rule (CartRule): The rule to add.
+
+        Raises:
+            TypeError: If rule is not a CartRule.
+            ValueError: If the rule was already added.
+        """
+        if not isinstance(rule, CartRule):
+            raise TypeError("Rules must be CartRule instances.")
+        if rule in self._rules:
+            raise ValueError("Rule is already in the engine.")
+        self._rules[rule] = next(self._sequence)
+        if rule.product_ids is None:
+            self._cart_wide.append(rule)
+        else:
+            for product_id in rule.product_ids:
+                self._rules_by_product.setdefault(product_id, []).append(rule)
+
+    def remove_rule(self, rule: CartRule):
+        """
+        Remove a rule from the plan.
+
+        Args:
+            rule (CartRule): The rule to remove.
+
+        Raises:
+            ValueError: If the rule is not in the engine.
+        """
+        if self._rules.pop(rule, None) is None:
+            raise ValueError("Rule not found in the engine.")
+        if rule.product_ids is None:
+            self._cart_wide.remove(rule)
+            return
+        for product_id in rule.product_ids:
+            rules = self._rules_by_product[product_id]
+            rules.remove(rule)
+            if not rules:
+                del self._rules_by_product[product_id]
+
+    def _applicable(self, cart: Cart) -> list:
+        """Return the rules a cart can trigger, in evaluation order."""
+        found = set(self._cart_wide)
+        rules_by_product = self._rules_by_product
+        for product_id in cart.lines:
+            rules = rules_by_product.get(product_id)
+            if rules:
+                found.update(rules)
+        sequence = self._rules
+        return sorted(found, key=lambda rule: (rule.stage, sequence[rule]))
+
+    def price(self, shopping_list: list, price_line=line_price) -> CartPrice:
+        """
+        Price a shopping list, applying every cart rule it triggers.
+
+        Args:
+            shopping_list (list): A list of (Product, quantity) tuples.
+            price_line (callable): Prices one (product, quantity) line before cart
+                rules; by default as Product.buy does.
+
+        Returns:
+            CartPrice: The total, the subtotal and the discounts applied.
+        """
+        return self.price_lines((product, quantity, price_line(product, quantity))
+                                for product, quantity in shopping_list)
+
+    def price_lines(self, priced_lines, cents: bool = False) -> CartPrice:
+        """
+        Apply the cart rules to lines that are already priced.
+
+        Store.order uses this with the totals its purchases returned, so each
+        line is priced once and the cart total matches what was bought.
+
+        Args:
+            priced_lines (iterable): (Product, quantity, line total) tuples, each
+                total after the product's own promotion.
+            cents (bool): The line totals are integer cents; price the whole
+                cart in cents.
+
+        Returns:
+            CartPrice: The total, the subtotal and the discounts applied.
+        """
+        cart = Cart(cents)
+        lines = cart.lines
+        for product, quantity, total in priced_lines:
+            cart.subtotal += total
+            line = lines.get(product.product_id)
+            if line is None:
+                lines[product.product_id] = CartLine(product, quantity, total)
+            else:
+                line.quantity += quantity
+                line.total += total
+        discounts = []
+        for rule in self._applicable(cart):
+            saved = rule.apply_to_cart(cart)
+            if saved:
+                cart.discount += saved
+                discounts.append((rule.name, saved))
+        return CartPrice(cart.total, cart.subtotal, tuple(discounts))
@@ -0,0 +1,430 @@
+"""
+Bulk import of a product catalog from CSV or JSON.
+
+A catalog holds one product per row, with these fields:
+
+    name       required; a non-empty string, unique within the catalog
+    price      required; a non-negative number. In CSV, each price is read as an
+               int if it is written as one ("1450") and as a float otherwise
+    quantity   a non-negative integer; required except for non-stocked products
+    kind       optional; product (the default), non_stocked or limited
+    maximum    the per-order limit of a limited product; a positive integer
+
+CSV files start with a header row naming the columns, in any order. JSON Lines
+files (.jsonl) hold one object per line; .json files hold an array of objects,
+which is parsed whole, so prefer JSON Lines for large catalogs.
+
+Rows are read in chunks and validated a column at a time: each column is
+converted with one map() call and range-checked with one min() call, and only a
+column that fails is walked value by value to find the offending rows. Every
+bad row in the file is reported together, in one CatalogImportError. Valid rows
+become products through the trusted constructors and stream straight into
+Store.from_trusted, so the rows are walked once and no product list is built
+in between. The import only creates long-lived objects, and collections that
+walk millions of new products would otherwise take about half the time, so
+after each chunk the objects built so far are moved to the collector's
+permanent generation with gc.freeze() and released with gc.unfreeze() at the
+end; the collector keeps running throughout. With pause_gc=True it is paused
+outright, which is a little faster still but affects every thread of the
+process, so it is off by default and the command-line tool turns it on.
+
+Usage:
+    python catalog_import.py CATALOG [--format csv|jsonl|json] [--chunk-size N]
+"""
+import argparse
+import csv
+import gc
+import json
+import os
+import time
+from collections import namedtuple
+from itertools import islice
+from math import isfinite
+
+from catalog_snapshot import KIND_PRODUCT, KIND_NON_STOCKED, KIND_LIMITED
+from products import Product, NonStockedProduct, LimitedProduct
+from store import Store
+
+FORMATS = ("csv", "jsonl", "json")
+REQUIRED_FIELDS = ("name", "price", "quantity")
+KIND_NAMES = {None: KIND_PRODUCT, "": KIND_PRODUCT, "product": KIND_PRODUCT,
+              "non_stocked": KIND_NON_STOCKED, "limited": KIND_LIMITED}
+
+
+class RowError(namedtuple("RowError", "row field message")):
+    """
+    A problem with one row of a catalog.
+
+    Attributes:
+        row (int): The 1-based number of the row among the catalog's data rows;
+            for JSON Lines, the line number.
+        field (str or None): The offending field, or None if the whole row is bad.
+        message (str): What is wrong.
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        where = f"row {self.row}" if self.field is None else f"row {self.row}, {self.field}"
+        return f"{where}: {self.message}"
+
+
+class CatalogImportError(ValueError):
+    """
+    Raised when a catalog has invalid rows; lists all of them, not just the first.
+
+    Attributes:
+        errors (list): The RowError for every problem found, in row order.
+    """
+    def __init__(self, errors: list, shown: int = 20):
+        self.errors = sorted(errors, key=lambda error: error.row)
+        lines = [str(error) for error in self.errors[:shown]]
+        if len(self.errors) > shown:
+            lines.append(f"... and {len(self.errors) - shown} more")
+        super().__init__(f"{len(self.errors)} problems found in the catalog:\n" + "\n".join(lines))
+
+
+def _csv_number(text: str):
+    """Parse a CSV price, as an int if it is whole and a float otherwise."""
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _json_number(value):
+    """Accept a JSON price, which must already be a number."""
+    if type(value) not in (int, float):
+        raise TypeError
+    return value
+
+
+def _json_integer(value):
+    """Accept a JSON quantity or maximum, which must already be an integer."""
+    if type(value) is not int:
+        raise TypeError
+    return value
+
+
+def _parse_numbers(values: list) -> list:
+    """
+    Convert a CSV price column, each value as _csv_number() would.
+
+    A column of ints is converted in one call. Otherwise the column is read as
+    floats, and only the values that come out whole are retried as ints, so
+    "1450" stays an int next to "150.5" without raising for every float.
+    """
+    try:
+        return list(map(int, values))
+    except ValueError:
+        pass
+    return [_csv_number(text) if number.is_integer() else number
+            for text, number in zip(values, map(float, values))]
+
+
+# Per format: how to convert a price column, a single price, and a single integer.
+PARSERS = {
+    "csv": (_parse_numbers, _csv_number, int),
+    "json": (lambda values: list(map(_json_number, values)), _json_number, _json_integer),
+}
+
+
+def _parse(values: list, convert_all, convert, rows, field: str, expected: str,
+           errors: list) -> list:
+    """
+    Convert a column in one call, or value by value if any value is bad.
+
+    Returns:
+        list: The converted values, with None wherever a value was reported as bad.
+    """
+    try:
+        return convert_all(values)
+    except (TypeError, ValueError, KeyError):
+        pass
+    parsed = []
+    for row, value in zip(rows, values):
+        try:
+            parsed.append(convert(value))
+        except (TypeError, ValueError, KeyError):
+            problem = "is missing" if value in ("", None) else f"{value!r} is not {expected}"
+            errors.append(RowError(row, field, problem + "."))
+            parsed.append(None)
+    return parsed
+
+
+def _check_minimum(values: list, rows, field: str, minimum, errors: list, finite: bool = False):
+    """Report values below a minimum, scanning the column only if min() finds one."""
+    present = values if None not in values else [value for value in values if value is not None]
+    if not present or (min(present) >= minimum and (not finite or all(map(isfinite, present)))):
+        return
+    for row, value in zip(rows, values):
+        if value is not None and not (value >= minimum and (not finite or isfinite(value))):
+            errors.append(RowError(row, field, f"{value!r} is below {minimum} or not finite."
+                                   if finite else f"{value!r} is below {minimum}."))
+
+
+def _check_names(names: list, rows, seen: set, errors: list):
+    """Report names that are empty, not strings, or already used."""
+    if all(names) and set(map(type, names)) == {str}:
+        unique = set(names)
+        if len(unique) == len(names) and seen.isdisjoint(unique):
+            seen.update(unique)
+            return
+    for row, name in zip(rows, names):
+        if type(name) is not str or not name:
+            errors.append(RowError(row, "name", f"{name!r} is not a non-empty string."))
+        elif name in seen:
+            errors.append(RowError(row, "name", f"{name!r} appears more than once."))
+        else:
+            seen.add(name)
+
+
+def _chunk_products(rows, columns: dict, parsers: tuple, seen: set, errors: list):
+    """
+    Validate one chunk column by column and yield its products.
+
+    Nothing is yielded once any row in the catalog has failed, since the import
+    will be rejected; the rest of the file is still validated so every bad row
+    is reported.
+
+    Args:
+        rows (range or list): The row number of each row in the chunk.
+        columns (dict): Field name -> list of raw values, aligned with rows.
+        parsers (tuple): The format's price column, price and integer converters.
+        seen (set): The names of earlier chunks; this chunk's names are added.
+        errors (list): Receives a RowError for every problem found.
+    """
+    parse_prices, parse_price, parse_integer = parsers
+    names = columns["name"]
+    _check_names(names, rows, seen, errors)
+    prices = _parse(columns["price"], parse_prices, parse_price, rows, "price",
+                    "a number", errors)
+    _check_minimum(prices, rows, "price", 0, errors, finite=True)
+
+    kinds = columns.get("kind")
+    if kinds is None:
+        kinds = [KIND_PRODUCT] * len(names)
+    else:
+        kinds = _parse(kinds, lambda values: list(map(KIND_NAMES.__getitem__, values)),
+                       KIND_NAMES.__getitem__, rows, "kind", "a known kind", errors)
+    quantities = columns["quantity"]
+    if KIND_NON_STOCKED in kinds:
+        quantities = [0 if kind == KIND_NON_STOCKED else quantity
+                      for kind, quantity in zip(kinds, quantities)]
+    quantities = _parse(quantities, lambda values: list(map(parse_integer, values)),
+                        parse_integer, rows, "quantity", "an integer", errors)
+    _check_minimum(quantities, rows, "quantity", 0, errors)
+
+    maximums = None
+    if KIND_LIMITED in kinds:
+        limited = [index for index, kind in enumerate(kinds) if kind == KIND_LIMITED]
+        limited_rows = [rows[index] for index in limited]
+        values = columns.get("maximum") or [None] * len(names)
+        parsed = _parse([values[index] for index in limited],
+                        lambda values: list(map(parse_integer, values)), parse_integer,
+                        limited_rows, "maximum", "an integer", errors)
+        _check_minimum(parsed, limited_rows, "maximum", 1, errors)
+        maximums = [None] * len(names)
+        for index, maximum in zip(limited, parsed):
+            maximums[index] = maximum
+
+    if errors:
+        return
+    if maximums is None and KIND_NON_STOCKED not in kinds:
+        yield from map(Product.from_trusted, names, prices, quantities)
+        return
+    if maximums is None:
+        maximums = [None] * len(names)
+    for kind, name, price, quantity, maximum in zip(kinds, names, prices, quantities, maximums):
+        if kind == KIND_PRODUCT:
+            yield Product.from_trusted(name, price, quantity)
+        elif kind == KIND_LIMITED:
+            yield LimitedProduct.from_trusted(name, price, quantity, maximum)
+        else:
+            yield NonStockedProduct.from_trusted(name, price)
+
+
+def _csv_chunks(file, chunk_size: int, errors: list):
+    """Yield (row numbers, columns) chunks from a CSV file with a header row."""
+    reader = csv.reader(file)
+    header = next(reader, None)
+    if header is None:
+        raise ValueError("The catalog has no header row.")
+    header = [field.strip() for field in header]
+    missing = [field for field in REQUIRED_FIELDS if field not in header]
+    if missing:
+        raise ValueError(f"The catalog is missing the columns: {', '.join(missing)}.")
+    width = len(header)
+    positions = {field: position for position, field in enumerate(header)}
+    first_row = 1
+    while True:
+        chunk = list(islice(reader, chunk_size))
+        if not chunk:
+            return
+        rows = range(first_row, first_row + len(chunk))
+        first_row += len(chunk)
+        if set(map(len, chunk)) != {width}:
+            kept_rows, kept = [], []
+            for row, values in zip(rows, chunk):
+                if len(values) == width:
+                    kept_rows.append(row)
+                    kept.append(values)
+                elif values:
+                    errors.append(RowError(row, None, f"has {len(values)} fields, "
+                                                      f"expected {width}."))
+            rows, chunk = kept_rows, kept
+            if not chunk:
+                continue
+        transposed = list(zip(*chunk))
+        yield rows, {field: transposed[position] for field, position in positions.items()}
+
+
+def _record_chunks(numbered, chunk_size: int, errors: list):
+    """Yield (row numbers, columns) chunks from (row number, JSON value) pairs."""
+    fields = REQUIRED_FIELDS + ("kind", "maximum")
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            return
+        rows, objects = [], []
+        for row, record in chunk:
+            if isinstance(record, dict):
+                rows.append(row)
+                objects.append(record)
+            else:
+                errors.append(RowError(row, None, "is not a JSON object."))
+        if objects:
+            yield rows, {field: [record.get(field) for record in objects] for field in fields}
+
+
+def _json_lines(file, errors: list):
+    """
+    Decode a JSON Lines file into (line number, value) pairs.
+
+    Blank lines are skipped; undecodable lines are reported and skipped.
+    """
+    for row, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield row, json.loads(line)
+        except ValueError:
+            errors.append(RowError(row, None, "is not valid JSON."))
+
+
+def _frozen_chunks(chunks, parsers: tuple, seen: set, errors: list, freezing: bool):
+    """Yield every chunk's products, freezing what has been built after each chunk."""
+    for rows, columns in chunks:
+        yield from _chunk_products(rows, columns, parsers, seen, errors)
+        if freezing:
+            gc.freeze()
+
+
+def read_catalog(file, format: str = "csv", chunk_size: int = 10_000,
+                 pause_gc: bool = False) -> Store:
+    """
+    Read a catalog from an open file and build a store from it.
+
+    Args:
+        file: The open catalog, in text mode (for CSV, opened with newline="").
+        format (str): "csv", "jsonl" or "json".
+        chunk_size (int): How many rows to validate at once.
+        pause_gc (bool): Disable the cyclic garbage collector, process-wide,
+            while the products are built; much faster for large catalogs.
+
+    Returns:
+        Store: A store holding every product in the catalog, in catalog order.
+
+    Raises:
+        CatalogImportError: If any row is invalid; lists every invalid row.
+        ValueError: If the format or chunk size is invalid, the CSV header
+            lacks a required column, or a .json file is not an array.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}.")
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive.")
+    errors = []
+    if format == "csv":
+        chunks = _csv_chunks(file, chunk_size, errors)
+        parsers = PARSERS["csv"]
+    else:
+        if format == "jsonl":
+            records = _json_lines(file, errors)
+        else:
+            records = json.load(file)
+            if not isinstance(records, list):
+                raise ValueError("A JSON catalog must be an array of objects.")
+            records = enumerate(records, start=1)
+        chunks = _record_chunks(records, chunk_size, errors)
+        parsers = PARSERS["json"]
+    seen = set()
+    collecting = pause_gc and gc.isenabled()
+    if collecting:
+        gc.disable()
+    # A caller that froze objects already (say, before forking) keeps them frozen.
+    freezing = not gc.get_freeze_count()
+    try:
+        store = Store.from_trusted(_frozen_chunks(chunks, parsers, seen, errors, freezing))
+    finally:
+        if collecting:
+            gc.enable()
+        if freezing:
+            gc.unfreeze()
+    if errors:
+        raise CatalogImportError(errors)
+    return store
+
+
+def load_catalog(path: str, format: str = None, chunk_size: int = 10_000,
+                 pause_gc: bool = False) -> Store:
+    """
+    Load a catalog file and build a store from it.
+
+    Args:
+        path (str): The catalog file.
+        format (str): "csv", "jsonl" or "json"; taken from the file extension if not given.
+        chunk_size (int): How many rows to validate at once.
+        pause_gc (bool): Disable the cyclic garbage collector while the
+            products are built, as in read_catalog().
+
+    Returns:
+        Store: A store holding every product in the catalog, in catalog order.
+
+    Raises:
+        CatalogImportError: If any row is invalid; lists every invalid row.
+        ValueError: If the format cannot be determined or the CSV header lacks
+            a required column.
+    """
+    if format is None:
+        format = os.path.splitext(path)[1].lstrip(".").lower()
+    with open(path, encoding="utf-8", newline="" if format == "csv" else None) as file:
+        return read_catalog(file, format, chunk_size, pause_gc)
+
+
+def main(argv=None):
+    """
+    Load a catalog file and print a summary of the resulting store.
+
+    Args:
+        argv (list): Command-line arguments; defaults to sys.argv[1:].
+    """
+    parser = argparse.ArgumentParser(description="Validate and load a product catalog.")
+    parser.add_argument("path", help="CSV, JSON Lines or JSON catalog")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        store = load_catalog(args.path, args.format, args.chunk_size, pause_gc=True)
+    except CatalogImportError as error:
+        print(error)
+        return 1
+    elapsed = time.perf_counter() - start
+    print(f"Loaded {len(store.list_of_products)} products "
+          f"({store.get_total_quantity()} units) in {elapsed:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,443 @@
+"""
+Binary catalog snapshots that open instantly through mmap.
+
+A snapshot file holds every product of a Store: its id, kind, name, price,
+quantity, LimitedProduct maximum, active flag and promotion. The layout is:
+
+    header        magic, version, counts, section offsets, total quantity, max id
+    records       one fixed-size record per product, in store order
+    name order    record numbers sorted by encoded name, for binary search
+    id order      record numbers sorted by product id, for binary search
+    names         the UTF-8 names, concatenated
+    promotions    a JSON list describing each distinct promotion
+
+open_snapshot() maps the file and returns a SnapshotStore, which turns records
+into Product objects only when they are looked up, so opening takes the same
+few milliseconds whatever the catalog size.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+
+from products import Product, NonStockedProduct, LimitedProduct, reserve_product_ids
+from promotions import PercentDiscount, SecondHalfPrice, ThirdOneFree
+from store import ProductList, Store
+
+MAGIC = b"BBSNAP\r\n"
+VERSION = 1
+
+# magic, version, record count, then offsets of the record, name order, id order,
+# names and promotions sections, the promotions length, total quantity and max id.
+HEADER = struct.Struct("<8sIQQQQQQQqQ")
+# product id, price, quantity, maximum, name offset, name length, kind, flags, promotion
+RECORD = struct.Struct("<qdqqQIBBi")
+INDEX_ENTRY = struct.Struct("<I")
+
+KIND_PRODUCT = 0
+KIND_NON_STOCKED = 1
+KIND_LIMITED = 2
+
+FLAG_ACTIVE = 1
+# Set when the price was an int, so it is restored as an int rather than a float.
+FLAG_INT_PRICE = 2
+
+NO_PROMOTION = -1
+
+# Promotion classes a snapshot can hold, by the name stored in the file. Each is
+# rebuilt by calling the class with its instance attributes other than "name".
+PROMOTION_TYPES = {cls.__name__: cls for cls in (PercentDiscount, SecondHalfPrice, ThirdOneFree)}
+
+
+def encode_promotion(promotion) -> dict:
+    """
+    Describe a promotion as JSON-compatible data.
+
+    Args:
+        promotion (Promotion): A promotion whose class is in PROMOTION_TYPES.
+
+    Returns:
+        dict: The promotion's type name and constructor arguments.
+
+    Raises:
+        ValueError: If the promotion's class is not registered.
+    """
+    type_name = type(promotion).__name__
+    if PROMOTION_TYPES.get(type_name) is not type(promotion):
+        raise ValueError(f"Promotion type {type_name} cannot be saved.")
+    params = {key: value for key, value in vars(promotion).items()
+              if key != "name" and not key.startswith("_")}
+    return {"type": type_name, "params": params}
+
+
+def decode_promotion(data: dict):
+    """
+    Rebuild a promotion described by encode_promotion().
+
+    Args:
+        data (dict): The promotion description.
+
+    Returns:
+        Promotion: The promotion.
+
+    Raises:
+        ValueError: If the promotion type is unknown.
+    """
+    try:
+        cls = PROMOTION_TYPES[data["type"]]
+    except KeyError:
+        raise ValueError(f"Unknown promotion type {data.get('type')}.") from None
+    return cls(**data["params"])
+
+
+def product_kind(product) -> int:
+    """Return the snapshot kind code of a product."""
+    if isinstance(product, NonStockedProduct):
+        return KIND_NON_STOCKED
+    if isinstance(product, LimitedProduct):
+        return KIND_LIMITED
+    return KIND_PRODUCT
+
+
+def build_product(kind: int, name: str, price, quantity: int, maximum: int, active: bool,
+                  promotion, product_id: int):
+    """
+    Create a product of the given kind that keeps a previously assigned id.
+
+    The values are trusted, as they were validated before they were saved.
+
+    Returns:
+        Product: A Product, NonStockedProduct or LimitedProduct.
+    """
+    if kind == KIND_NON_STOCKED:
+        product = NonStockedProduct.from_trusted(name, price, active, promotion)
+    elif kind == KIND_LIMITED:
+        product = LimitedProduct.from_trusted(name, price, quantity, maximum, active, promotion)
+    else:
+        product = Product.from_trusted(name, price, quantity, active, promotion)
+    product.product_id = product_id
+    return product
+
+
+def write_snapshot(store: Store, path: str):
+    """
+    Write every product of a store to a snapshot file.
+
+    The file is written next to its destination and moved into place, so a
+    reader never sees a partially written snapshot.
+
+    Args:
+        store (Store): The store to save.
+        path (str): The snapshot file to create or replace.
+
+    Raises:
+        ValueError: If a product has a promotion that cannot be saved.
+    """
+    products = store.list_of_products
+    promotions = []
+    promotion_slots = {}
+    names = bytearray()
+    records = bytearray()
+    encoded_names = []
+    total_quantity = 0
+    max_id = 0
+    for product in products:
+        promotion = product.promotion
+        slot = NO_PROMOTION
+        if promotion is not None:
+            slot = promotion_slots.get(id(promotion))
+            if slot is None:
+                slot = promotion_slots[id(promotion)] = len(promotions)
+                promotions.append(encode_promotion(promotion))
+        kind = product_kind(product)
+        encoded = product.name.encode("utf-8")
+        flags = (FLAG_ACTIVE if product.active else 0)
+        if isinstance(product.price, int):
+            flags |= FLAG_INT_PRICE
+        maximum = product.maximum if kind == KIND_LIMITED else 0
+        records += RECORD.pack(product.product_id, product.price, product.quantity, maximum,
+                               len(names), len(encoded), kind, flags, slot)
+        names += encoded
+        encoded_names.append(encoded)
+        total_quantity += product.quantity
+        max_id = max(max_id, product.product_id)
+
+    count = len(products)
+    name_order = sorted(range(count), key=encoded_names.__getitem__)
+    id_order = sorted(range(count), key=lambda index: products[index].product_id)
+    promotions_blob = json.dumps(promotions).encode("utf-8")
+
+    records_offset = HEADER.size
+    name_order_offset = records_offset + len(records)
+    id_order_offset = name_order_offset + count * INDEX_ENTRY.size
+    names_offset = id_order_offset + count * INDEX_ENTRY.size
+    promotions_offset = names_offset + len(names)
+    header = HEADER.pack(MAGIC, VERSION, count, records_offset, name_order_offset,
+                         id_order_offset, names_offset, promotions_offset,
+                         len(promotions_blob), total_quantity, max_id)
+
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(header)
+        file.write(records)
+        file.write(struct.pack(f"<{count}I", *name_order))
+        file.write(struct.pack(f"<{count}I", *id_order))
+        file.write(names)
+        file.write(promotions_blob)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+
+class SnapshotStore(Store):
+    """
+    A Store backed by a memory-mapped snapshot whose products load on demand.
+
+    A record becomes a regular Product the first time it is looked up, and from
+    then on behaves exactly as in a Store: orders, listeners and removal all work
+    on the loaded product. Totals are kept without loading anything; calls that
+    need every product (list_of_products, get_all_products) load the rest first,
+    while page_products() and iter_products() load only the records each page needs.
+    """
+    def __init__(self, path: str):
+        """
+        Map a snapshot file.
+
+        Args:
+            path (str): The snapshot file, as written by write_snapshot().
+
+        Raises:
+            ValueError: If the file is not a snapshot this version can read.
+        """
+        super().__init__([])
+        self.path = path
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            self._map.close()
+            raise ValueError(f"{path} is not a catalog snapshot.")
+        (magic, version, self._count, self._records_offset, self._name_order_offset,
+         self._id_order_offset, self._names_offset, promotions_offset, promotions_length,
+         total_quantity, max_id) = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a version {VERSION} catalog snapshot.")
+        promotions_blob = self._map[promotions_offset:promotions_offset + promotions_length]
+        self._promotions = [decode_promotion(data) for data in json.loads(promotions_blob)]
+        reserve_product_ids(max_id)
+        # Quantity held by records that have not been loaded yet.
+        self._unloaded_quantity = total_quantity
+        # Record number -> product, for every record loaded so far.
+        self._loaded = {}
+        self._all_loaded = self._count == 0
+        # Serializes loading so two threads never load the same record twice.
+        self._load_lock = threading.RLock()
+
+    def close(self):
+        """Release the memory map. Loaded products stay usable."""
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _record_name(self, index: int) -> bytes:
+        """Return the encoded name of a record."""
+        offset, length = struct.unpack_from(
+            "<QI", self._map, self._records_offset + index * RECORD.size + 32)
+        start = self._names_offset + offset
+        return self._map[start:start + length]
+
+    def _record_id(self, index: int) -> int:
+        """Return the product id of a record."""
+        return struct.unpack_from("<q", self._map, self._records_offset + index * RECORD.size)[0]
+
+    def _search(self, order_offset: int, target, key_of):
+        """Binary search a sorted index section; return the matching record or None."""
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            index = INDEX_ENTRY.unpack_from(self._map, order_offset + middle * INDEX_ENTRY.size)[0]
+            key = key_of(index)
+            if key < target:
+                low = middle + 1
+            elif key > target:
+                high = middle
+            else:
+                return index
+        return None
+
+    def _find_record(self, key):
+        """Return the number of the not-yet-loaded record for a name or id, or None."""
+        if isinstance(key, str):
+            index = self._search(self._name_order_offset, key.encode("utf-8"), self._record_name)
+        elif isinstance(key, int):
+            index = self._search(self._id_order_offset, key, self._record_id)
+        else:
+            return None
+        if index is None or index in self._loaded:
+            return None
+        return index
+
+    def _load(self, index: int):
+        """Turn a record into a product and add it to the store's indexes."""
+        (product_id, price, quantity, maximum, _, _, kind, flags,
+         slot) = RECORD.unpack_from(self._map, self._records_offset + index * RECORD.size)
+        if flags & FLAG_INT_PRICE:
+            price = int(price)
+        promotion = None if slot == NO_PROMOTION else self._promotions[slot]
+        product = build_product(kind, self._record_name(index).decode("utf-8"), price, quantity,
+                                maximum, bool(flags & FLAG_ACTIVE), promotion, product_id)
+        self._loaded[index] = product
+        self._unloaded_quantity -= quantity
+        Store._index_products(self, (product,))
+        return product
+
+    def _load_all(self):
+        """Load every remaining record, keeping snapshot order ahead of added products."""
+        with self._load_lock:
+            if self._all_loaded:
+                return
+            for index in range(self._count):
+                if index not in self._loaded:
+                    self._load(index)
+            self._all_loaded = True
+        with self._lock:
+            ordered = {}
+            for index in range(self._count):
+                product = self._loaded[index]
+                if self._products_by_id.get(product.product_id) is product:
+                    ordered[product.product_id] = product
+            ordered.update(self._products_by_id)
+            self._products_by_id = ordered
+            self._active_order_stale = True
+
+    def _load_following(self, after, wanted: int, active_only: bool):
+        """
+        Load unloaded records with ids above a cursor, in id order, until `wanted`
+        of them can be listed or none are left.
+
+        Every record up to the last one loaded is then in memory, and at least
+        `wanted` listable products lie in that range, so a page read from the
+        store's own indexes cannot miss a record still in the snapshot.
+        """
+        with self._load_lock:
+            low, high = 0, self._count
+            if after is not None:
+                while low < high:
+                    middle = (low + high) // 2
+                    index = INDEX_ENTRY.unpack_from(
+                        self._map, self._id_order_offset + middle * INDEX_ENTRY.size)[0]
+                    if self._record_id(index) <= after:
+                        low = middle + 1
+                    else:
+                        high = middle
+            found = 0
+            for position in range(low, self._count):
+                if found == wanted:
+                    break
+                index = INDEX_ENTRY.unpack_from(
+                    self._map, self._id_order_offset + position * INDEX_ENTRY.size)[0]
+                if index not in self._loaded:
+                    product = self._load(index)
+                    if product.active or not active_only:
+                        found += 1
+
+    def page_products(self, after: int = None, limit: int = 20,
+                      active_only: bool = True):
+        """
+        Return one page of products in product id order, loading only the records it needs.
+
+        Args:
+            after (int or None): The cursor returned with the previous page, or
+                None for the first page.
+            limit (int): The most products to return.
+            active_only (bool): Leave out inactive products.
+
+        Returns:
+            ProductPage: The products and the cursor for the next page.
+
+        Raises:
+            ValueError: If limit is not positive.
+        """
+        if limit <= 0:
+            raise ValueError("limit must be positive.")
+        if not self._all_loaded:
+            # One more than the page, so the store can tell whether a next page exists.
+            self._load_following(after, limit + 1, active_only)
+        return super().page_products(after, limit, active_only)
+
+    def _index_products(self, products):
+        """Register added products, rejecting names and ids still in the snapshot."""
+        super()._index_products(map(self._check_unloaded, products))
+
+    def _check_unloaded(self, product):
+        """Return a product being added, or raise if the snapshot still holds its name or id."""
+        if self._find_record(product.name) is not None:
+            raise ValueError(f"A product named {product.name} is already in the store.")
+        if self._find_record(product.product_id) is not None:
+            raise ValueError("Product is already in the store.")
+        return product
+
+    @property
+    def list_of_products(self) -> ProductList:
+        """ProductList: All products in the store, loading any that are still unloaded."""
+        self._load_all()
+        return super().list_of_products
+
+    def get_product(self, key):
+        """
+        Look up a product by its name or product id, loading it if needed.
+
+        Args:
+            key (str or int): The product's name or its product id.
+
+        Returns:
+            Product: The matching product.
+
+        Raises:
+            ValueError: If no product in the store matches the key.
+        """
+        try:
+            return super().get_product(key)
+        except ValueError:
+            with self._load_lock:
+                index = self._find_record(key)
+                if index is None:
+                    return super().get_product(key)
+                return self._load(index)
+
+    def get_total_quantity(self) -> int:
+        """
+        Return the total quantity of all products, without loading any.
+
+        Returns:
+            int: The sum of the quantities of all products.
+        """
+        return self._unloaded_quantity + super().get_total_quantity()
+
+    def get_all_products(self) -> list:
+        """
+        Retrieve all active products, loading any that are still unloaded.
+
+        Returns:
+            list: A list of active Product instances, in store order.
+        """
+        self._load_all()
+        return super().get_all_products()
+
+
+def open_snapshot(path: str) -> SnapshotStore:
+    """
+    Open a snapshot file as a lazily loading store.
+
+    Args:
+        path (str): The snapshot file.
+
+    Returns:
+        SnapshotStore: The store.
+    """
+    return SnapshotStore(path)
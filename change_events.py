@@ -0,0 +1,162 @@
+"""
+An in-process change feed for a store's catalog.
+
+Instead of polling Store.get_all_products() and diffing, downstream caches
+subscribe to the store's EventBus and receive batches of ChangeEvents: one per
+product that was added, removed or changed since the previous batch.
+
+Changes are coalesced per product within a window. Every product changed in
+the window appears once in the next batch, with the first old value and the
+last new value of each attribute. Attributes that end where they started are
+left out. A product added and removed in the same window does not appear at all.
+"""
+import threading
+from collections import namedtuple
+
+ADDED = "added"
+CHANGED = "changed"
+REMOVED = "removed"
+
+
+class ChangeEvent(namedtuple("ChangeEvent", "kind product changes")):
+    """
+    The net change to one product over a coalescing window.
+
+    Attributes:
+        kind (str): ADDED, CHANGED or REMOVED.
+        product (Product): The product. Its attributes are read at delivery, so
+            they show its state at the end of the window.
+        changes (dict): Attribute name -> (old value, new value) for a CHANGED
+            event; empty for ADDED and REMOVED events.
+    """
+    __slots__ = ()
+
+
+class EventBus:
+    """
+    Collects product changes and delivers them to subscribers in coalesced batches.
+
+    The first change of a window starts a timer; when it fires, the pending
+    changes are delivered on the timer's thread, so subscribers must be
+    thread-safe. A window of 0 delivers each change as it is published. flush()
+    delivers the pending changes immediately.
+
+    Publishing costs nothing until something subscribes: the bus is falsy while
+    it has no subscribers, and stores only publish to a truthy bus.
+    """
+    def __init__(self, window: float = 0.1):
+        """
+        Initialize a bus.
+
+        Args:
+            window (float): Seconds over which changes are coalesced.
+
+        Raises:
+            ValueError: If window is negative.
+        """
+        if window < 0:
+            raise ValueError("window must not be negative.")
+        self.window = window
+        self._subscribers = ()
+        # Product id -> [kind, product, {attribute: (old value, new value)}],
+        # in the order the products first changed.
+        self._pending = {}
+        self._timer = None
+        self._lock = threading.Lock()
+        # Held while a batch is delivered, so batches never overlap or arrive out of order.
+        self._delivery_lock = threading.Lock()
+        self.batches = 0
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self, callback):
+        """
+        Register a callback that receives each batch as a list of ChangeEvents.
+
+        Args:
+            callback (callable): Called as ``callback(events)``.
+        """
+        # Subscribers are an immutable tuple, replaced on change, as for Product listeners.
+        self._subscribers = self._subscribers + (callback,)
+
+    def unsubscribe(self, callback):
+        """
+        Unregister a callback previously passed to subscribe.
+
+        Args:
+            callback (callable): The callback to stop calling.
+
+        Raises:
+            ValueError: If the callback is not subscribed.
+        """
+        subscribers = list(self._subscribers)
+        subscribers.remove(callback)
+        self._subscribers = tuple(subscribers)
+
+    def publish(self, kind: str, product, attribute: str = None, old_value=None,
+                new_value=None):
+        """
+        Record a change, merging it with the product's other changes in this window.
+
+        Args:
+            kind (str): ADDED, CHANGED or REMOVED.
+            product (Product): The product concerned.
+            attribute (str): For CHANGED, the attribute that changed.
+            old_value: For CHANGED, the attribute's previous value.
+            new_value: For CHANGED, the attribute's new value.
+        """
+        with self._lock:
+            entry = self._pending.get(product.product_id)
+            if entry is None:
+                entry = self._pending[product.product_id] = [kind, product, {}]
+            elif kind == REMOVED and entry[0] == ADDED:
+                # Added and removed within the window: nothing to report.
+                del self._pending[product.product_id]
+            elif kind != CHANGED:
+                entry[0] = kind
+                entry[1] = product
+                entry[2].clear()
+            if kind == CHANGED and entry[0] == CHANGED:
+                changes = entry[2]
+                first = changes.get(attribute)
+                changes[attribute] = (old_value if first is None else first[0], new_value)
+            timer = None
+            if self.window and self._timer is None:
+                timer = self._timer = threading.Timer(self.window, self.flush)
+                timer.daemon = True
+        if timer is not None:
+            timer.start()
+        elif not self.window:
+            self.flush()
+
+    def on_product_change(self, product, attribute, old_value, new_value):
+        """Product listener publishing an attribute change."""
+        self.publish(CHANGED, product, attribute, old_value, new_value)
+
+    def flush(self) -> int:
+        """
+        Deliver the pending changes now.
+
+        Returns:
+            int: The number of events delivered.
+        """
+        with self._delivery_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                timer, self._timer = self._timer, None
+            if timer is not None:
+                timer.cancel()
+            events = []
+            for kind, product, changes in pending.values():
+                if kind == CHANGED:
+                    changes = {attribute: change for attribute, change in changes.items()
+                               if change[0] != change[1]}
+                    if not changes:
+                        continue
+                events.append(ChangeEvent(kind, product, changes))
+            if events:
+                self.batches += 1
+                for subscriber in self._subscribers:
+                    subscriber(events)
+            return len(events)
@@ -0,0 +1,505 @@
+from array import array
+from itertools import compress
+from operator import mul
+
+from products import (NonStockedProduct, LimitedProduct, InsufficientStockError,
+                      PurchaseLimitError, next_product_id)
+from promotions import Promotion
+
+# Values stored in the kind column.
+KIND_PRODUCT = 0
+KIND_NON_STOCKED = 1
+KIND_LIMITED = 2
+
+# Marker in the promotion column for rows without a promotion.
+NO_PROMOTION = -1
+
+
+class ProductView:
+    """
+    A lightweight handle on one row of a ColumnarStore.
+
+    A view behaves like a Product (it has the same attributes, show() and buy())
+    but holds no data of its own: every read and write goes to the store's columns.
+    """
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store, row: int):
+        """
+        Initialize a view on a store row.
+
+        Args:
+            store (ColumnarStore): The store owning the row.
+            row (int): The row index in the store's columns.
+        """
+        self._store = store
+        self._row = row
+
+    def __eq__(self, other):
+        return (isinstance(other, ProductView)
+                and other._store is self._store and other._row == self._row)
+
+    def __hash__(self):
+        return hash((id(self._store), self._row))
+
+    def __repr__(self):
+        return f"ProductView({self.show()!r})"
+
+    @property
+    def product_id(self):
+        """int: The product's stable id."""
+        return self._store._product_ids[self._row]
+
+    @property
+    def name(self):
+        """str: The product's name."""
+        return self._store._names[self._row]
+
+    @property
+    def price(self):
+        """int or float: Get or set the product's price, as the type it was given in."""
+        return self._store._price_at(self._row)
+
+    @price.setter
+    def price(self, value):
+        if not isinstance(value, (int, float)):
+            raise TypeError("Price must be a number.")
+        if value < 0:
+            raise ValueError("Price should not be negative.")
+        self._store._prices[self._row] = value
+        self._store._int_prices[self._row] = isinstance(value, int)
+
+    @property
+    def quantity(self):
+        """int: Get or set the product's quantity."""
+        return self._store._quantities[self._row]
+
+    @quantity.setter
+    def quantity(self, value):
+        if not isinstance(value, int):
+            raise TypeError("Quantity must be an integer.")
+        if value < 0:
+            raise ValueError("Quantity should not be negative.")
+        self._store._set_quantity(self._row, value)
+
+    @property
+    def active(self):
+        """bool: Get or set the product's active status."""
+        return bool(self._store._active[self._row])
+
+    @active.setter
+    def active(self, value):
+        if not isinstance(value, bool):
+            raise TypeError("Active must be a boolean.")
+        self._store._active[self._row] = value
+
+    @property
+    def promotion(self):
+        """Promotion or None: Get or set the product's promotion."""
+        return self._store._promotion_at(self._row)
+
+    @promotion.setter
+    def promotion(self, value):
+        if value is not None and not isinstance(value, Promotion):
+            raise TypeError("Promotion must be a Promotion instance or None.")
+        self._store._promotion_ids[self._row] = self._store._promotion_slot(value)
+
+    @property
+    def maximum(self):
+        """int or None: The per-order purchase limit of a limited product."""
+        if self._store._kinds[self._row] != KIND_LIMITED:
+            return None
+        return self._store._maximums[self._row]
+
+    def show(self) -> str:
+        """
+        Return a string representation of the product, matching Product.show().
+
+        Returns:
+            str: The product's details.
+        """
+        kind = self._store._kinds[self._row]
+        if kind == KIND_NON_STOCKED:
+            return f"{self.name}, Price: {self.price}, Non-stocked product"
+        base_info = f"{self.name}, Price: {self.price}, Quantity: {self.quantity}"
+        promotion = self.promotion
+        if promotion:
+            base_info += f", Promotion: {promotion.name}"
+        if kind == KIND_LIMITED:
+            base_info += f", Limited to {self.maximum} per order."
+        return base_info
+
+    def buy(self, quantity: int) -> float:
+        """
+        Process a purchase with the semantics of the matching Product class.
+
+        Args:
+            quantity (int): The quantity to purchase.
+
+        Returns:
+            float: The total price for the purchase.
+
+        Raises:
+            ValueError: If the quantity is not positive, exceeds the stock or
+                exceeds the per-order maximum.
+        """
+        return self._store._buy(self._row, quantity)
+
+
+class ColumnarStore:
+    """
+    A store that keeps its catalog in parallel typed arrays instead of Product objects.
+
+    Each product occupies one row across the name, price, quantity, active,
+    kind, maximum and promotion columns, plus a flag column recording which
+    prices were given as integers so views return and show them as Product
+    does. The total quantity is a running total kept up to date on every write,
+    as in Store, and other whole-catalog queries such as the inventory value
+    sum over the columns; callers receive ProductView handles that behave like
+    Product instances.
+    """
+    def __init__(self, list_of_products: list = None):
+        """
+        Initialize the store, copying the data out of any given products.
+
+        Args:
+            list_of_products (list): Optional Product instances to load.
+
+        Raises:
+            TypeError: If list_of_products is not a list.
+        """
+        if list_of_products is None:
+            list_of_products = []
+        if not isinstance(list_of_products, list):
+            raise TypeError("list_of_products must be a list.")
+        self._names = []
+        self._product_ids = array("q")
+        self._prices = array("d")
+        self._int_prices = array("b")
+        self._quantities = array("q")
+        # The sum of the quantity column, updated wherever a quantity is written.
+        self._total_quantity = 0
+        self._active = array("b")
+        self._kinds = array("b")
+        self._maximums = array("q")
+        self._promotion_ids = array("i")
+        self._promotions = []
+        self._promotion_slots = {}
+        self._rows_by_id = {}
+        self._rows_by_name = {}
+        for product in list_of_products:
+            self._append_product(product)
+
+    def __len__(self):
+        return len(self._rows_by_id)
+
+    def _promotion_slot(self, promotion) -> int:
+        """Return the promotion table slot for a promotion, registering it if new."""
+        if promotion is None:
+            return NO_PROMOTION
+        slot = self._promotion_slots.get(id(promotion))
+        if slot is None:
+            slot = len(self._promotions)
+            self._promotions.append(promotion)
+            self._promotion_slots[id(promotion)] = slot
+        return slot
+
+    def _price_at(self, row: int):
+        """Return a row's price as an int if it was given as one, else as a float."""
+        price = self._prices[row]
+        return int(price) if self._int_prices[row] else price
+
+    def _promotion_at(self, row: int):
+        """Return the promotion assigned to a row, or None."""
+        slot = self._promotion_ids[row]
+        return None if slot == NO_PROMOTION else self._promotions[slot]
+
+    def _append_product(self, product) -> ProductView:
+        """Copy a Product instance into a new row."""
+        if not hasattr(product, "buy"):
+            raise TypeError("All items must be product instances.")
+        if isinstance(product, NonStockedProduct):
+            kind, maximum = KIND_NON_STOCKED, 0
+        elif isinstance(product, LimitedProduct):
+            kind, maximum = KIND_LIMITED, product.maximum
+        else:
+            kind, maximum = KIND_PRODUCT, 0
+        return self.append(product.name, product.price, product.quantity, kind=kind,
+                           maximum=maximum, promotion=product.promotion,
+                           active=product.active, product_id=product.product_id)
+
+    def append(self, name: str, price: float, quantity: int, kind: int = KIND_PRODUCT,
+               maximum: int = 0, promotion=None, active: bool = True,
+               product_id: int = None) -> ProductView:
+        """
+        Add a product row directly from its field values.
+
+        This is the bulk-loading path: it performs the same checks as the
+        Product constructors but never builds a Product object.
+
+        Args:
+            name (str): The product's name.
+            price (float): The product's price.
+            quantity (int): The available quantity (ignored for non-stocked products).
+            kind (int): One of KIND_PRODUCT, KIND_NON_STOCKED or KIND_LIMITED.
+            maximum (int): The per-order limit for limited products.
+            promotion (Promotion or None): The promotion to apply.
+            active (bool): Whether the product is available for purchase.
+            product_id (int): The id to keep; a new one is allocated when omitted.
+
+        Returns:
+            ProductView: A view on the new row.
+
+        Raises:
+            TypeError: If a field has the wrong type.
+            ValueError: If a field is out of range or the name or id is taken.
+        """
+        if not isinstance(name, str):
+            raise TypeError("Name must be a string.")
+        if not name:
+            raise ValueError("Name should not be empty.")
+        if not isinstance(price, (int, float)):
+            raise TypeError("Price must be a number.")
+        if price < 0:
+            raise ValueError("Price should not be negative.")
+        if kind == KIND_NON_STOCKED:
+            quantity = 0
+        if not isinstance(quantity, int):
+            raise TypeError("Quantity must be an integer.")
+        if quantity < 0:
+            raise ValueError("Quantity should not be negative.")
+        if kind == KIND_LIMITED:
+            if not isinstance(maximum, int):
+                raise TypeError("Maximum must be an integer.")
+            if maximum <= 0:
+                raise ValueError("Maximum must be positive.")
+        elif kind not in (KIND_PRODUCT, KIND_NON_STOCKED):
+            raise ValueError(f"Unknown product kind {kind}.")
+        if promotion is not None and not isinstance(promotion, Promotion):
+            raise TypeError("Promotion must be a Promotion instance or None.")
+        if name in self._rows_by_name:
+            raise ValueError(f"A product named {name} is already in the store.")
+        if product_id is None:
+            product_id = next_product_id()
+        elif product_id in self._rows_by_id:
+            raise ValueError("Product is already in the store.")
+
+        row = len(self._names)
+        self._names.append(name)
+        self._product_ids.append(product_id)
+        self._prices.append(price)
+        self._int_prices.append(isinstance(price, int))
+        self._quantities.append(quantity)
+        self._total_quantity += quantity
+        self._active.append(active)
+        self._kinds.append(kind)
+        self._maximums.append(maximum)
+        self._promotion_ids.append(self._promotion_slot(promotion))
+        self._rows_by_id[product_id] = row
+        self._rows_by_name[name] = row
+        return ProductView(self, row)
+
+    def _set_quantity(self, row: int, value: int):
+        """Store a validated quantity, deactivating the row when it reaches zero."""
+        self._total_quantity += value - self._quantities[row]
+        self._quantities[row] = value
+        if value == 0:
+            self._active[row] = False
+
+    def _buy(self, row: int, quantity: int) -> float:
+        """Apply one purchase to a row, following the rules of its product kind."""
+        kind = self._kinds[row]
+        if kind == KIND_LIMITED and quantity > self._maximums[row]:
+            raise PurchaseLimitError(
+                f"Quantity {quantity} exceeds the limit of {self._maximums[row]}.")
+        if quantity <= 0:
+            raise ValueError("The quantity has to be positive.")
+        if kind != KIND_NON_STOCKED and quantity > self._quantities[row]:
+            raise InsufficientStockError("Not enough quantity in storage.")
+        slot = self._promotion_ids[row]
+        if slot != NO_PROMOTION:
+            total_price = self._promotions[slot].apply_promotion(ProductView(self, row), quantity)
+        else:
+            total_price = self._price_at(row) * quantity
+        if kind != KIND_NON_STOCKED:
+            self._set_quantity(row, self._quantities[row] - quantity)
+        return total_price
+
+    def _row_of(self, product) -> int:
+        """Return the row of a view belonging to this store."""
+        if not isinstance(product, ProductView) or product._store is not self:
+            raise ValueError("Product not found in the store.")
+        if self._rows_by_id.get(product.product_id) != product._row:
+            raise ValueError("Product not found in the store.")
+        return product._row
+
+    def add_product(self, product) -> ProductView:
+        """
+        Add a product to the store by copying its fields into a new row.
+
+        Args:
+            product (Product): The product instance to add.
+
+        Returns:
+            ProductView: A view on the new row.
+
+        Raises:
+            ValueError: If the product is None or falsy, or already in the store.
+        """
+        if not product:
+            raise ValueError("Product should not be empty.")
+        view = self._append_product(product)
+        print(f"Added {view.show()} to the store.")
+        return view
+
+    def _remove_row(self, row: int):
+        """
+        Retire a row.
+
+        Rows are never reused so that outstanding views keep pointing at the
+        same product; a retired row is zeroed out and dropped from the indexes.
+        """
+        del self._rows_by_id[self._product_ids[row]]
+        del self._rows_by_name[self._names[row]]
+        self._total_quantity -= self._quantities[row]
+        self._quantities[row] = 0
+        self._active[row] = False
+
+    def remove_product(self, product):
+        """
+        Remove a product from the store.
+
+        Args:
+            product (ProductView): A view returned by this store.
+
+        Raises:
+            ValueError: If the product is None or not found in the store.
+        """
+        if not product:
+            raise ValueError("Product should not be empty.")
+        self._remove_row(self._row_of(product))
+
+    def get_product(self, key) -> ProductView:
+        """
+        Look up a product by its name or product id.
+
+        Args:
+            key (str or int): The product's name or its product id.
+
+        Returns:
+            ProductView: A view on the matching row.
+
+        Raises:
+            ValueError: If no product in the store matches the key.
+        """
+        if isinstance(key, str):
+            row = self._rows_by_name.get(key)
+        else:
+            row = self._rows_by_id.get(key)
+        if row is None:
+            raise ValueError(f"Product {key} not found in the store.")
+        return ProductView(self, row)
+
+    def remove_by_key(self, key) -> ProductView:
+        """
+        Remove a product identified by its name or product id.
+
+        Args:
+            key (str or int): The product's name or its product id.
+
+        Returns:
+            ProductView: A view on the removed row.
+
+        Raises:
+            ValueError: If no product in the store matches the key.
+        """
+        view = self.get_product(key)
+        self._remove_row(view._row)
+        return view
+
+    @property
+    def list_of_products(self) -> list:
+        """list: Views on all products in the store, in the order they were added."""
+        return [ProductView(self, row) for row in self._rows_by_id.values()]
+
+    def get_total_quantity(self) -> int:
+        """
+        Calculate the total quantity of all products in the store.
+
+        Returns:
+            int: The sum of the quantity column, kept as a running total.
+        """
+        return self._total_quantity
+
+    def get_all_products(self) -> list:
+        """
+        Retrieve all active products from the store.
+
+        Returns:
+            list: Views on the active rows, in store order.
+        """
+        return [ProductView(self, row)
+                for row in compress(range(len(self._active)), self._active)]
+
+    def get_inventory_value(self) -> float:
+        """
+        Calculate the value of the stock on hand at list price.
+
+        Promotions are ignored and non-stocked products contribute nothing.
+
+        Returns:
+            float: The sum of price times quantity over all rows.
+        """
+        return sum(map(mul, self._prices, self._quantities))
+
+    def order(self, shopping_list: list) -> float:
+        """
+        Process an order based on the provided shopping list.
+
+        The order is all-or-nothing, as in Store.order: per-order limits are
+        checked for every line and stock against the combined demand per row
+        before anything is bought, and if a purchase still fails every row
+        already bought is restored.
+
+        Args:
+            shopping_list (list): A list of (ProductView, quantity) tuples.
+
+        Returns:
+            float: The total price for the order.
+
+        Raises:
+            ValueError: If the shopping list is improperly formatted, names a
+                product not in this store, or any product's quantity is insufficient.
+            PurchaseLimitError: If a line exceeds its product's per-order maximum.
+        """
+        if not all(isinstance(item, tuple) and len(item) == 2 for item in shopping_list):
+            raise ValueError("Shopping list must contain tuples of (Product, quantity).")
+        kinds, quantities, maximums = self._kinds, self._quantities, self._maximums
+        demand = {}
+        lines = []
+        for product, quantity in shopping_list:
+            row = self._row_of(product)
+            if quantity <= 0:
+                raise ValueError("Quantity must be positive.")
+            if kinds[row] == KIND_LIMITED and quantity > maximums[row]:
+                raise PurchaseLimitError(
+                    f"Quantity {quantity} exceeds the limit of {maximums[row]}.")
+            demand[row] = demand.get(row, 0) + quantity
+            lines.append((row, quantity))
+        for row, requested in demand.items():
+            if kinds[row] != KIND_NON_STOCKED and requested > quantities[row]:
+                raise InsufficientStockError(
+                    f"Not enough quantity for product {self._names[row]}. "
+                    f"Requested: {requested}, Available: {quantities[row]}"
+                )
+        saved = [(row, quantities[row], self._active[row]) for row in demand]
+        total_price = 0.0
+        try:
+            for row, quantity in lines:
+                total_price += self._buy(row, quantity)
+        except Exception:
+            for row, quantity, active in saved:
+                self._set_quantity(row, quantity)
+                self._active[row] = active
+            raise
+        return total_price
@@ -1,7 +1,14 @@
+import argparse
 import sys
 from products import Product, NonStockedProduct, LimitedProduct
 from store import Store
 from promotions import PercentDiscount, SecondHalfPrice, ThirdOneFree
+from order_ingest import IngestStats
+from profiling import ProfileSession
+from search_index import fold
+
+# How many products the menu lists at a time.
+PAGE_SIZE = 20
 
 
 def quit_program():
@@ -12,17 +19,27 @@ def quit_program():
     sys.exit()
 
 
-def list_all_products(store_object):
+def list_all_products(store_object, page_size=PAGE_SIZE):
     """
-    Display a numbered list of all active products in the store.
+    Display a numbered list of all active products in the store, a page at a time.
+
+    Each page is printed as soon as it is fetched, so the first lines appear at
+    once however large the catalog is.
 
     Args:
         store_object (Store): The store instance containing products.
+        page_size (int): How many products to show before asking to continue.
     """
-    all_products = store_object.get_all_products()
     print("------")
-    for idx, product in enumerate(all_products, start=1):
-        print(f"{idx}. {product.show()}")
+    cursor = None
+    number = 0
+    while True:
+        page = store_object.page_products(cursor, page_size)
+        for number, product in enumerate(page.items, start=number + 1):
+            print(f"{number}. {product.show()}")
+        cursor = page.next_cursor
+        if cursor is None or input("Press Enter for more products, or q to stop: ") == "q":
+            break
     print("-----")
 
 
@@ -39,30 +56,65 @@ def get_all_quantity(store_object):
     print("------")
 
 
-def wrap_order(store_object):
+def find_product(store_object, choice):
+    """
+    Find the active product a name, or the start of a name, refers to.
+
+    Args:
+        store_object (Store): The store to search.
+        choice (str): The name or its start, in any case.
+
+    Returns:
+        Product or None: The product whose name is the choice, or the only one
+            starting with it; None if there is no such product.
+    """
+    # An exact name sorts before the longer names it starts.
+    matches = store_object.search_by_prefix(choice, limit=2).items
+    if len(matches) == 1 or matches and fold(matches[0].name) == fold(choice):
+        return matches[0]
+    return None
+
+
+def wrap_order(store_object, page_size=PAGE_SIZE):
     """
     Handle the interactive process for placing an order:
-    - Display all active products.
-    - Prompt user for product selection and quantity.
+    - Display the first page of active products; + shows the next page.
+    - Prompt user for product selection, by its number in the pages shown or by
+      the start of its name, and quantity.
     - Build a shopping list and process the order.
 
     Args:
         store_object (Store): The store instance to order products from.
+        page_size (int): How many products to show at a time.
     """
-    all_products = store_object.get_all_products()
-    for idx, product in enumerate(all_products, start=1):
-        print(f"{idx}. {product.show()}")
+    shown = []
+    cursor = None
 
+    def show_next_page():
+        page = store_object.page_products(cursor, page_size)
+        for idx, product in enumerate(page.items, start=len(shown) + 1):
+            print(f"{idx}. {product.show()}")
+        shown.extend(page.items)
+        return page.next_cursor
+
+    cursor = show_next_page()
     shopping_list = []
     while True:
-        user_choice = input("Which product do you want to buy? (Enter empty to finish): ")
+        prompt = "Which product do you want to buy? (Enter empty to finish"
+        prompt += ", + for more products): " if cursor is not None else "): "
+        user_choice = input(prompt)
         if not user_choice:
             break
+        if user_choice == "+" and cursor is not None:
+            cursor = show_next_page()
+            continue
 
-        try:
+        if user_choice.isdigit():
             product_idx = int(user_choice) - 1
-            chosen_product = all_products[product_idx]
-        except (ValueError, IndexError):
+            chosen_product = shown[product_idx] if 0 <= product_idx < len(shown) else None
+        else:
+            chosen_product = find_product(store_object, user_choice)
+        if chosen_product is None:
             print("Invalid Product choice. Please try again")
             continue
 
@@ -121,9 +173,122 @@ def start(store_object):
             funct_dict[user_input]()
 
 
-def main():
+class BatchStats(IngestStats):
     """
-    Set up the store with sample products and promotions, then start the CLI.
+    Counters for a batch run: IngestStats for its orders, plus every command.
+
+    Attributes:
+        commands (int): Commands run so far, orders included.
+    """
+    def __init__(self):
+        super().__init__()
+        self.commands = 0
+
+    def summary(self) -> str:
+        """
+        Return a one-line report of the counters and throughput.
+
+        Returns:
+            str: The report.
+        """
+        return f"{self.commands} commands, {super().summary()}"
+
+
+def parse_items(store_object, text):
+    """
+    Parse the line items of a batch order command.
+
+    Args:
+        store_object (Store): The store the products are looked up in.
+        text (str): Items separated by ";", each a quantity and a product name
+            or the start of one, e.g. "2 Google Pixel 7; 1 MacBook".
+
+    Returns:
+        list: The shopping list of (Product, quantity) tuples.
+
+    Raises:
+        ValueError: If an item has no positive quantity or no single matching product.
+    """
+    shopping_list = []
+    for item in text.split(";"):
+        quantity_str, _, choice = item.strip().partition(" ")
+        if not quantity_str.isdigit() or int(quantity_str) <= 0:
+            raise ValueError(f"Item {item.strip()!r} must start with a positive quantity.")
+        product = find_product(store_object, choice.strip())
+        if product is None:
+            raise ValueError(f"No single active product matches {choice.strip()!r}.")
+        shopping_list.append((product, int(quantity_str)))
+    return shopping_list
+
+
+def run_batch(store_object, lines, output=None, buffer_lines=1000):
+    """
+    Run a script of store commands without prompting, one command per line:
+
+        list                        every active product, numbered
+        quantity                    the total quantity in the store
+        order 2 Pixel; 1 MacBook    an order of quantity / product-name items
+        quit                        stop reading the script
+
+    Blank lines and lines starting with # are skipped. Orders go through
+    Store.order, as in the interactive menu; a failed order is reported with its
+    line number and the script goes on. Output is collected and written
+    buffer_lines lines at a time.
+
+    Args:
+        store_object (Store): The store to run the commands against.
+        lines (iterable): The script's lines, e.g. an open file or sys.stdin.
+        output (file): Where to write; defaults to sys.stdout.
+        buffer_lines (int): How many output lines to collect before writing them.
+
+    Returns:
+        BatchStats: The finished counters.
+    """
+    output = sys.stdout if output is None else output
+    stats = BatchStats()
+    buffer = []
+    for line_number, line in enumerate(lines, start=1):
+        command, _, argument = line.strip().partition(" ")
+        if not command or command.startswith("#"):
+            continue
+        if command == "quit":
+            break
+        stats.commands += 1
+        if command == "list":
+            buffer.append("------")
+            buffer.extend(f"{number}. {product.show()}" for number, product
+                          in enumerate(store_object.iter_products(), start=1))
+            buffer.append("-----")
+        elif command == "quantity":
+            buffer.append(f"The total quantity is {store_object.get_total_quantity()}")
+        elif command == "order":
+            stats.orders += 1
+            try:
+                total_price = store_object.order(parse_items(store_object, argument))
+            except ValueError as error:
+                stats.failed += 1
+                buffer.append(f"line {line_number}: Order failed: {error}")
+            else:
+                stats.succeeded += 1
+                stats.revenue += total_price
+                buffer.append(f"line {line_number}: Order placed. Total price is {total_price}€")
+        else:
+            buffer.append(f"line {line_number}: Unknown command {command!r}.")
+        if len(buffer) >= buffer_lines:
+            output.write("\n".join(buffer) + "\n")
+            buffer.clear()
+    if buffer:
+        output.write("\n".join(buffer) + "\n")
+    stats.finish()
+    return stats
+
+
+def build_sample_store():
+    """
+    Build the store with sample products and promotions.
+
+    Returns:
+        Store: The sample store.
     """
     # Create a sample product list with various product types.
     product_list = [
@@ -139,8 +304,38 @@ def main():
     product_list[1].promotion = SecondHalfPrice()  # Second item half price for Bose Earbuds
     product_list[2].promotion = ThirdOneFree()  # Buy 2, get 1 free for Google Pixel 7
 
-    store = Store(product_list)
-    start(store)
+    return Store(product_list)
+
+
+def main(argv=None):
+    """
+    Set up the store with sample products and promotions, then start the CLI.
+
+    Args:
+        argv (list): Command-line arguments; defaults to sys.argv[1:].
+    """
+    parser = argparse.ArgumentParser(description="Best Buy store command-line interface.")
+    parser.add_argument("--batch", metavar="SCRIPT",
+                        help="run the commands in SCRIPT, or - for stdin, without prompting")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="profile orders, purchases and promotions; write reports under DIR")
+    args = parser.parse_args(argv)
+
+    store = build_sample_store()
+    session = ProfileSession(args.profile) if args.profile is not None else None
+    if session is not None:
+        session.start()
+    try:
+        if args.batch is None:
+            start(store)
+        else:
+            source = sys.stdin if args.batch == "-" else open(args.batch, encoding="utf-8")
+            with source:
+                stats = run_batch(store, source)
+            print(stats.summary())
+    finally:
+        if session is not None:
+            print(f"Profile written to {session.stop()}")
 
 
 if __name__ == "__main__":
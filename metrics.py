@@ -0,0 +1,346 @@
+"""
+Optional instrumentation of the store's hot paths.
+
+Nothing is measured until enable() is called. enable() wraps Store.order (and
+its validation and buying phases), the buy() method of every product class and
+Promotion.apply_promotion with timing and counting code; disable() puts the
+original methods back, so a disabled process runs exactly the uninstrumented
+code.
+
+Collected metrics:
+    store_orders_total{result}              orders by outcome: ok, insufficient_stock,
+                                            purchase_limit or invalid
+    store_order_seconds                     latency of a whole Store.order call
+    store_order_validate_seconds            time spent validating stock
+    store_order_apply_seconds               time spent buying the lines
+    product_buys_total{kind, result}        buy() calls by product class and outcome
+    product_buy_seconds{kind}               buy() latency by product class
+    promotion_apply_seconds{promotion}      apply_promotion latency by promotion class
+
+Usage:
+    import metrics
+    metrics.enable()
+    ...
+    print(metrics.to_prometheus())
+    data = metrics.snapshot()
+"""
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+from products import (Product, NonStockedProduct, LimitedProduct, InsufficientStockError,
+                      PurchaseLimitError)
+from promotions import Promotion
+from store import Store
+
+# Upper bounds of the latency histogram buckets, in seconds.
+LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+                   1e-3, 2.5e-3, 1e-2, 1e-1, 1.0)
+
+
+class Counter:
+    """A monotonically increasing count."""
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        """Add to the count."""
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """Counts of observations per bucket, plus their sum and count."""
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        # One count per bucket plus a final one for values above every bound.
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Record one observation."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class MetricFamily:
+    """
+    A named metric with one child Counter or Histogram per combination of label values.
+    """
+    def __init__(self, name: str, kind: str, help_text: str, label_names=()):
+        """
+        Initialize a metric family.
+
+        Args:
+            name (str): The metric name.
+            kind (str): "counter" or "histogram".
+            help_text (str): The description exported with the metric.
+            label_names (tuple): The names of the labels.
+        """
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.label_names = label_names
+        self.children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """
+        Return the child for the given label values, creating it on first use.
+
+        Args:
+            *values: One value per label name.
+
+        Returns:
+            Counter or Histogram: The child metric.
+        """
+        child = self.children.get(values)
+        if child is None:
+            with self._lock:
+                child = self.children.get(values)
+                if child is None:
+                    child = Counter() if self.kind == "counter" else Histogram()
+                    self.children[values] = child
+        return child
+
+
+class Registry:
+    """The set of metric families collected by the instrumentation."""
+
+    def __init__(self):
+        self.orders = MetricFamily("store_orders_total", "counter",
+                                   "Store.order calls by outcome.", ("result",))
+        self.order_seconds = MetricFamily("store_order_seconds", "histogram",
+                                          "Latency of Store.order.")
+        self.validate_seconds = MetricFamily("store_order_validate_seconds", "histogram",
+                                             "Time Store.order spends validating stock.")
+        self.apply_seconds = MetricFamily("store_order_apply_seconds", "histogram",
+                                          "Time Store.order spends buying the lines.")
+        self.buys = MetricFamily("product_buys_total", "counter",
+                                 "Product.buy calls by product class and outcome.",
+                                 ("kind", "result"))
+        self.buy_seconds = MetricFamily("product_buy_seconds", "histogram",
+                                        "Latency of Product.buy by product class.", ("kind",))
+        self.promotion_seconds = MetricFamily("promotion_apply_seconds", "histogram",
+                                              "Latency of apply_promotion by promotion class.",
+                                              ("promotion",))
+        self.families = (self.orders, self.order_seconds, self.validate_seconds,
+                         self.apply_seconds, self.buys, self.buy_seconds, self.promotion_seconds)
+
+
+REGISTRY = Registry()
+_originals = {}
+_buy_depth = threading.local()
+
+
+def _outcome(error) -> str:
+    """Classify an exception raised by an order or a purchase."""
+    if isinstance(error, InsufficientStockError):
+        return "insufficient_stock"
+    if isinstance(error, PurchaseLimitError):
+        return "purchase_limit"
+    return "invalid"
+
+
+def _timed(original, family):
+    """Wrap a method so its latency is observed in an unlabelled histogram."""
+    histogram = family.labels()
+
+    @wraps(original)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+    return wrapper
+
+
+def _instrument_order(original):
+    """Wrap Store.order to count outcomes and observe latency."""
+    histogram = REGISTRY.order_seconds.labels()
+    orders = REGISTRY.orders
+
+    @wraps(original)
+    def order(self, shopping_list, cents=False):
+        start = time.perf_counter()
+        try:
+            total_price = original(self, shopping_list, cents)
+        except ValueError as error:
+            orders.labels(_outcome(error)).inc()
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - start)
+        orders.labels("ok").inc()
+        return total_price
+    return order
+
+
+def _instrument_buy(original, kind: str):
+    """
+    Wrap a buy() method to count outcomes and observe latency.
+
+    LimitedProduct.buy calls Product.buy; only the outermost call is recorded.
+    """
+    histogram = REGISTRY.buy_seconds.labels(kind)
+    buys = REGISTRY.buys
+
+    @wraps(original)
+    def buy(self, quantity, cents=False):
+        depth = getattr(_buy_depth, "value", 0)
+        if depth:
+            return original(self, quantity, cents)
+        _buy_depth.value = 1
+        start = time.perf_counter()
+        try:
+            total_price = original(self, quantity, cents)
+        except ValueError as error:
+            buys.labels(kind, _outcome(error)).inc()
+            raise
+        finally:
+            _buy_depth.value = 0
+            histogram.observe(time.perf_counter() - start)
+        buys.labels(kind, "ok").inc()
+        return total_price
+    return buy
+
+
+def _instrument_promotion(original):
+    """Wrap Promotion.apply_promotion to observe latency per promotion class."""
+    family = REGISTRY.promotion_seconds
+
+    @wraps(original)
+    def apply_promotion(self, product, quantity):
+        start = time.perf_counter()
+        try:
+            return original(self, product, quantity)
+        finally:
+            family.labels(type(self).__name__).observe(time.perf_counter() - start)
+    return apply_promotion
+
+
+def _patch(owner, name: str, wrapper):
+    """Replace owner.name with wrapper(original), remembering the original."""
+    original = owner.__dict__[name]
+    _originals[(owner, name)] = original
+    if isinstance(original, staticmethod):
+        setattr(owner, name, staticmethod(wrapper(original.__func__)))
+    else:
+        setattr(owner, name, wrapper(original))
+
+
+def is_enabled() -> bool:
+    """
+    Return whether instrumentation is currently installed.
+
+    Returns:
+        bool: True between enable() and disable().
+    """
+    return bool(_originals)
+
+
+def enable():
+    """Install the instrumentation. Calling it again has no effect."""
+    if _originals:
+        return
+    _patch(Store, "order", _instrument_order)
+    _patch(Store, "_validate_demand", lambda original: _timed(original, REGISTRY.validate_seconds))
+    _patch(Store, "_apply_order", lambda original: _timed(original, REGISTRY.apply_seconds))
+    for cls in (Product, NonStockedProduct, LimitedProduct):
+        _patch(cls, "buy", lambda original, kind=cls.__name__: _instrument_buy(original, kind))
+    _patch(Promotion, "apply_promotion", _instrument_promotion)
+
+
+def disable():
+    """Remove the instrumentation, restoring the original methods. Metrics are kept."""
+    while _originals:
+        (owner, name), original = _originals.popitem()
+        setattr(owner, name, original)
+
+
+def reset():
+    """Discard every collected metric."""
+    for family in REGISTRY.families:
+        with family._lock:
+            family.children.clear()
+    # Wrappers hold references to unlabelled children; reinstall them if active.
+    if is_enabled():
+        disable()
+        enable()
+
+
+def snapshot() -> dict:
+    """
+    Return the collected metrics as plain data.
+
+    Returns:
+        dict: Metric name -> list of samples. Counter samples are
+            {"labels": {...}, "value": n}; histogram samples are
+            {"labels": {...}, "count": n, "sum": s, "buckets": {upper bound: cumulative count}}.
+    """
+    data = {}
+    for family in REGISTRY.families:
+        samples = []
+        for values, child in list(family.children.items()):
+            labels = dict(zip(family.label_names, values))
+            if family.kind == "counter":
+                samples.append({"labels": labels, "value": child.value})
+            else:
+                with child._lock:
+                    counts, total, count = list(child.counts), child.sum, child.count
+                cumulative, buckets = 0, {}
+                for bound, bucket_count in zip(child.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    buckets[bound] = cumulative
+                samples.append({"labels": labels, "count": count, "sum": total,
+                                "buckets": buckets})
+        data[family.name] = samples
+    return data
+
+
+def _escape(value) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict) -> str:
+    """Format labels as Prometheus text, including the braces, or '' if there are none."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def to_prometheus() -> str:
+    """
+    Render the collected metrics in the Prometheus text exposition format.
+
+    Returns:
+        str: The exposition text.
+    """
+    lines = []
+    for name, samples in snapshot().items():
+        family = next(family for family in REGISTRY.families if family.name == name)
+        lines.append(f"# HELP {name} {family.help_text}")
+        lines.append(f"# TYPE {name} {family.kind}")
+        for sample in samples:
+            labels = sample["labels"]
+            if family.kind == "counter":
+                lines.append(f"{name}{_format_labels(labels)} {sample['value']}")
+                continue
+            for bound, count in sample["buckets"].items():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels({**labels, 'le': le})} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {sample['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {sample['count']}")
+    return "\n".join(lines) + "\n"
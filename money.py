@@ -0,0 +1,80 @@
+"""
+Exact money arithmetic in integer cents.
+
+Prices are entered and shown as ordinary numbers (12.99), but floats cannot hold
+most cent amounts exactly, so long sums of float totals drift. Amounts kept as
+integer cents add up exactly, and Python ints sum as fast as floats.
+
+Conversions round half to even ("banker's rounding"), and so does divide(),
+which the promotions use wherever a cent amount has to be split.
+"""
+from decimal import Decimal, ROUND_HALF_EVEN
+
+CENTS_PER_UNIT = 100
+
+
+def to_cents(amount) -> int:
+    """
+    Convert an amount in currency units to integer cents.
+
+    Floats are converted through their shortest decimal representation, so
+    19.99 becomes 1999 cents, not 1998.9999... rounded down.
+
+    Args:
+        amount (int, float or Decimal): The amount, e.g. 19.99.
+
+    Returns:
+        int: The amount in cents, rounded half to even.
+    """
+    if isinstance(amount, int):
+        return amount * CENTS_PER_UNIT
+    if isinstance(amount, float):
+        amount = Decimal(repr(amount))
+    return int((amount * CENTS_PER_UNIT).to_integral_value(ROUND_HALF_EVEN))
+
+
+def from_cents(cents: int) -> float:
+    """
+    Convert integer cents to currency units.
+
+    Args:
+        cents (int): The amount in cents.
+
+    Returns:
+        float: The nearest float to the amount in currency units.
+    """
+    return cents / CENTS_PER_UNIT
+
+
+def format_cents(cents: int) -> str:
+    """
+    Format integer cents as a decimal amount.
+
+    Args:
+        cents (int): The amount in cents.
+
+    Returns:
+        str: The amount with exactly two decimals, e.g. "-12.05".
+    """
+    sign = "-" if cents < 0 else ""
+    units, remainder = divmod(abs(cents), CENTS_PER_UNIT)
+    return f"{sign}{units}.{remainder:02d}"
+
+
+def divide(numerator, denominator):
+    """
+    Divide and round half to even, using only arithmetic operators.
+
+    Like the promotion formulas, it works elementwise on NumPy integer arrays
+    as well as on ints.
+
+    Args:
+        numerator (int or numpy.ndarray): The amount(s) to divide.
+        denominator (int): A positive divisor.
+
+    Returns:
+        int or numpy.ndarray: The rounded quotient(s).
+    """
+    quotient, remainder = divmod(numerator, denominator)
+    # Round up past the halfway point, and at it only when the quotient is odd.
+    return quotient + (2 * remainder + (quotient & 1) > denominator)
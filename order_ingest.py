@@ -0,0 +1,230 @@
+"""
+Stream orders from a JSONL file into a Store.
+
+Each non-empty line holds one order, either as a bare list of line items or as
+an object with an optional "order_id" and an "items" list. A line item is a
+[product, quantity] pair or a {"product": ..., "quantity": ...} object, where
+product is a product name or product id:
+
+    [["MacBook Air M2", 1], ["Google Pixel 7", 2]]
+    {"order_id": "A-17", "items": [{"product": "Google Pixel 7", "quantity": 3}]}
+
+Lines are read lazily in fixed-size chunks, so memory use does not depend on
+the size of the file.
+
+Usage:
+    python order_ingest.py ORDERS.jsonl [--chunk-size N] [--quiet] [--profile DIR]
+"""
+import argparse
+import json
+import sys
+import time
+from collections import namedtuple
+from itertools import islice
+
+from profiling import ProfileSession
+from store import Store
+
+
+class OrderResult(namedtuple("OrderResult", "line_number order_id total error")):
+    """
+    The outcome of one ingested order.
+
+    Attributes:
+        line_number (int): The 1-based line of the order in the input.
+        order_id: The order's "order_id", or None if it has none.
+        total (float or None): The order total, or None if the order failed.
+        error (str or None): Why the order failed, or None if it succeeded.
+    """
+    __slots__ = ()
+
+    @property
+    def ok(self) -> bool:
+        """bool: Whether the order was applied."""
+        return self.error is None
+
+
+class IngestStats:
+    """
+    Running counters for an ingestion, updated as results are produced.
+
+    Attributes:
+        orders (int): Orders read so far.
+        succeeded (int): Orders applied to the store.
+        failed (int): Orders rejected while parsing, validating or ordering.
+        revenue (float): The sum of the totals of the applied orders.
+    """
+    def __init__(self):
+        self.orders = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.revenue = 0.0
+        self._start = time.perf_counter()
+        self._end = None
+
+    @property
+    def elapsed(self) -> float:
+        """float: Seconds since ingestion started, or its duration once finished."""
+        end = self._end if self._end is not None else time.perf_counter()
+        return end - self._start
+
+    @property
+    def orders_per_second(self) -> float:
+        """float: The ingestion throughput."""
+        elapsed = self.elapsed
+        return self.orders / elapsed if elapsed > 0 else 0.0
+
+    def finish(self):
+        """Stop the clock, freezing elapsed and orders_per_second."""
+        self._end = time.perf_counter()
+
+    def summary(self) -> str:
+        """
+        Return a one-line report of the counters and throughput.
+
+        Returns:
+            str: The report.
+        """
+        return (f"{self.orders} orders ({self.succeeded} succeeded, {self.failed} failed), "
+                f"revenue {self.revenue}, {self.elapsed:.3f}s, "
+                f"{self.orders_per_second:,.0f} orders/sec")
+
+
+def read_chunks(lines, chunk_size: int = 1000):
+    """
+    Group an iterable of lines into numbered chunks, reading one chunk at a time.
+
+    Args:
+        lines (iterable): The input lines, e.g. an open file.
+        chunk_size (int): The number of lines per chunk.
+
+    Yields:
+        list: Up to chunk_size (line_number, line) pairs, skipping blank lines.
+
+    Raises:
+        ValueError: If chunk_size is not positive.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive.")
+    numbered = enumerate(lines, start=1)
+    while True:
+        chunk = [(number, line) for number, line in islice(numbered, chunk_size)]
+        if not chunk:
+            return
+        yield [(number, line) for number, line in chunk if line.strip()]
+
+
+def parse_order(line: str, store: Store):
+    """
+    Parse one JSONL order and resolve its products in a store.
+
+    Args:
+        line (str): The JSON text of the order.
+        store (Store): The store whose products the order refers to.
+
+    Returns:
+        tuple: The order id (or None) and the shopping list of (Product, quantity) tuples.
+
+    Raises:
+        ValueError: If the line is not valid JSON, is badly shaped, names an
+            unknown product or has a non-positive or non-integer quantity.
+    """
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as error:
+        raise ValueError(f"Invalid JSON: {error.msg}.") from None
+    order_id = None
+    if isinstance(record, dict):
+        order_id = record.get("order_id")
+        record = record.get("items")
+    if not isinstance(record, list) or not record:
+        raise ValueError("An order must be a non-empty list of items.")
+    shopping_list = []
+    for item in record:
+        if isinstance(item, dict):
+            key, quantity = item.get("product"), item.get("quantity")
+        elif isinstance(item, list) and len(item) == 2:
+            key, quantity = item
+        else:
+            raise ValueError(f"Invalid line item {item!r}.")
+        if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity <= 0:
+            raise ValueError(f"Quantity for {key} must be a positive integer.")
+        if isinstance(key, bool) or not isinstance(key, (str, int)):
+            raise ValueError(f"Invalid product reference {key!r}.")
+        shopping_list.append((store.get_product(key), quantity))
+    return order_id, shopping_list
+
+
+def ingest_orders(lines, store: Store, chunk_size: int = 1000, stats: IngestStats = None):
+    """
+    Parse, validate and apply a stream of JSONL orders, one result per order.
+
+    Orders are applied with Store.order in file order. A bad or rejected order
+    produces an error result and does not stop the stream.
+
+    Args:
+        lines (iterable): The JSONL lines, e.g. an open file.
+        store (Store): The store to apply the orders to.
+        chunk_size (int): The number of lines read at a time.
+        stats (IngestStats): Optional counters to update as results are produced.
+
+    Yields:
+        OrderResult: The outcome of each order.
+    """
+    if stats is None:
+        stats = IngestStats()
+    for chunk in read_chunks(lines, chunk_size):
+        for line_number, line in chunk:
+            stats.orders += 1
+            order_id = None
+            try:
+                order_id, shopping_list = parse_order(line, store)
+                total = store.order(shopping_list)
+            except ValueError as error:
+                stats.failed += 1
+                yield OrderResult(line_number, order_id, None, str(error))
+                continue
+            stats.succeeded += 1
+            stats.revenue += total
+            yield OrderResult(line_number, order_id, total, None)
+    stats.finish()
+
+
+def main(argv=None):
+    """
+    Replay a JSONL order file against the sample store and print the results.
+
+    Args:
+        argv (list): Command-line arguments; defaults to sys.argv[1:].
+    """
+    from main import build_sample_store
+
+    parser = argparse.ArgumentParser(description="Replay a JSONL order log into the sample store.")
+    parser.add_argument("path", help="JSONL file with one order per line, or - for stdin")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--quiet", action="store_true", help="only print failures and the summary")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="profile the replay and write the reports under DIR")
+    args = parser.parse_args(argv)
+
+    store = build_sample_store()
+    stats = IngestStats()
+    session = ProfileSession(args.profile) if args.profile is not None else None
+    source = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8")
+    with source:
+        if session is not None:
+            session.start()
+        try:
+            for result in ingest_orders(source, store, args.chunk_size, stats):
+                if not result.ok:
+                    print(f"line {result.line_number}: order failed: {result.error}")
+                elif not args.quiet:
+                    print(f"line {result.line_number}: order placed, total {result.total}")
+        finally:
+            if session is not None:
+                print(f"Profile written to {session.stop()}")
+    print(stats.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+Write-ahead journal of store changes, with crash recovery and compaction.
+
+Every successful Store.order, add_product, remove_product and restock of a
+store with an attached OrderJournal is appended to the journal as one JSON
+line, and so is every edit made through a product's setters (product.price =
+..., product.quantity = ...) while the product is in the store. Records are buffered and written with a single fsync per group (when
+group_size records are waiting, or after group_interval seconds), so the journal keeps up
+with high order rates; at most one group is lost if the process dies.
+
+recover() rebuilds a store from the last catalog snapshot plus a replay of the
+journal, and compact() folds the journal into a fresh snapshot so that replay
+time stays bounded.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from catalog_snapshot import (KIND_LIMITED, build_product, decode_promotion, encode_promotion,
+                              open_snapshot, product_kind, write_snapshot)
+from products import reserve_product_ids
+from store import Store
+
+
+def encode_product(product) -> dict:
+    """
+    Describe a product, including its id and promotion, as JSON-compatible data.
+
+    Args:
+        product (Product): The product to describe.
+
+    Returns:
+        dict: The product's fields.
+    """
+    kind = product_kind(product)
+    promotion = product.promotion
+    return {
+        "product_id": product.product_id,
+        "kind": kind,
+        "name": product.name,
+        "price": product.price,
+        "quantity": product.quantity,
+        "maximum": product.maximum if kind == KIND_LIMITED else 0,
+        "active": product.active,
+        "promotion": None if promotion is None else encode_promotion(promotion),
+    }
+
+
+def decode_product(data: dict):
+    """
+    Rebuild a product described by encode_product(), keeping its id.
+
+    Args:
+        data (dict): The product description.
+
+    Returns:
+        Product: The product.
+    """
+    promotion = None if data["promotion"] is None else decode_promotion(data["promotion"])
+    reserve_product_ids(data["product_id"])
+    return build_product(data["kind"], data["name"], data["price"], data["quantity"],
+                         data["maximum"], data["active"], promotion, data["product_id"])
+
+
+class OrderJournal:
+    """
+    An append-only, group-committed log of store changes.
+
+    Attach it with Store.attach_journal(). The store calls record_order,
+    record_add and record_remove inside transaction(), and compact() pauses new
+    transactions while it takes a snapshot, so every change is either in the
+    snapshot or in the journal that follows it, never in both.
+    """
+    def __init__(self, path: str, group_size: int = 256, group_interval: float = 0.005,
+                 snapshot_path: str = None, compact_every: int = None):
+        """
+        Open (or create) a journal file for appending.
+
+        Args:
+            path (str): The journal file.
+            group_size (int): The number of buffered records that triggers a write.
+            group_interval (float): The most seconds a record waits before being
+                written; a background thread flushes partial groups.
+            snapshot_path (str): The snapshot that compaction writes, if any.
+            compact_every (int): Compact after this many records, if given
+                (requires snapshot_path).
+
+        Raises:
+            ValueError: If group_size is not positive or compact_every is given
+                without snapshot_path.
+        """
+        if group_size <= 0:
+            raise ValueError("group_size must be positive.")
+        if compact_every is not None and snapshot_path is None:
+            raise ValueError("compact_every requires a snapshot_path.")
+        self.path = path
+        self.group_size = group_size
+        self.group_interval = group_interval
+        self.snapshot_path = snapshot_path
+        self.compact_every = compact_every
+        self._file = open(path, "ab")
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        # Records in the journal file or buffer, i.e. what a recovery would replay.
+        self.records = sum(1 for _ in read_journal(path))
+        self._gate = threading.Condition()
+        self._transactions = 0
+        self._paused = False
+        self._compacting = False
+        self._closed = threading.Event()
+        self._flusher = None
+        if group_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+            self._flusher.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _flush_periodically(self):
+        """Background loop writing partial groups every group_interval seconds."""
+        while not self._closed.wait(self.group_interval):
+            self.flush()
+
+    def _append(self, record: dict):
+        """Buffer one record, writing the group out once it is full."""
+        line = json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+        with self._buffer_lock:
+            self._buffer.append(line)
+            self.records += 1
+            if len(self._buffer) >= self.group_size:
+                self._write_buffer()
+
+    def _write_buffer(self):
+        """Write and fsync the buffered records. The caller holds _buffer_lock."""
+        if not self._buffer:
+            return
+        self._file.write(b"".join(self._buffer))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._buffer.clear()
+
+    def flush(self):
+        """Write and fsync every buffered record."""
+        with self._buffer_lock:
+            if not self._file.closed:
+                self._write_buffer()
+
+    def close(self):
+        """Flush the remaining records and close the file."""
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._buffer_lock:
+            if not self._file.closed:
+                self._write_buffer()
+                self._file.close()
+
+    def record_order(self, shopping_list: list):
+        """
+        Log a successful order.
+
+        Args:
+            shopping_list (list): The (Product, quantity) tuples that were bought.
+        """
+        self._append({"op": "order",
+                      "items": [[product.product_id, quantity] for product, quantity in shopping_list]})
+
+    def record_add(self, product):
+        """
+        Log a product added to the store.
+
+        Args:
+            product (Product): The added product, in its state when it was added.
+        """
+        self._append({"op": "add", "product": encode_product(product)})
+
+    def record_remove(self, product):
+        """
+        Log a product removed from the store.
+
+        Args:
+            product (Product): The removed product.
+        """
+        self._append({"op": "remove", "product_id": product.product_id})
+
+    def record_update(self, product, attribute: str, value):
+        """
+        Log a product attribute set outside the store's own operations.
+
+        Args:
+            product (Product): The edited product.
+            attribute (str): The attribute that was set, e.g. "price".
+            value: The new value.
+        """
+        if attribute == "promotion" and value is not None:
+            value = encode_promotion(value)
+        self._append({"op": "update", "product_id": product.product_id,
+                      "attribute": attribute, "value": value})
+
+    def record_restock(self, items: list, activate: bool):
+        """
+        Log stock added to products.
+
+        Args:
+            items (list): The (Product, quantity added) tuples.
+            activate (bool): Whether the products were reactivated.
+        """
+        self._append({"op": "restock", "activate": activate,
+                      "items": [[product.product_id, quantity] for product, quantity in items]})
+
+    @contextmanager
+    def transaction(self):
+        """Context manager held by the store while it applies and logs one change."""
+        with self._gate:
+            while self._paused:
+                self._gate.wait()
+            self._transactions += 1
+        try:
+            yield
+        finally:
+            with self._gate:
+                self._transactions -= 1
+                if not self._transactions:
+                    self._gate.notify_all()
+
+    @contextmanager
+    def paused(self):
+        """Context manager that waits for running transactions and blocks new ones."""
+        with self._gate:
+            while self._paused:
+                self._gate.wait()
+            self._paused = True
+            while self._transactions:
+                self._gate.wait()
+        try:
+            yield
+        finally:
+            with self._gate:
+                self._paused = False
+                self._gate.notify_all()
+
+    def truncate(self):
+        """Drop every record, e.g. once they are all contained in a snapshot."""
+        with self._buffer_lock:
+            self._buffer.clear()
+            self._file.truncate(0)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.records = 0
+
+    def maybe_compact(self, store: Store):
+        """
+        Start a background compaction if compact_every records have accumulated.
+
+        Args:
+            store (Store): The store the journal belongs to.
+        """
+        if self.compact_every is None or self.records < self.compact_every:
+            return
+        with self._gate:
+            if self._compacting:
+                return
+            self._compacting = True
+
+        def run():
+            try:
+                compact(store, self.snapshot_path, self)
+            finally:
+                self._compacting = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+def read_journal(path: str):
+    """
+    Read the records of a journal file.
+
+    A final line cut short by a crash is ignored; any other unreadable line is
+    an error.
+
+    Args:
+        path (str): The journal file.
+
+    Yields:
+        dict: Each record, oldest first.
+
+    Raises:
+        ValueError: If a record other than the last one is corrupt.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as file:
+        pending_error = None
+        for line_number, line in enumerate(file, start=1):
+            if pending_error is not None:
+                raise pending_error
+            try:
+                record = json.loads(line)
+            except ValueError:
+                pending_error = ValueError(f"Corrupt journal record on line {line_number}.")
+                continue
+            if not line.endswith(b"\n"):
+                return  # A torn write that happens to parse; it was never acknowledged.
+            yield record
+
+
+def replay(store: Store, path: str) -> int:
+    """
+    Apply the records of a journal to a store.
+
+    Args:
+        store (Store): The store to update; it must not have a journal attached.
+        path (str): The journal file.
+
+    Returns:
+        int: The number of records applied.
+
+    Raises:
+        ValueError: If a record cannot be applied, which means the journal does
+            not belong to the snapshot the store was opened from.
+    """
+    applied = 0
+    for record in read_journal(path):
+        op = record["op"]
+        if op == "order":
+            store.order([(store.get_product(product_id), quantity)
+                         for product_id, quantity in record["items"]])
+        elif op == "add":
+            store._index_product(decode_product(record["product"]))
+        elif op == "remove":
+            store.remove_by_key(record["product_id"])
+        elif op == "restock":
+            store.restock([(store.get_product(product_id), quantity)
+                           for product_id, quantity in record["items"]], record["activate"])
+        elif op == "update":
+            value = record["value"]
+            if record["attribute"] == "promotion" and value is not None:
+                value = decode_promotion(value)
+            setattr(store.get_product(record["product_id"]), record["attribute"], value)
+        else:
+            raise ValueError(f"Unknown journal operation {op}.")
+        applied += 1
+    return applied
+
+
+def recover(snapshot_path: str, journal_path: str) -> Store:
+    """
+    Rebuild a store from its last snapshot and its journal.
+
+    Args:
+        snapshot_path (str): The snapshot file; an empty store is used if it does not exist.
+        journal_path (str): The journal file; nothing is replayed if it does not exist.
+
+    Returns:
+        Store: The recovered store, without a journal attached.
+    """
+    store = open_snapshot(snapshot_path) if os.path.exists(snapshot_path) else Store([])
+    replay(store, journal_path)
+    return store
+
+
+def compact(store: Store, snapshot_path: str, journal: OrderJournal) -> float:
+    """
+    Write the store to a new snapshot and empty the journal.
+
+    New changes wait while the snapshot is written, so none is lost or replayed twice.
+
+    Args:
+        store (Store): The store the journal belongs to.
+        snapshot_path (str): The snapshot file to replace.
+        journal (OrderJournal): The store's journal.
+
+    Returns:
+        float: The seconds the store was paused.
+    """
+    with journal.paused():
+        start = time.perf_counter()
+        write_snapshot(store, snapshot_path)
+        journal.truncate()
+        return time.perf_counter() - start
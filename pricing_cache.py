@@ -0,0 +1,150 @@
+import threading
+from collections import OrderedDict
+
+
+class PricingCache:
+    """
+    A bounded LRU cache of promotional line prices.
+
+    Results are keyed on the promotion instance and the version of its
+    parameters, the unit price and the quantity, which is everything a
+    promotion's result depends on, so products sharing a promotion and price
+    share entries. Changing a promotion's parameters (discount.percent = 50)
+    bumps its version, so later lookups miss and the old entries age out. When
+    a product's price or promotion is reassigned, the entries for its previous
+    (promotion, price) pair are dropped through on_product_change().
+
+    Hashing the key costs about as much as the built-in promotions' arithmetic,
+    so the cache pays off for costlier pricing rules; Store.preview_order only
+    uses it when asked to.
+    """
+    def __init__(self, maxsize: int = 65_536):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize (int): The most entries kept before the least recently used is evicted.
+
+        Raises:
+            ValueError: If maxsize is not positive.
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive.")
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        # (promotion key, price) -> keys of the entries for that pair, for invalidation.
+        self._groups = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def price(self, product, quantity: int) -> float:
+        """
+        Price a line, using a cached result when there is one.
+
+        Lines without a promotion are cheap to price and are not cached.
+
+        Args:
+            product (Product): The product to price.
+            quantity (int): The quantity to price.
+
+        Returns:
+            float: The total price, including any promotion.
+        """
+        promotion = product.promotion
+        if promotion is None:
+            return product.price * quantity
+        group = (promotion, product.price)
+        key = (group, quantity, promotion._version)
+        # Hits skip the lock: dict lookups are atomic, and an entry evicted in
+        # between only costs its recency update. Hit counts may undercount
+        # slightly under heavy concurrency.
+        entries = self._entries
+        total_price = entries.get(key)
+        if total_price is not None:
+            try:
+                entries.move_to_end(key)
+            except KeyError:
+                pass
+            self.hits += 1
+            return total_price
+        total_price = promotion.apply_promotion(product, quantity)
+        with self._lock:
+            self.misses += 1
+            if key not in entries:
+                entries[key] = total_price
+                self._groups.setdefault(group, set()).add(key)
+                if len(self._entries) > self.maxsize:
+                    self._evict()
+        return total_price
+
+    def _evict(self):
+        """Drop the least recently used entry. The caller holds the lock."""
+        key, _ = self._entries.popitem(last=False)
+        group = key[0]
+        keys = self._groups[group]
+        keys.discard(key)
+        if not keys:
+            del self._groups[group]
+        self.evictions += 1
+
+    def invalidate(self, promotion, price):
+        """
+        Drop every entry for a promotion and unit price.
+
+        Args:
+            promotion (Promotion or None): The promotion whose entries to drop.
+            price (float): The unit price whose entries to drop.
+        """
+        if promotion is None:
+            return
+        with self._lock:
+            keys = self._groups.pop((promotion, price), ())
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+
+    def clear(self):
+        """Drop every entry. The statistics are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+
+    def on_product_change(self, product, attribute, old_value, new_value):
+        """
+        Product listener dropping entries made stale by a price or promotion change.
+
+        Args:
+            product (Product): The product that changed.
+            attribute (str): The name of the changed attribute.
+            old_value: The attribute's previous value.
+            new_value: The attribute's new value.
+        """
+        if attribute == "price":
+            self.invalidate(product.promotion, old_value)
+        elif attribute == "promotion":
+            self.invalidate(old_value, product.price)
+
+    def stats(self) -> dict:
+        """
+        Return the cache's size and effectiveness.
+
+        Returns:
+            dict: size, maxsize, hits, misses, hit_rate, evictions and invalidations.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -1,17 +1,69 @@
+import itertools
+import threading
+from functools import partial
+
+from money import to_cents
 from promotions import Promotion
 
+# Source of stable, process-unique product ids used as store index keys.
+_product_ids = itertools.count(1)
+
+
+def next_product_id() -> int:
+    """
+    Allocate a new product id.
+
+    Returns:
+        int: An id that no other product in this process has been given.
+    """
+    return next(_product_ids)
+
+
+def reserve_product_ids(last_used: int):
+    """
+    Make sure ids allocated from now on are greater than an id already in use.
+
+    Used when products are restored with the ids they were saved with.
+
+    Args:
+        last_used (int): The highest product id known to be taken.
+    """
+    global _product_ids
+    following = next(_product_ids)
+    _product_ids = itertools.count(max(following, last_used + 1))
+
+
+class InsufficientStockError(ValueError):
+    """Raised when a purchase asks for more units than are in stock."""
+
+
+class PurchaseLimitError(ValueError):
+    """Raised when a purchase exceeds a LimitedProduct's per-order maximum."""
+
 
 class Product:
     """
     Represents a product in the store.
 
+    Products use __slots__ rather than a per-instance __dict__ to keep large
+    catalogs compact. The public setters validate every assignment; the
+    from_trusted() constructor and update_trusted() skip that validation for
+    data that is already known to be valid, such as bulk loads and the stock
+    decrement inside buy().
+
     Attributes:
         name (str): The product's name.
         price (float): The product's price.
+        price_cents (int): The price in integer cents, for exact totals.
         quantity (int): The available quantity.
         active (bool): Indicates if the product is available for purchase.
         promotion (Promotion or None): An optional promotion applied to the product.
+        product_id (int): A stable identifier assigned when the product is created.
+        lock (threading.RLock): Serializes stock changes; held by buy() and by
+            Store.order while it validates and applies a multi-product order.
     """
+    __slots__ = ("product_id", "lock", "_listeners", "_guards", "_name", "_price",
+                 "_price_cents", "_quantity", "_active", "_promotion", "__weakref__")
 
     def __init__(self, name: str, price: float, quantity: int):
         """
@@ -22,12 +74,67 @@ class Product:
             price (float): The price of the product.
             quantity (int): The available quantity.
         """
+        self.product_id = next_product_id()
+        self.lock = threading.RLock()
+        self._listeners = ()
+        self._guards = ()
         self.name = name  # Uses setter for validation
         self.price = price  # Uses setter for validation
         self.quantity = quantity  # Uses setter for validation
         self.active = True
         self.promotion = None
 
+    @classmethod
+    def from_trusted(cls, name: str, price: float, quantity: int, active: bool = True,
+                     promotion=None):
+        """
+        Create a product from values that have already been validated.
+
+        No type or range checks are made, so this is only for callers such as
+        bulk loaders that validate their input up front.
+
+        Args:
+            name (str): The name of the product.
+            price (float): The price of the product.
+            quantity (int): The available quantity.
+            active (bool): Whether the product is available for purchase.
+            promotion (Promotion or None): The promotion to apply.
+
+        Returns:
+            Product: The new product.
+        """
+        product = cls.__new__(cls)
+        product.product_id = next_product_id()
+        product.lock = threading.RLock()
+        product._listeners = ()
+        product._guards = ()
+        product._name = name
+        product._price = price
+        product._price_cents = None
+        product._quantity = quantity
+        product._active = active
+        product._promotion = promotion
+        return product
+
+    def update_trusted(self, price=None, quantity=None, active=None):
+        """
+        Assign already-validated values without checking them.
+
+        Listeners are still notified, and a quantity of zero still deactivates
+        the product unless active is given explicitly.
+
+        Args:
+            price (float or None): The new price, or None to keep it.
+            quantity (int or None): The new quantity, or None to keep it.
+            active (bool or None): The new active status, or None to keep it.
+        """
+        if price is not None:
+            self._assign_price(price)
+        if quantity is not None:
+            self._assign_quantity(quantity)
+        if active is not None:
+            self._assign_active(active)
+
     @property
     def name(self):
         """str: Get or set the product's name."""
@@ -39,7 +146,14 @@ class Product:
             raise TypeError("Name must be a string.")
         if not value:
             raise ValueError("Name should not be empty.")
+        self._set("name", value, self._assign_name)
+
+    def _assign_name(self, value):
+        """Store a name without validating it and notify listeners."""
+        old_value = self._name if self._listeners else None
         self._name = value
+        if self._listeners:
+            self._notify("name", old_value, value)
 
     @property
     def price(self):
@@ -52,7 +166,23 @@ class Product:
             raise TypeError("Price must be a number.")
         if value < 0:
             raise ValueError("Price should not be negative.")
+        self._set("price", value, self._assign_price)
+
+    def _assign_price(self, value):
+        """Store a price without validating it and notify listeners."""
+        old_value = self._price if self._listeners else None
         self._price = value
+        self._price_cents = None
+        if self._listeners:
+            self._notify("price", old_value, value)
+
+    @property
+    def price_cents(self):
+        """int: The price in integer cents, converted on first use after each price change."""
+        price_cents = self._price_cents
+        if price_cents is None:
+            price_cents = self._price_cents = to_cents(self._price)
+        return price_cents
 
     @property
     def quantity(self):
@@ -65,9 +195,16 @@ class Product:
             raise TypeError("Quantity must be an integer.")
         if value < 0:
             raise ValueError("Quantity should not be negative.")
+        self._set("quantity", value, self._assign_quantity)
+
+    def _assign_quantity(self, value):
+        """Store a quantity without validating it, deactivating the product at zero."""
+        old_value = self._quantity if self._listeners else None
         self._quantity = value
-        if self._quantity == 0:
-            self.active = False
+        if self._listeners:
+            self._notify("quantity", old_value, value)
+        if value == 0:
+            self._assign_active(False)
 
     @property
     def active(self):
@@ -78,7 +215,14 @@ class Product:
     def active(self, value):
         if not isinstance(value, bool):
             raise TypeError("Active must be a boolean.")
+        self._set("active", value, self._assign_active)
+
+    def _assign_active(self, value):
+        """Store an active status without validating it and notify listeners."""
+        old_value = self._active if self._listeners else None
         self._active = value
+        if self._listeners and old_value != value:
+            self._notify("active", old_value, value)
 
     @property
     def promotion(self):
@@ -89,7 +233,84 @@ class Product:
     def promotion(self, value):
         if value is not None and not isinstance(value, Promotion):
             raise TypeError("Promotion must be a Promotion instance or None.")
+        self._set("promotion", value, self._assign_promotion)
+
+    def _assign_promotion(self, value):
+        """Store a promotion without validating it and notify listeners."""
+        old_value = self._promotion if self._listeners else None
         self._promotion = value
+        if self._listeners:
+            self._notify("promotion", old_value, value)
+
+    def _set(self, attribute, value, assign):
+        """Assign a validated value from a setter, through any registered guards."""
+        if not self._guards:
+            assign(value)
+            return
+        for guard in reversed(self._guards):
+            assign = partial(guard, self, attribute, assign=assign)
+        assign(value)
+
+    def add_listener(self, callback):
+        """
+        Register a callback that is notified whenever an attribute changes.
+
+        The callback is called as ``callback(product, attribute, old_value, new_value)``
+        after the new value has been stored. Stores use this to keep their indexes
+        and counters in sync without rescanning their products.
+
+        Args:
+            callback (callable): The function to notify.
+        """
+        # Listeners are an immutable tuple, shared empty by default and replaced on change.
+        self._listeners = self._listeners + (callback,)
+
+    def add_guard(self, callback):
+        """
+        Register a callback that wraps every assignment made through a setter.
+
+        The callback is called as ``callback(product, attribute, value, assign=assign)``
+        once the value has been validated, and must call ``assign(value)`` to store
+        it. Stores use this to take locks and log the edit before anything changes.
+        Assignments made by buy() and update_trusted() are not guarded.
+
+        Args:
+            callback (callable): The function to call.
+        """
+        self._guards = self._guards + (callback,)
+
+    def remove_guard(self, callback):
+        """
+        Unregister a callback previously passed to add_guard.
+
+        Args:
+            callback (callable): The function to stop calling.
+
+        Raises:
+            ValueError: If the callback is not registered.
+        """
+        guards = list(self._guards)
+        guards.remove(callback)
+        self._guards = tuple(guards)
+
+    def remove_listener(self, callback):
+        """
+        Unregister a callback previously passed to add_listener.
+
+        Args:
+            callback (callable): The function to stop notifying.
+
+        Raises:
+            ValueError: If the callback is not registered.
+        """
+        listeners = list(self._listeners)
+        listeners.remove(callback)
+        self._listeners = tuple(listeners)
+
+    def _notify(self, attribute, old_value, new_value):
+        """Call every registered listener with a change to one attribute."""
+        for listener in self._listeners:
+            listener(self, attribute, old_value, new_value)
 
     def show(self) -> str:
         """
@@ -103,28 +324,53 @@ class Product:
             base_info += f", Promotion: {self.promotion.name}"
         return base_info
 
-    def buy(self, quantity: int) -> float:
+    def line_price(self, quantity: int, cents: bool = False):
+        """
+        Calculate what a purchase would cost, without making it.
+
+        Args:
+            quantity (int): The quantity to price.
+            cents (bool): Return exact integer cents instead of a float.
+
+        Returns:
+            float or int: The total price, including any promotion.
+        """
+        if cents:
+            if self._promotion:
+                return self._promotion.apply_promotion_cents(self, quantity)
+            return self.price_cents * quantity
+        if self._promotion:
+            return self._promotion.apply_promotion(self, quantity)
+        return self._price * quantity
+
+    def buy(self, quantity: int, cents: bool = False):
         """
         Process a purchase for the product.
 
         Args:
             quantity (int): The quantity to purchase.
+            cents (bool): Return the total in exact integer cents instead of a float.
 
         Returns:
-            float: The total price for the purchase.
+            float or int: The total price for the purchase.
 
         Raises:
-            ValueError: If the quantity is not positive or exceeds available stock.
+            ValueError: If the quantity is not positive.
+            InsufficientStockError: If the quantity exceeds available stock.
         """
         if quantity <= 0:
             raise ValueError("The quantity has to be positive.")
-        if quantity > self.quantity:
-            raise ValueError("Not enough quantity in storage.")
-        if self.promotion:
-            total_price = self.promotion.apply_promotion(self, quantity)
-        else:
-            total_price = self.price * quantity
-        self.quantity -= quantity  # Uses setter, which may deactivate the product
+        with self.lock:
+            if quantity > self._quantity:
+                raise InsufficientStockError("Not enough quantity in storage.")
+            if cents:
+                total_price = self.line_price(quantity, True)
+            elif self._promotion:
+                total_price = self._promotion.apply_promotion(self, quantity)
+            else:
+                total_price = self._price * quantity
+            # Already validated above, so skip the setter; this may deactivate the product.
+            self._assign_quantity(self._quantity - quantity)
         return total_price
 
 
@@ -132,6 +378,7 @@ class NonStockedProduct(Product):
     """
     A product that is non-stocked, meaning it is available with infinite supply.
     """
+    __slots__ = ()
 
     def __init__(self, name: str, price: float):
         """
@@ -143,21 +390,40 @@ class NonStockedProduct(Product):
         """
         super().__init__(name, price, 0)
 
-    def buy(self, quantity: int) -> float:
+    @classmethod
+    def from_trusted(cls, name: str, price: float, active: bool = True, promotion=None):
+        """
+        Create a non-stocked product from values that have already been validated.
+
+        Args:
+            name (str): The product's name.
+            price (float): The product's price.
+            active (bool): Whether the product is available for purchase.
+            promotion (Promotion or None): The promotion to apply.
+
+        Returns:
+            NonStockedProduct: The new product.
+        """
+        return super().from_trusted(name, price, 0, active, promotion)
+
+    def buy(self, quantity: int, cents: bool = False):
         """
         Process a purchase for the non-stocked product.
 
         Args:
             quantity (int): The quantity to purchase.
+            cents (bool): Return the total in exact integer cents instead of a float.
 
         Returns:
-            float: The total price for the purchase.
+            float or int: The total price for the purchase.
 
         Raises:
             ValueError: If the quantity is not positive.
         """
         if quantity <= 0:
             raise ValueError("The quantity has to be positive.")
+        if cents:
+            return self.line_price(quantity, True)
         if self.promotion:
             return self.promotion.apply_promotion(self, quantity)
         return self.price * quantity
@@ -176,6 +442,7 @@ class LimitedProduct(Product):
     """
     A product with a purchase limit per order.
     """
+    __slots__ = ("_maximum",)
 
     def __init__(self, name: str, price: float, quantity: int, maximum: int):
         """
@@ -190,6 +457,27 @@ class LimitedProduct(Product):
         super().__init__(name, price, quantity)
         self.maximum = maximum
 
+    @classmethod
+    def from_trusted(cls, name: str, price: float, quantity: int, maximum: int,
+                     active: bool = True, promotion=None):
+        """
+        Create a limited product from values that have already been validated.
+
+        Args:
+            name (str): The product's name.
+            price (float): The product's price.
+            quantity (int): The available quantity.
+            maximum (int): The maximum quantity allowed per order.
+            active (bool): Whether the product is available for purchase.
+            promotion (Promotion or None): The promotion to apply.
+
+        Returns:
+            LimitedProduct: The new product.
+        """
+        product = super().from_trusted(name, price, quantity, active, promotion)
+        product._maximum = maximum
+        return product
+
     @property
     def maximum(self):
         """int: Get or set the maximum quantity allowed per order."""
@@ -203,22 +491,23 @@ class LimitedProduct(Product):
             raise ValueError("Maximum must be positive.")
         self._maximum = value
 
-    def buy(self, quantity: int) -> float:
+    def buy(self, quantity: int, cents: bool = False):
         """
         Process a purchase for a limited product, enforcing the purchase limit.
 
         Args:
             quantity (int): The quantity to purchase.
+            cents (bool): Return the total in exact integer cents instead of a float.
 
         Returns:
-            float: The total price for the purchase.
+            float or int: The total price for the purchase.
 
         Raises:
-            ValueError: If the quantity exceeds the per-order maximum.
+            PurchaseLimitError: If the quantity exceeds the per-order maximum.
         """
         if quantity > self.maximum:
-            raise ValueError(f"Quantity {quantity} exceeds the limit of {self.maximum}.")
-        return super().buy(quantity)
+            raise PurchaseLimitError(f"Quantity {quantity} exceeds the limit of {self.maximum}.")
+        return super().buy(quantity, cents)
 
     def show(self) -> str:
         """
@@ -0,0 +1,272 @@
+"""
+Profiling sessions for the store's order pipeline.
+
+A ProfileSession wraps Store.order, Store.order_many, the buy() method of every
+product class and promotion evaluation (Promotion.apply_promotion and
+apply_promotion_cents). Time spent inside those calls is recorded three ways,
+so an interactive session is not swamped by time spent waiting for input:
+
+    cProfile     deterministic call counts and times, while a wrapped call runs
+    sampler      the stack below the outermost wrapped call, sampled every
+                 `interval` seconds of CPU time
+    tracemalloc  allocations made during the session, compared with its start
+
+When the session ends it writes these files to a new directory of its own:
+
+    profile.pstats     the raw cProfile data, for pstats, snakeviz and the like
+    profile.txt        the top functions by cumulative time
+    stacks.collapsed   sampled stacks in the collapsed format read by
+                       flamegraph.pl, speedscope and inferno
+    allocations.txt    peak traced memory and the top allocation sites
+
+Usage:
+    python main.py --profile DIR
+    python order_ingest.py ORDERS.jsonl --profile DIR
+"""
+import cProfile
+import io
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from functools import wraps
+
+from products import Product, NonStockedProduct, LimitedProduct
+from promotions import Promotion
+from store import Store
+
+# The methods a session wraps.
+TARGETS = ((Store, "order"), (Store, "order_many"), (Product, "buy"),
+           (NonStockedProduct, "buy"), (LimitedProduct, "buy"),
+           (Promotion, "apply_promotion"), (Promotion, "apply_promotion_cents"))
+
+
+def frame_label(frame) -> str:
+    """Return the name a sampled frame gets in a collapsed stack: file:qualified name."""
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_qualname}"
+
+
+class ProfileSession:
+    """
+    Profiles the order pipeline between start() and stop(), or within a with block.
+
+    Stacks are sampled by a SIGPROF interval timer when the platform has one and
+    the session is started on the main thread; the timer only runs while the
+    process uses CPU, and its handler runs in the main thread between bytecodes,
+    so samples are not skewed toward the points where that thread releases the
+    GIL. Elsewhere a background thread samples every thread instead. Only one
+    session may run at a time.
+    """
+    def __init__(self, directory: str, interval: float = 0.001, top: int = 25,
+                 memory: bool = True):
+        """
+        Prepare a session.
+
+        Args:
+            directory (str): Where to create the session's report directory.
+            interval (float): Seconds between stack samples.
+            top (int): How many functions and allocation sites the reports list.
+            memory (bool): Trace allocations with tracemalloc, which slows
+                every allocation down while the session runs.
+
+        Raises:
+            ValueError: If interval or top is not positive.
+        """
+        if interval <= 0 or top <= 0:
+            raise ValueError("interval and top must be positive.")
+        self.directory = directory
+        self.interval = interval
+        self.top = top
+        self.memory = memory
+        self.path = None
+        self.samples = 0
+        self.stacks = Counter()
+        self._profiler = cProfile.Profile()
+        self._profiled_thread = None
+        # Thread id -> the wrapper frame of the outermost wrapped call it is in;
+        # sampled stacks start just below it.
+        self._active = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._originals = []
+        self._stopping = threading.Event()
+        self._sampler = None
+        self._previous_handler = None
+        self._wrapper_code = None
+        self._start_snapshot = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _wrap(self, original):
+        """Wrap a method so its outermost calls are profiled and sampled."""
+        session = self
+        local = self._local
+
+        @wraps(original)
+        def wrapper(*args, **kwargs):
+            if getattr(local, "depth", 0):
+                return original(*args, **kwargs)
+            local.depth = 1
+            thread_id = threading.get_ident()
+            with session._lock:
+                profile = session._profiled_thread is None
+                if profile:
+                    session._profiled_thread = thread_id
+                session._active[thread_id] = sys._getframe()
+            if profile:
+                session._profiler.enable()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                if profile:
+                    session._profiler.disable()
+                with session._lock:
+                    del session._active[thread_id]
+                    if profile:
+                        session._profiled_thread = None
+                local.depth = 0
+        self._wrapper_code = wrapper.__code__
+        return wrapper
+
+    def _record(self, frame, outermost):
+        """Count the stack from frame down to, but not including, an outermost wrapper frame."""
+        skipped = self._wrapper_code  # Nested wrapped calls leave their wrappers out.
+        labels = []
+        while frame is not None and frame is not outermost:
+            if frame.f_code is not skipped:
+                labels.append(frame_label(frame))
+            frame = frame.f_back
+        if frame is None or not labels:
+            return  # The call returned, or had not started, when the frames were read.
+        self.stacks[";".join(reversed(labels))] += 1
+        self.samples += 1
+
+    def _on_signal(self, signum, frame):
+        """SIGPROF handler: sample the main thread if it is inside a wrapped call."""
+        # No lock here: the handler interrupts the main thread, which may hold it.
+        outermost = self._active.get(threading.main_thread().ident)
+        if outermost is not None:
+            self._record(frame, outermost)
+
+    def _sample(self):
+        """Sampler thread main loop: record the stacks of threads inside wrapped calls."""
+        while not self._stopping.wait(self.interval):
+            with self._lock:
+                active = dict(self._active)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, outermost in active.items():
+                self._record(frames.get(thread_id), outermost)
+
+    def start(self):
+        """
+        Install the wrappers and start profiling.
+
+        Raises:
+            RuntimeError: If the session was already started.
+        """
+        if self._originals:
+            raise RuntimeError("The session is already running.")
+        for owner, name in TARGETS:
+            original = owner.__dict__[name]
+            self._originals.append((owner, name, original))
+            setattr(owner, name, self._wrap(original))
+        if self.memory:
+            tracemalloc.start()
+            self._start_snapshot = tracemalloc.take_snapshot()
+        if hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread():
+            self._previous_handler = signal.signal(signal.SIGPROF, self._on_signal)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self._stopping.clear()
+            self._sampler = threading.Thread(target=self._sample, name="profile-sampler",
+                                             daemon=True)
+            self._sampler.start()
+
+    def stop(self) -> str:
+        """
+        Restore the original methods, stop profiling and write the reports.
+
+        Returns:
+            str: The directory the reports were written to.
+        """
+        while self._originals:
+            owner, name, original = self._originals.pop()
+            setattr(owner, name, original)
+        if self._sampler is None:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, self._previous_handler)
+        else:
+            self._stopping.set()
+            self._sampler.join()
+            self._sampler = None
+        end_snapshot = peak = None
+        if self.memory:
+            end_snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        base = os.path.join(self.directory,
+                            time.strftime("session-%Y%m%d-%H%M%S") + f"-{os.getpid()}")
+        self.path, number = base, 1
+        while os.path.exists(self.path):  # Another session ended in the same second.
+            number += 1
+            self.path = f"{base}-{number}"
+        os.makedirs(self.path)
+        self._profiler.dump_stats(os.path.join(self.path, "profile.pstats"))
+        with open(os.path.join(self.path, "profile.txt"), "w", encoding="utf-8") as file:
+            file.write(self.profile_report())
+        with open(os.path.join(self.path, "stacks.collapsed"), "w", encoding="utf-8") as file:
+            for stack, count in sorted(self.stacks.items()):
+                file.write(f"{stack} {count}\n")
+        if self.memory:
+            with open(os.path.join(self.path, "allocations.txt"), "w", encoding="utf-8") as file:
+                file.write(self.allocation_report(end_snapshot, peak))
+        return self.path
+
+    def profile_report(self) -> str:
+        """
+        Return the cProfile results as text.
+
+        Returns:
+            str: The top functions by cumulative time.
+        """
+        output = io.StringIO()
+        try:
+            stats = pstats.Stats(self._profiler, stream=output)
+        except TypeError:  # Nothing was profiled.
+            return "No wrapped calls were made.\n"
+        stats.sort_stats("cumulative").print_stats(self.top)
+        return output.getvalue()
+
+    def allocation_report(self, snapshot, peak: int) -> str:
+        """
+        Return the allocation sites that grew most during the session.
+
+        Args:
+            snapshot (tracemalloc.Snapshot): The snapshot taken at the end of the session.
+            peak (int): The peak traced memory, in bytes.
+
+        Returns:
+            str: The report.
+        """
+        ignored = (tracemalloc.Filter(False, tracemalloc.__file__),
+                   tracemalloc.Filter(False, __file__))
+        differences = snapshot.filter_traces(ignored).compare_to(
+            self._start_snapshot.filter_traces(ignored), "lineno")
+        lines = [f"Peak traced memory: {peak / 1024:.1f} KiB",
+                 f"Top {self.top} allocation sites by growth during the session:"]
+        for difference in differences[:self.top]:
+            lines.append(str(difference))
+        return "\n".join(lines) + "\n"
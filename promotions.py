@@ -1,9 +1,46 @@
 from abc import ABC, abstractmethod
+from array import array
+from collections import namedtuple
+from fractions import Fraction
+
+from money import divide, from_cents, to_cents
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional; batches then fall back to the array module.
+    numpy = None
 
 class Promotion(ABC):
     """
     Abstract base class representing a promotion.
+
+    Subclasses implement calculate_price using only arithmetic operators, so the
+    same formula prices a single line or, elementwise, whole NumPy arrays. They
+    may also override calculate_cents to price exactly in integer cents with
+    their own rounding; by default the float formula is applied to the cent
+    price and rounded half to even.
+
+    Subclasses written against the older interface, which override only
+    apply_promotion(product, quantity), keep working: they get a
+    calculate_price that calls their apply_promotion with a stand-in product
+    carrying just the price, cent prices come from rounding their float
+    total, and their batches are priced one pair at a time.
     """
+    # Bumped by every attribute assignment, so caches of promotional prices can
+    # tell results computed before a parameter change from those after it.
+    _version = 0
+    # Whether calculate_price works elementwise on NumPy arrays.
+    vectorized = True
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if (getattr(cls.calculate_price, "__isabstractmethod__", False)
+                and "apply_promotion" in cls.__dict__):
+            cls.calculate_price = _legacy_calculate_price
+            cls.calculate_cents = _legacy_calculate_cents
+            cls.apply_promotion_cents = _legacy_apply_promotion_cents
+            cls.vectorized = False
+
     def __init__(self, name: str):
         """
         Initialize a Promotion.
@@ -13,7 +50,24 @@ class Promotion(ABC):
         """
         self.name = name
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        super().__setattr__("_version", self._version + 1)
+
     @abstractmethod
+    def calculate_price(self, price, quantity):
+        """
+        Calculate the promotional total for a unit price and quantity.
+
+        Args:
+            price (float or numpy.ndarray): The unit price(s).
+            quantity (int or numpy.ndarray): The quantity or quantities to purchase.
+
+        Returns:
+            float or numpy.ndarray: The total price(s) after applying the promotion.
+        """
+        pass
+
     def apply_promotion(self, product, quantity: int) -> float:
         """
         Apply the promotion to a product for a specified quantity.
@@ -25,7 +79,122 @@ class Promotion(ABC):
         Returns:
             float: The total price after applying the promotion.
         """
-        pass
+        return self.calculate_price(product.price, quantity)
+
+    def calculate_cents(self, price, quantity):
+        """
+        Calculate the promotional total in integer cents.
+
+        Args:
+            price (int or numpy.ndarray): The unit price(s) in cents.
+            quantity (int or numpy.ndarray): The quantity or quantities to purchase.
+
+        Returns:
+            int or numpy.ndarray: The total price(s) in cents.
+        """
+        return round(self.calculate_price(price, quantity))
+
+    def apply_promotion_cents(self, product, quantity: int) -> int:
+        """
+        Apply the promotion to a product for a specified quantity, in cents.
+
+        Args:
+            product (Product): The product instance.
+            quantity (int): The quantity to purchase.
+
+        Returns:
+            int: The total price in cents after applying the promotion.
+        """
+        return self.calculate_cents(product.price_cents, quantity)
+
+    def calculate_cents_many(self, prices, quantities) -> list:
+        """
+        Calculate the promotional totals in cents of many lines in pure Python.
+
+        apply_batch_cents uses this when NumPy is not installed. The default
+        calls calculate_cents per line; the built-in promotions inline their
+        formula in one loop instead, which keeps batch sums in cents at least
+        as fast as the float path.
+
+        Args:
+            prices (iterable): The unit prices in cents.
+            quantities (iterable): The quantities, aligned with prices.
+
+        Returns:
+            list: The total prices in cents, each equal to calculate_cents for its pair.
+        """
+        return list(map(self.calculate_cents, prices, quantities))
+
+    def apply_batch(self, prices, quantities):
+        """
+        Apply the promotion to many (price, quantity) pairs at once.
+
+        With NumPy installed the inputs are converted to float64/int64 arrays and
+        priced in one vectorized pass; otherwise each pair is priced in turn. Either
+        way every element equals what apply_promotion returns for that pair.
+
+        Args:
+            prices (sequence or numpy.ndarray): The unit prices.
+            quantities (sequence or numpy.ndarray): The quantities, aligned with prices.
+
+        Returns:
+            numpy.ndarray or array.array: The promotional totals as doubles.
+
+        Raises:
+            ValueError: If prices and quantities differ in length.
+        """
+        if numpy is not None and self.vectorized:
+            prices = numpy.asarray(prices, dtype=numpy.float64)
+            quantities = numpy.asarray(quantities, dtype=numpy.int64)
+            if prices.shape != quantities.shape:
+                raise ValueError("Prices and quantities must have the same length.")
+            return self.calculate_price(prices, quantities)
+        if len(prices) != len(quantities):
+            raise ValueError("Prices and quantities must have the same length.")
+        return array("d", map(self.calculate_price, prices, quantities))
+
+    def apply_batch_cents(self, prices, quantities):
+        """
+        Apply the promotion to many (cent price, quantity) pairs at once.
+
+        The integer counterpart of apply_batch: every element equals what
+        calculate_cents returns for that pair.
+
+        Args:
+            prices (sequence or numpy.ndarray): The unit prices in cents.
+            quantities (sequence or numpy.ndarray): The quantities, aligned with prices.
+
+        Returns:
+            numpy.ndarray or array.array: The promotional totals as 64-bit integers.
+
+        Raises:
+            ValueError: If prices and quantities differ in length.
+        """
+        if numpy is not None and self.vectorized:
+            prices = numpy.asarray(prices, dtype=numpy.int64)
+            quantities = numpy.asarray(quantities, dtype=numpy.int64)
+            if prices.shape != quantities.shape:
+                raise ValueError("Prices and quantities must have the same length.")
+            return numpy.asarray(self.calculate_cents(prices, quantities), dtype=numpy.int64)
+        if len(prices) != len(quantities):
+            raise ValueError("Prices and quantities must have the same length.")
+        return array("q", self.calculate_cents_many(prices, quantities))
+
+class _PricedItem(namedtuple("_PricedItem", "price")):
+    """The stand-in product legacy apply_promotion overrides are called with."""
+    __slots__ = ()
+
+def _legacy_calculate_price(self, price, quantity):
+    """calculate_price for subclasses that only override apply_promotion."""
+    return self.apply_promotion(_PricedItem(price), quantity)
+
+def _legacy_calculate_cents(self, price, quantity):
+    """calculate_cents for subclasses that only override apply_promotion."""
+    return to_cents(self.apply_promotion(_PricedItem(from_cents(price)), quantity))
+
+def _legacy_apply_promotion_cents(self, product, quantity: int) -> int:
+    """apply_promotion_cents for subclasses that only override apply_promotion."""
+    return to_cents(self.apply_promotion(product, quantity))
 
 class PercentDiscount(Promotion):
     """
@@ -41,21 +210,55 @@ class PercentDiscount(Promotion):
         super().__init__("Percent Discount")
         self.percent = percent
 
-    def apply_promotion(self, product, quantity: int) -> float:
+    def calculate_price(self, price, quantity):
         """
         Calculate the total price after applying a percentage discount.
 
         Args:
-            product (Product): The product instance.
-            quantity (int): The quantity to purchase.
+            price (float or numpy.ndarray): The unit price(s).
+            quantity (int or numpy.ndarray): The quantity or quantities to purchase.
 
         Returns:
-            float: The discounted total price.
+            float or numpy.ndarray: The discounted total price(s).
         """
-        total = product.price * quantity
+        total = price * quantity
         discount = total * (self.percent / 100)
         return total - discount
 
+    def calculate_cents(self, price, quantity):
+        """
+        Calculate the discounted total in cents, rounding the discount half to even.
+
+        The percentage is taken to two decimals (basis points).
+
+        Args:
+            price (int or numpy.ndarray): The unit price(s) in cents.
+            quantity (int or numpy.ndarray): The quantity or quantities to purchase.
+
+        Returns:
+            int or numpy.ndarray: The discounted total price(s) in cents.
+        """
+        total = price * quantity
+        return total - divide(total * round(self.percent * 100), 10_000)
+
+    def calculate_cents_many(self, prices, quantities) -> list:
+        """
+        calculate_cents over many lines in one comprehension.
+
+        The percentage is reduced to its lowest terms (15% is 3/20) so the
+        per-line ints stay small, with an even denominator. The discount then
+        rounds half up, and back down on the ties whose quotient would be odd,
+        which is divide()'s half-to-even rounding without a divmod per line.
+        """
+        rate = Fraction(round(self.percent * 100), 10_000)
+        numerator, denominator = rate.numerator, rate.denominator
+        if denominator % 2:
+            numerator, denominator = 2 * numerator, 2 * denominator
+        half, period = denominator // 2, 2 * denominator
+        return [total - (scaled + half) // denominator + (scaled % period == half)
+                for price, quantity in zip(prices, quantities)
+                for total in (price * quantity,) for scaled in (total * numerator,)]
+
 class SecondHalfPrice(Promotion):
     """
     Applies a promotion where every second item is half price.
@@ -66,22 +269,47 @@ class SecondHalfPrice(Promotion):
         """
         super().__init__("Second Half Price")
 
-    def apply_promotion(self, product, quantity: int) -> float:
+    def calculate_price(self, price, quantity):
         """
         Calculate the total price applying half price for every second item.
 
         Args:
-            product (Product): The product instance.
-            quantity (int): The quantity to purchase.
+            price (float or numpy.ndarray): The unit price(s).
+            quantity (int or numpy.ndarray): The quantity or quantities to purchase.
 
         Returns:
-            float: The total price after applying the promotion.
+            float or numpy.ndarray: The total price(s) after applying the promotion.
         """
-        full_price = product.price
+        full_price = price
         pairs = quantity // 2
         remainder = quantity % 2
         return pairs * (full_price + full_price / 2) + remainder * full_price
 
+    def calculate_cents(self, price, quantity):
+        """
+        Calculate the total in cents; the half-price items of a line are rounded
+        together, half to even.
+
+        Args:
+            price (int or numpy.ndarray): The unit price(s) in cents.
+            quantity (int or numpy.ndarray): The quantity or quantities to purchase.
+
+        Returns:
+            int or numpy.ndarray: The total price(s) in cents.
+        """
+        pairs = quantity // 2
+        return (pairs + quantity % 2) * price + divide(pairs * price, 2)
+
+    def calculate_cents_many(self, prices, quantities) -> list:
+        """calculate_cents over many lines; halving rounds up only from an odd half."""
+        totals = []
+        append = totals.append
+        for price, quantity in zip(prices, quantities):
+            halved = (quantity >> 1) * price
+            half = halved >> 1
+            append((quantity - (quantity >> 1)) * price + half + (halved & half & 1))
+        return totals
+
 class ThirdOneFree(Promotion):
     """
     Applies a promotion where for every three items, one is free (buy 2, get 1 free).
@@ -92,17 +320,34 @@ class ThirdOneFree(Promotion):
         """
         super().__init__("Third One Free")
 
-    def apply_promotion(self, product, quantity: int) -> float:
+    def calculate_price(self, price, quantity):
         """
         Calculate the total price applying the 'buy 2, get 1 free' promotion.
 
         Args:
-            product (Product): The product instance.
-            quantity (int): The quantity to purchase.
+            price (float or numpy.ndarray): The unit price(s).
+            quantity (int or numpy.ndarray): The quantity or quantities to purchase.
 
         Returns:
-            float: The total price after applying the promotion.
+            float or numpy.ndarray: The total price(s) after applying the promotion.
         """
         groups = quantity // 3
         remainder = quantity % 3
-        return groups * (2 * product.price) + remainder * product.price
\ No newline at end of file
+        return groups * (2 * price) + remainder * price
+
+    def calculate_cents(self, price, quantity):
+        """
+        Calculate the 'buy 2, get 1 free' total in cents; no rounding is needed.
+
+        Args:
+            price (int or numpy.ndarray): The unit price(s) in cents.
+            quantity (int or numpy.ndarray): The quantity or quantities to purchase.
+
+        Returns:
+            int or numpy.ndarray: The total price(s) in cents.
+        """
+        return (quantity - quantity // 3) * price
+
+    def calculate_cents_many(self, prices, quantities) -> list:
+        """calculate_cents over many lines in one comprehension."""
+        return [(quantity - quantity // 3) * price for price, quantity in zip(prices, quantities)]
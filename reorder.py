@@ -0,0 +1,244 @@
+"""
+Low-stock tracking: per-product reorder thresholds and a priority index over stock.
+
+A ReorderIndex keeps two heaps, updated whenever a tracked product's quantity
+changes:
+
+    stock      (quantity, product id); answers "the k products with the least stock"
+    headroom   (quantity - reorder threshold, product id) for the products at or
+               below their threshold; answers "which products need reordering",
+               most urgent first
+
+An update pushes new entries and leaves the old ones behind; entries whose
+quantity no longer matches the product are skipped, and dropped, when they
+reach the top, and the heaps are rebuilt once stale entries outnumber live
+ones. Updates and queries therefore cost O(log n) per entry touched, where a
+scan of the catalog costs O(n).
+
+Subscribers are alerted as soon as a product's quantity falls to its
+threshold, before it sells out and is deactivated.
+"""
+import heapq
+import threading
+from collections import namedtuple
+
+from products import NonStockedProduct
+
+
+class LowStock(namedtuple("LowStock", "product quantity threshold")):
+    """
+    A product at or below its reorder threshold.
+
+    Attributes:
+        product (Product): The product.
+        quantity (int): Its quantity when the query ran.
+        threshold (int): Its reorder threshold.
+    """
+    __slots__ = ()
+
+
+class ReorderIndex:
+    """
+    Reorder thresholds and a heap index of stock levels for a set of products.
+
+    Non-stocked products have no stock to run out of and are not tracked.
+    """
+    def __init__(self, products=(), default_threshold: int = 0):
+        """
+        Build the index.
+
+        Args:
+            products (iterable): The products to track.
+            default_threshold (int): The threshold of products without their own;
+                the default of 0 flags only sold-out products.
+
+        Raises:
+            ValueError: If default_threshold is negative.
+        """
+        self.default_threshold = self._checked(default_threshold)
+        self._thresholds = {}
+        self._products = {}
+        self._stock = []
+        self._headroom = []
+        self._subscribers = ()
+        self._lock = threading.Lock()
+        for product in products:
+            if not isinstance(product, NonStockedProduct):
+                self._products[product.product_id] = product
+        self._rebuild()
+
+    def __len__(self):
+        return len(self._products)
+
+    @staticmethod
+    def _checked(threshold) -> int:
+        """Return a threshold after checking that it is a non-negative integer."""
+        if not isinstance(threshold, int):
+            raise TypeError("Threshold must be an integer.")
+        if threshold < 0:
+            raise ValueError("Threshold should not be negative.")
+        return threshold
+
+    def _rebuild(self):
+        """Rebuild both heaps from the tracked products, dropping every stale entry."""
+        thresholds, default = self._thresholds, self.default_threshold
+        self._stock = [(product.quantity, product_id)
+                       for product_id, product in self._products.items()]
+        headroom = ((product.quantity - thresholds.get(product_id, default), product_id)
+                    for product_id, product in self._products.items())
+        self._headroom = [entry for entry in headroom if entry[0] <= 0]
+        heapq.heapify(self._stock)
+        heapq.heapify(self._headroom)
+
+    def _push(self, product):
+        """Record a tracked product's current quantity. The caller holds the lock."""
+        quantity, product_id = product.quantity, product.product_id
+        heapq.heappush(self._stock, (quantity, product_id))
+        headroom = quantity - self.threshold(product)
+        if headroom <= 0:
+            heapq.heappush(self._headroom, (headroom, product_id))
+        if len(self._stock) > 2 * len(self._products) + 64:
+            self._rebuild()
+
+    def threshold(self, product) -> int:
+        """
+        Return a product's reorder threshold.
+
+        Args:
+            product (Product): The product.
+
+        Returns:
+            int: Its own threshold, or the default.
+        """
+        return self._thresholds.get(product.product_id, self.default_threshold)
+
+    def set_threshold(self, product, threshold):
+        """
+        Set or clear a product's reorder threshold.
+
+        Args:
+            product (Product): The product.
+            threshold (int or None): The quantity at or below which the product
+                should be reordered, or None to use the default.
+
+        Raises:
+            TypeError: If threshold is not an integer or None.
+            ValueError: If threshold is negative.
+        """
+        with self._lock:
+            if threshold is None:
+                self._thresholds.pop(product.product_id, None)
+            else:
+                self._thresholds[product.product_id] = self._checked(threshold)
+            if product.product_id in self._products:
+                self._push(product)
+
+    def subscribe(self, callback):
+        """
+        Register a callback alerted when a product's quantity falls to its threshold.
+
+        The callback is called as ``callback(low_stock)`` with a LowStock, from the
+        thread that changed the quantity and while the product's lock is held, so
+        it should return quickly (for instance by queuing a reorder).
+
+        Args:
+            callback (callable): The function to alert.
+        """
+        self._subscribers = self._subscribers + (callback,)
+
+    def add(self, product):
+        """
+        Start tracking a product.
+
+        Args:
+            product (Product): The product to track.
+        """
+        if isinstance(product, NonStockedProduct):
+            return
+        with self._lock:
+            self._products[product.product_id] = product
+            self._push(product)
+
+    def remove(self, product):
+        """
+        Stop tracking a product; its heap entries become stale.
+
+        Args:
+            product (Product): The product to drop.
+        """
+        with self._lock:
+            self._products.pop(product.product_id, None)
+
+    def on_product_change(self, product, attribute, old_value, new_value):
+        """
+        Product listener re-indexing a changed quantity and raising low-stock alerts.
+
+        Args:
+            product (Product): The product that changed.
+            attribute (str): The name of the changed attribute.
+            old_value: The attribute's previous value.
+            new_value: The attribute's new value.
+        """
+        if attribute != "quantity" or product.product_id not in self._products:
+            return
+        with self._lock:
+            self._push(product)
+        threshold = self.threshold(product)
+        if new_value <= threshold < old_value:
+            alert = LowStock(product, new_value, threshold)
+            for subscriber in self._subscribers:
+                subscriber(alert)
+
+    def _valid(self, entry: tuple, key) -> bool:
+        """Tell whether a heap entry still describes its product."""
+        product = self._products.get(entry[1])
+        return product is not None and key(product) == entry[0]
+
+    def _smallest(self, heap: list, key, limit, below=None) -> list:
+        """
+        Pop the smallest live entries of a heap, then push them back.
+
+        Stale and duplicate entries met on the way are discarded for good.
+        Stops after `limit` products, or at the first key above `below`.
+        """
+        found, seen = [], set()
+        with self._lock:
+            while heap and (limit is None or len(found) < limit):
+                if below is not None and heap[0][0] > below:
+                    break
+                entry = heapq.heappop(heap)
+                if entry[1] in seen or not self._valid(entry, key):
+                    continue
+                seen.add(entry[1])
+                found.append(entry)
+            for entry in found:
+                heapq.heappush(heap, entry)
+        return [self._products[product_id] for _, product_id in found]
+
+    def lowest(self, k: int) -> list:
+        """
+        Return the k tracked products with the least stock.
+
+        Args:
+            k (int): How many products to return.
+
+        Returns:
+            list: Up to k products, lowest quantity first.
+        """
+        return self._smallest(self._stock, lambda product: product.quantity, k)
+
+    def below_threshold(self, limit: int = None) -> list:
+        """
+        Return the products at or below their reorder threshold, most urgent first.
+
+        Args:
+            limit (int or None): The most products to return, or None for all.
+
+        Returns:
+            list: LowStock entries, ordered by quantity minus threshold.
+        """
+        products = self._smallest(self._headroom,
+                                  lambda product: product.quantity - self.threshold(product),
+                                  limit, below=0)
+        return [LowStock(product, product.quantity, self.threshold(product))
+                for product in products]
@@ -0,0 +1,174 @@
+import heapq
+import math
+import threading
+import time
+from collections import namedtuple
+from itertools import count
+
+from products import NonStockedProduct, InsufficientStockError
+
+
+class Hold(namedtuple("Hold", "hold_id shopping_list demand expires_at")):
+    """
+    An outstanding reservation.
+
+    Attributes:
+        hold_id (int): The hold's id, as returned by Store.reserve().
+        shopping_list (list): The (Product, quantity) tuples held.
+        demand (dict): Product id -> (Product, total quantity held).
+        expires_at (float): The clock time at which the hold lapses.
+    """
+    __slots__ = ()
+
+
+class ReservationBook:
+    """
+    The outstanding stock holds of a store.
+
+    The book keeps the units held per product, so the quantity available to
+    new orders and holds is one dictionary lookup away, and a heap of hold
+    deadlines, so expiring holds costs O(log n) each and checking for expired
+    holds is O(1) when none are due. Holds that were committed or released
+    before their deadline stay in the heap and are skipped when they surface.
+
+    Holds only reserve stock; nothing is bought until the store commits them.
+    """
+    def __init__(self, clock=time.monotonic):
+        """
+        Initialize an empty book.
+
+        Args:
+            clock (callable): Returns the current time in seconds; replaceable for tests.
+        """
+        self.clock = clock
+        self._holds = {}
+        # Product id -> units held by outstanding holds.
+        self._held = {}
+        # (deadline, hold id) for every hold placed, including finished ones.
+        self._deadlines = []
+        self._hold_ids = count(1)
+        self._lock = threading.Lock()
+        self.expired = 0
+
+    def __len__(self):
+        return len(self._holds)
+
+    def held(self, product_id: int) -> int:
+        """
+        Return the units of a product held by outstanding holds.
+
+        Args:
+            product_id (int): The product's id.
+
+        Returns:
+            int: The units held.
+        """
+        self.expire()
+        return self._held.get(product_id, 0)
+
+    def check(self, demand: dict):
+        """
+        Check that every product has enough unheld stock for its demand.
+
+        Args:
+            demand (dict): Product id -> (Product, total quantity requested).
+
+        Raises:
+            InsufficientStockError: If a stocked product has too few unheld units.
+        """
+        self.expire()
+        held = self._held
+        for product_id, (product, requested) in demand.items():
+            units = held.get(product_id)
+            if units and not isinstance(product, NonStockedProduct) \
+                    and requested > product.quantity - units:
+                raise InsufficientStockError(
+                    f"Not enough quantity for product {product.name}. "
+                    f"Requested: {requested}, Available: {product.quantity - units}"
+                )
+
+    def add(self, shopping_list: list, demand: dict, ttl: float) -> Hold:
+        """
+        Record a hold. The caller has already checked the stock.
+
+        Args:
+            shopping_list (list): The (Product, quantity) tuples to hold.
+            demand (dict): Product id -> (Product, total quantity requested).
+            ttl (float): Seconds until the hold expires, or math.inf for a hold
+                that lasts until it is committed or released.
+
+        Returns:
+            Hold: The new hold.
+        """
+        with self._lock:
+            hold = Hold(next(self._hold_ids), list(shopping_list), demand, self.clock() + ttl)
+            self._holds[hold.hold_id] = hold
+            for product_id, (_, requested) in demand.items():
+                self._held[product_id] = self._held.get(product_id, 0) + requested
+            if ttl != math.inf:  # Would never surface, so never leave the heap.
+                heapq.heappush(self._deadlines, (hold.expires_at, hold.hold_id))
+        return hold
+
+    def _drop(self, hold: Hold):
+        """Remove a hold and free its units. The caller holds the lock."""
+        del self._holds[hold.hold_id]
+        for product_id, (_, requested) in hold.demand.items():
+            remaining = self._held[product_id] - requested
+            if remaining:
+                self._held[product_id] = remaining
+            else:
+                del self._held[product_id]
+
+    def find(self, hold_id: int):
+        """
+        Look up an outstanding hold.
+
+        Args:
+            hold_id (int): The hold's id.
+
+        Returns:
+            Hold or None: The hold, or None if it is unknown, finished or expired.
+        """
+        self.expire()
+        return self._holds.get(hold_id)
+
+    def pop(self, hold_id: int):
+        """
+        Remove an outstanding hold.
+
+        Args:
+            hold_id (int): The hold's id.
+
+        Returns:
+            Hold or None: The hold, or None if it is unknown, finished or expired.
+        """
+        self.expire()
+        with self._lock:
+            hold = self._holds.get(hold_id)
+            if hold is not None:
+                self._drop(hold)
+            return hold
+
+    def expire(self) -> int:
+        """
+        Drop every hold whose deadline has passed.
+
+        Returns:
+            int: The number of holds that expired.
+        """
+        deadlines = self._deadlines
+        if not deadlines:
+            return 0
+        now = self.clock()
+        if deadlines[0][0] > now:
+            return 0
+        expired = 0
+        with self._lock:
+            while deadlines and deadlines[0][0] <= now:
+                _, hold_id = heapq.heappop(deadlines)
+                hold = self._holds.get(hold_id)
+                if hold is not None:
+                    self._drop(hold)
+                    expired += 1
+            self.expired += expired
+        return expired
@@ -0,0 +1,263 @@
+"""
+Search indexes over a store's catalog: name prefix, name substring and price range.
+
+CatalogIndex keeps three structures, updated as products are added, removed,
+renamed or repriced:
+
+    names      (folded name, product id) pairs in sorted order; a prefix query
+               is a binary search followed by a slice
+    prices     (price, product id) pairs in sorted order; a price range is two
+               binary searches followed by a slice
+    trigrams   every three-character sequence of every folded name -> the ids
+               of the products containing it; a substring query intersects the
+               posting sets of its trigrams, smallest first, and checks only
+               the few names that survive
+
+Names are compared case-insensitively. Results come back one page at a time.
+"""
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import namedtuple
+
+GRAM = 3
+
+
+class Page(namedtuple("Page", "items next_offset")):
+    """
+    One page of search results.
+
+    Attributes:
+        items (list): The products on this page.
+        next_offset (int or None): The offset of the next page, or None if this is the last.
+    """
+    __slots__ = ()
+
+
+def fold(name: str) -> str:
+    """Return the case-insensitive form of a name used by the indexes."""
+    return name.casefold()
+
+
+def trigrams(text: str) -> set:
+    """Return the set of three-character sequences in a folded text."""
+    return {text[index:index + GRAM] for index in range(len(text) - GRAM + 1)}
+
+
+class CatalogIndex:
+    """
+    Sorted name and price indexes plus a trigram index, kept in step with a store.
+    """
+    def __init__(self, products=()):
+        """
+        Build the indexes.
+
+        Args:
+            products (iterable): The products to index.
+        """
+        self._products = {product.product_id: product for product in products}
+        self._names = sorted((fold(product.name), product_id)
+                             for product_id, product in self._products.items())
+        self._prices = sorted((product.price, product_id)
+                              for product_id, product in self._products.items())
+        self._trigrams = {}
+        for folded, product_id in self._names:
+            self._add_trigrams(folded, product_id)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._products)
+
+    def _add_trigrams(self, folded: str, product_id: int):
+        """Add a product id to the posting set of every trigram of its folded name."""
+        for gram in trigrams(folded):
+            self._trigrams.setdefault(gram, set()).add(product_id)
+
+    def _remove_trigrams(self, folded: str, product_id: int):
+        """Remove a product id from the posting sets of its folded name's trigrams."""
+        for gram in trigrams(folded):
+            ids = self._trigrams[gram]
+            ids.discard(product_id)
+            if not ids:
+                del self._trigrams[gram]
+
+    @staticmethod
+    def _remove_sorted(entries: list, entry: tuple):
+        """Remove an entry from a sorted list by binary search."""
+        index = bisect_left(entries, entry)
+        if index < len(entries) and entries[index] == entry:
+            del entries[index]
+
+    def add(self, product):
+        """
+        Index a product.
+
+        Args:
+            product (Product): The product to add.
+        """
+        with self._lock:
+            product_id = product.product_id
+            self._products[product_id] = product
+            folded = fold(product.name)
+            insort(self._names, (folded, product_id))
+            insort(self._prices, (product.price, product_id))
+            self._add_trigrams(folded, product_id)
+
+    def remove(self, product):
+        """
+        Stop indexing a product.
+
+        Args:
+            product (Product): The product to remove.
+        """
+        with self._lock:
+            product_id = product.product_id
+            if self._products.pop(product_id, None) is None:
+                return
+            folded = fold(product.name)
+            self._remove_sorted(self._names, (folded, product_id))
+            self._remove_sorted(self._prices, (product.price, product_id))
+            self._remove_trigrams(folded, product_id)
+
+    def on_product_change(self, product, attribute, old_value, new_value):
+        """
+        Product listener moving a renamed or repriced product within the indexes.
+
+        Args:
+            product (Product): The product that changed.
+            attribute (str): The name of the changed attribute.
+            old_value: The attribute's previous value.
+            new_value: The attribute's new value.
+        """
+        if attribute == "price":
+            with self._lock:
+                product_id = product.product_id
+                self._remove_sorted(self._prices, (old_value, product_id))
+                insort(self._prices, (new_value, product_id))
+        elif attribute == "name":
+            with self._lock:
+                product_id = product.product_id
+                old_folded, new_folded = fold(old_value), fold(new_value)
+                self._remove_sorted(self._names, (old_folded, product_id))
+                insort(self._names, (new_folded, product_id))
+                self._remove_trigrams(old_folded, product_id)
+                self._add_trigrams(new_folded, product_id)
+
+    def _page(self, product_ids, offset: int, limit: int, active_only: bool) -> Page:
+        """Turn an ordered iterable of product ids into a page of products."""
+        if offset < 0 or limit <= 0:
+            raise ValueError("offset must not be negative and limit must be positive.")
+        products = self._products
+        items = []
+        position = offset
+        for product_id in product_ids:
+            product = products[product_id]
+            if active_only and not product.active:
+                continue
+            if len(items) == limit:
+                return Page(items, position)
+            items.append(product)
+            position += 1
+        return Page(items, None)
+
+    def by_prefix(self, prefix: str, offset: int = 0, limit: int = 20,
+                  active_only: bool = True) -> Page:
+        """
+        Find products whose name starts with a prefix, in name order.
+
+        Args:
+            prefix (str): The start of the name, in any case.
+            offset (int): How many matches to skip.
+            limit (int): The most products to return.
+            active_only (bool): Leave out inactive products.
+
+        Returns:
+            Page: The matching products.
+        """
+        folded = fold(prefix)
+        with self._lock:
+            names = self._names
+            start = bisect_left(names, (folded,))
+
+            def matches():
+                for index in range(start, len(names)):
+                    name, product_id = names[index]
+                    if not name.startswith(folded):
+                        return
+                    yield product_id
+
+            return self._page(self._skip(matches(), offset, active_only), offset, limit,
+                              active_only)
+
+    def by_substring(self, text: str, offset: int = 0, limit: int = 20,
+                     active_only: bool = True) -> Page:
+        """
+        Find products whose name contains a text, in name order.
+
+        Texts of three or more characters are looked up in the trigram index;
+        shorter ones match so much of a catalog that the names are scanned in
+        order until the page is full.
+
+        Args:
+            text (str): The text to look for, in any case.
+            offset (int): How many matches to skip.
+            limit (int): The most products to return.
+            active_only (bool): Leave out inactive products.
+
+        Returns:
+            Page: The matching products.
+        """
+        folded = fold(text)
+        with self._lock:
+            if len(folded) < GRAM:
+                matches = (product_id for name, product_id in self._names if folded in name)
+            else:
+                postings = sorted((self._trigrams.get(gram, ()) for gram in trigrams(folded)),
+                                  key=len)
+                candidates = set(postings[0]).intersection(*postings[1:])
+                products = self._products
+                matches = sorted((fold(products[product_id].name), product_id)
+                                 for product_id in candidates
+                                 if folded in fold(products[product_id].name))
+                matches = (product_id for _, product_id in matches)
+            return self._page(self._skip(matches, offset, active_only), offset, limit,
+                              active_only)
+
+    def by_price(self, low: float, high: float, offset: int = 0, limit: int = 20,
+                 active_only: bool = True) -> Page:
+        """
+        Find products priced between two bounds, inclusive, cheapest first.
+
+        Args:
+            low (float): The lowest price.
+            high (float): The highest price.
+            offset (int): How many matches to skip.
+            limit (int): The most products to return.
+            active_only (bool): Leave out inactive products.
+
+        Returns:
+            Page: The matching products.
+        """
+        with self._lock:
+            prices = self._prices
+            start = bisect_left(prices, (low,))
+            end = bisect_right(prices, (high, float("inf")))
+            if not active_only:
+                start = min(start + offset, end)
+                matches = (product_id for _, product_id in prices[start:end])
+                return self._page(matches, offset, limit, active_only)
+            matches = (prices[index][1] for index in range(start, end))
+            return self._page(self._skip(matches, offset, active_only), offset, limit,
+                              active_only)
+
+    def _skip(self, product_ids, offset: int, active_only: bool):
+        """Drop the first `offset` matching products from an iterable of ids."""
+        products = self._products
+        product_ids = iter(product_ids)
+        skipped = 0
+        while skipped < offset:
+            product_id = next(product_ids, None)
+            if product_id is None:
+                break
+            if not active_only or products[product_id].active:
+                skipped += 1
+        return product_ids
@@ -0,0 +1,427 @@
+"""
+A store whose products are partitioned across worker processes.
+
+Each worker process owns a regular Store holding one shard of the catalog; a
+product's shard is chosen by hashing its name. ShardedStore routes every order
+line to the shard that owns the product, so orders touching different shards
+run in parallel on different cores.
+
+An order that spans several shards commits with a two-phase commit: every
+shard first prepares its lines by reserving them (Store.reserve, which checks
+stock and limits and holds the units without taking them), and only when all
+shards have prepared is each told to commit, buying its lines through
+Store.commit, so Product.buy rules and promotions all apply. If any shard
+refuses or its worker has died, the shards that prepared are told to abort and
+release their holds; nothing was bought, so no stock has to be given back.
+
+Workers publish each product's quantity and active flag, and their shard's
+total quantity, to an array in shared memory, so get_total_quantity() and the
+product listings read it directly without asking the workers.
+"""
+import math
+import multiprocessing
+import os
+import threading
+import zlib
+from itertools import count
+
+from catalog_snapshot import KIND_LIMITED, KIND_NON_STOCKED, product_kind
+from order_journal import decode_product, encode_product
+from products import InsufficientStockError, PurchaseLimitError
+from store import ProductList, Store
+
+# Exceptions a worker may report, rebuilt by name in the calling process.
+ERROR_TYPES = {cls.__name__: cls for cls in (InsufficientStockError, PurchaseLimitError,
+                                             ValueError, TypeError)}
+# Prepared holds never expire: one lapsing between prepare and commit would
+# make that shard's commit fail after other shards had bought. They end with
+# the coordinator's commit or abort, or with the worker, which exits when the
+# coordinator's end of its pipe closes.
+PREPARE_TTL = math.inf
+
+
+def shard_of(name: str, shards: int) -> int:
+    """
+    Return the shard owning the product with a given name.
+
+    Args:
+        name (str): The product's name.
+        shards (int): The number of shards.
+
+    Returns:
+        int: The shard number, stable across processes and runs.
+    """
+    return zlib.crc32(name.encode("utf-8")) % shards
+
+
+class _ShardWorker:
+    """The state of one shard, living in its worker process."""
+
+    def __init__(self, products: list, counters):
+        """
+        Build the shard's store.
+
+        Args:
+            products (list): The shard's products, as encoded by encode_product().
+            counters: The shared array: the shard's total quantity, then a
+                (quantity, active) pair per product in shard order.
+        """
+        self.store = Store([decode_product(data) for data in products])
+        self.counters = counters
+        self.slots = {data["product_id"]: 1 + 2 * index for index, data in enumerate(products)}
+        # Transaction id -> the id of the hold reserving its lines.
+        self.prepared = {}
+
+    def _lines(self, items: list) -> list:
+        """Turn (product id, quantity) pairs into a shopping list."""
+        get_product = self.store.get_product
+        return [(get_product(product_id), quantity) for product_id, quantity in items]
+
+    def _publish(self, shopping_list: list):
+        """Copy the stock of the ordered products and the shard total to shared memory."""
+        counters = self.counters
+        for product, _ in shopping_list:
+            slot = self.slots[product.product_id]
+            counters[slot] = product.quantity
+            counters[slot + 1] = product.active
+        counters[0] = self.store.get_total_quantity()
+
+    def order(self, items: list) -> float:
+        """Place an order that only touches this shard."""
+        shopping_list = self._lines(items)
+        try:
+            return self.store.order(shopping_list)
+        finally:
+            self._publish(shopping_list)
+
+    def prepare(self, transaction: int, items: list):
+        """Reserve this shard's part of a cross-shard order without buying it."""
+        self.prepared[transaction] = self.store.reserve(self._lines(items), PREPARE_TTL)
+
+    def commit(self, transaction: int) -> float:
+        """Buy the lines a transaction reserved and publish the new stock."""
+        hold_id = self.prepared.pop(transaction)
+        hold = self.store.reservations.find(hold_id)
+        try:
+            return self.store.commit(hold_id)
+        except Exception:
+            self.store.release(hold_id)
+            raise
+        finally:
+            if hold is not None:
+                self._publish(hold.shopping_list)
+
+    def abort(self, transaction: int):
+        """Release the hold of a prepared transaction."""
+        hold_id = self.prepared.pop(transaction, None)
+        if hold_id is not None:
+            self.store.release(hold_id)
+
+
+def _serve(connection, products: list, counters):
+    """
+    Worker process main loop: answer requests until told to stop.
+
+    Each request is (operation, *arguments); each reply is ("ok", result) or
+    ("error", exception class name, message).
+    """
+    worker = _ShardWorker(products, counters)
+    while True:
+        operation, *arguments = connection.recv()
+        if operation == "stop":
+            connection.send(("ok", None))
+            break
+        try:
+            result = getattr(worker, operation)(*arguments)
+        except Exception as error:
+            connection.send(("error", type(error).__name__, str(error)))
+        else:
+            connection.send(("ok", result))
+    connection.close()
+
+
+class ShardProductView:
+    """
+    A read-only handle on a product owned by a shard worker.
+
+    Name, price, promotion and limit are fixed when the store is created;
+    quantity and active status are read from the shard's shared memory, so they
+    are always current.
+    """
+    __slots__ = ("_store", "_counters", "_slot", "product_id", "name", "price", "promotion",
+                 "maximum", "kind", "shard")
+
+    def __init__(self, store, product, shard: int, counters, slot: int):
+        """
+        Initialize a handle on a product.
+
+        Args:
+            store (ShardedStore): The store the product belongs to.
+            product (Product): The product handed to the store.
+            shard (int): The shard owning the product.
+            counters: The shard's shared array.
+            slot (int): The index of the product's quantity in the array.
+        """
+        self._store = store
+        self._counters = counters
+        self._slot = slot
+        self.product_id = product.product_id
+        self.name = product.name
+        self.price = product.price
+        self.promotion = product.promotion
+        self.kind = product_kind(product)
+        self.maximum = product.maximum if self.kind == KIND_LIMITED else None
+        self.shard = shard
+
+    def __repr__(self):
+        return f"ShardProductView({self.show()!r})"
+
+    @property
+    def quantity(self) -> int:
+        """int: The product's current quantity."""
+        return self._counters[self._slot]
+
+    @property
+    def active(self) -> bool:
+        """bool: The product's current active status."""
+        return bool(self._counters[self._slot + 1])
+
+    def show(self) -> str:
+        """
+        Return a string representation of the product, matching Product.show().
+
+        Returns:
+            str: The product's details.
+        """
+        if self.kind == KIND_NON_STOCKED:
+            return f"{self.name}, Price: {self.price}, Non-stocked product"
+        base_info = f"{self.name}, Price: {self.price}, Quantity: {self.quantity}"
+        if self.promotion:
+            base_info += f", Promotion: {self.promotion.name}"
+        if self.kind == KIND_LIMITED:
+            base_info += f", Limited to {self.maximum} per order."
+        return base_info
+
+    def buy(self, quantity: int) -> float:
+        """
+        Buy the product through its store.
+
+        Args:
+            quantity (int): The quantity to purchase.
+
+        Returns:
+            float: The total price for the purchase.
+        """
+        return self._store.order([(self, quantity)])
+
+
+class ShardedStore:
+    """
+    A store whose products are partitioned across worker processes.
+
+    Use it as a context manager, or call close(), to stop the workers. Orders may
+    be placed from several threads; requests to different shards run concurrently.
+    """
+    def __init__(self, list_of_products: list, shards: int = None, start_method: str = None):
+        """
+        Start the shard workers and hand each its products.
+
+        Args:
+            list_of_products (list): The products to sell. They are copied into
+                the workers; use the views returned by the store afterwards.
+            shards (int): The number of worker processes; defaults to the CPU count.
+            start_method (str): The multiprocessing start method; the platform
+                default if not given.
+
+        Raises:
+            TypeError: If list_of_products is not a list of products.
+            ValueError: If shards is not positive or a product or name appears twice.
+        """
+        if not isinstance(list_of_products, list):
+            raise TypeError("list_of_products must be a list.")
+        for item in list_of_products:
+            if not hasattr(item, "buy"):
+                raise TypeError("All items must be product instances.")
+        if shards is None:
+            shards = os.cpu_count() or 1
+        if shards <= 0:
+            raise ValueError("shards must be positive.")
+        names = {product.name for product in list_of_products}
+        ids = {product.product_id for product in list_of_products}
+        if len(names) != len(list_of_products) or len(ids) != len(list_of_products):
+            raise ValueError("The same product or product name appears twice.")
+
+        partitions = [[] for _ in range(shards)]
+        for product in list_of_products:
+            partitions[shard_of(product.name, shards)].append(product)
+        context = multiprocessing.get_context(start_method)
+        views = {}
+        self._counters = []
+        self._connections = []
+        self._processes = []
+        self._shard_locks = [threading.Lock() for _ in range(shards)]
+        for shard, products in enumerate(partitions):
+            counters = context.RawArray("q", 1 + 2 * len(products))
+            counters[0] = sum(product.quantity for product in products)
+            for index, product in enumerate(products):
+                slot = 1 + 2 * index
+                counters[slot] = product.quantity
+                counters[slot + 1] = product.active
+                views[product.product_id] = ShardProductView(self, product, shard, counters, slot)
+            connection, worker_connection = context.Pipe()
+            process = context.Process(target=_serve, daemon=True,
+                                      args=(worker_connection, [encode_product(product)
+                                                                for product in products], counters))
+            process.start()
+            worker_connection.close()
+            self._counters.append(counters)
+            self._connections.append(connection)
+            self._processes.append(process)
+        self._products_by_id = {product.product_id: views[product.product_id]
+                                for product in list_of_products}
+        self._products_by_name = {view.name: view for view in self._products_by_id.values()}
+        self._transactions = count(1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Stop the worker processes. The views keep their last known stock."""
+        for shard, connection in enumerate(self._connections):
+            with self._shard_locks[shard]:
+                if not connection.closed:
+                    try:
+                        connection.send(("stop",))
+                        connection.recv()
+                    except (EOFError, OSError):
+                        pass  # The worker is already gone.
+                    connection.close()
+        for process in self._processes:
+            process.join()
+
+    def _call(self, shard: int, *request):
+        """
+        Send a request to a shard worker and return its result, re-raising its errors.
+
+        Raises:
+            RuntimeError: If the worker has died or its connection is broken.
+        """
+        with self._shard_locks[shard]:
+            connection = self._connections[shard]
+            try:
+                connection.send(request)
+                reply = connection.recv()
+            except (EOFError, OSError) as error:
+                raise RuntimeError(f"Shard {shard} worker is not responding.") from error
+        if reply[0] == "error":
+            raise ERROR_TYPES.get(reply[1], RuntimeError)(reply[2])
+        return reply[1]
+
+    def _abort(self, transaction: int, shards):
+        """Tell shards to release a transaction's holds, skipping workers that have died."""
+        for shard in shards:
+            try:
+                self._call(shard, "abort", transaction)
+            except RuntimeError:
+                pass  # A dead worker's holds went with it.
+
+    @property
+    def shards(self) -> int:
+        """int: The number of shards."""
+        return len(self._connections)
+
+    @property
+    def list_of_products(self) -> ProductList:
+        """ProductList: A read-only snapshot of all products, in the order they were given."""
+        return ProductList(self._products_by_id.values())
+
+    def get_product(self, key) -> ShardProductView:
+        """
+        Look up a product by its name or product id.
+
+        Args:
+            key (str or int): The product's name or its product id.
+
+        Returns:
+            ShardProductView: The matching product.
+
+        Raises:
+            ValueError: If no product in the store matches the key.
+        """
+        index = self._products_by_name if isinstance(key, str) else self._products_by_id
+        try:
+            return index[key]
+        except KeyError:
+            raise ValueError(f"No product matching {key!r} in the store.") from None
+
+    def get_total_quantity(self) -> int:
+        """
+        Return the total quantity of all products, read from shared memory.
+
+        Returns:
+            int: The sum of the quantities of all products.
+        """
+        return sum(counters[0] for counters in self._counters)
+
+    def get_all_products(self) -> list:
+        """
+        Retrieve all active products.
+
+        Returns:
+            list: A list of active ShardProductView instances, in store order.
+        """
+        return [view for view in self._products_by_id.values() if view.active]
+
+    def order(self, shopping_list: list) -> float:
+        """
+        Process an order, committing it atomically across the shards it touches.
+
+        Args:
+            shopping_list (list): A list of (ShardProductView, quantity) tuples.
+
+        Returns:
+            float: The total price for the order.
+
+        Raises:
+            ValueError: If the shopping list is improperly formatted, names a
+                product not in this store, or any product's quantity is insufficient.
+            RuntimeError: If the worker of a shard the order touches has died.
+                Before every shard has prepared, nothing is bought. Prepared
+                holds do not expire, so once every shard has prepared only a
+                worker dying can fail a commit, and the shards committed before
+                it keep their purchase.
+        """
+        if not all(isinstance(item, tuple) and len(item) == 2 for item in shopping_list):
+            raise ValueError("Shopping list must contain tuples of (Product, quantity).")
+        lines_by_shard = {}
+        for product, quantity in shopping_list:
+            if self._products_by_id.get(product.product_id) is not product:
+                raise ValueError(f"Product {product.name} is not in this store.")
+            if quantity <= 0:
+                raise ValueError("Quantity must be positive.")
+            lines_by_shard.setdefault(product.shard, []).append((product.product_id, quantity))
+        if len(lines_by_shard) == 1:
+            (shard, items), = lines_by_shard.items()
+            return self._call(shard, "order", items)
+
+        transaction = next(self._transactions)
+        shards = sorted(lines_by_shard)
+        prepared = []
+        try:
+            for shard in shards:
+                self._call(shard, "prepare", transaction, lines_by_shard[shard])
+                prepared.append(shard)
+        except Exception:
+            self._abort(transaction, prepared)
+            raise
+        total_price = 0.0
+        for index, shard in enumerate(shards):
+            try:
+                total_price += self._call(shard, "commit", transaction)
+            except Exception:
+                self._abort(transaction, shards[index + 1:])
+                raise
+        return total_price
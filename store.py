@@ -1,8 +1,95 @@
-from products import Product
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import namedtuple
+from contextlib import contextmanager
+
+from cart_promotions import CartPromotionEngine, line_price
+from change_events import ADDED, REMOVED, EventBus
+from pricing_cache import PricingCache
+from products import Product, NonStockedProduct, InsufficientStockError, PurchaseLimitError
+from reorder import ReorderIndex
+from reservations import ReservationBook
+from search_index import CatalogIndex, Page
+
+
+class OrderOutcome(namedtuple("OrderOutcome", "total error")):
+    """
+    The outcome of one order placed through Store.order_many.
+
+    Attributes:
+        total (float, int or None): The order's total, or None if it failed.
+        error (Exception or None): Why the order failed, or None if it succeeded.
+    """
+    __slots__ = ()
+
+    @property
+    def ok(self) -> bool:
+        """bool: Whether the order was placed."""
+        return self.error is None
+
+
+class ProductPage(namedtuple("ProductPage", "items next_cursor")):
+    """
+    One page of a product listing from Store.page_products.
+
+    Attributes:
+        items (list): The products on this page, in product id order.
+        next_cursor (int or None): The cursor for the next page, or None if this is the last.
+    """
+    __slots__ = ()
+
+
+class ProductList(list):
+    """
+    The list returned by Store.list_of_products: a snapshot of the store's
+    products that refuses in-place changes.
+
+    Before the store indexed its products, list_of_products was the store's own
+    list, and appending to or removing from it changed the store. Now that it
+    is a copy, such calls would be silently lost, so they raise instead; use
+    Store.add_product() and Store.remove_product(), or list(...) for a list of
+    your own to edit.
+    """
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("list_of_products is read-only; use Store.add_product() "
+                        "or Store.remove_product() to change the store.")
+
+    append = extend = insert = remove = pop = clear = sort = reverse = _read_only
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+
 
 class Store:
     """
     Manages a collection of products in the store.
+
+    Products are kept in a dictionary keyed by their product id, alongside a
+    name index, so looking up or removing a product takes constant time. The
+    store listens to its products' changes to keep the running total quantity
+    and the set of active products up to date without rescanning. A sorted
+    list of the product ids lets page_products() and iter_products() list a
+    large catalog a page at a time.
+
+    Orders are atomic and safe to place from several threads: each order locks
+    the products it touches, in product-id order, and rolls back on failure.
+    With an OrderJournal attached, every order, addition and removal is also
+    logged so the store can be recovered after a crash.
+
+    Subscribers to the store's EventBus (store.events) receive coalesced
+    batches of the products added, removed and changed, instead of rescanning.
+
+    store.reorder_index tracks stock against per-product reorder thresholds,
+    and restock() adds stock to many products at once, reactivating them.
+
+    Checkout flows can hold stock with reserve() and later commit() or
+    release() the hold; held units are unavailable to other orders and holds
+    until then, or until the hold expires.
+
+    Unlike the original list-backed store, list_of_products is a read-only
+    snapshot (see ProductList) rather than the store's own list, and product
+    names must be unique, since they key the name index: Store() and
+    add_product() reject a second product with the same name.
     """
     def __init__(self, list_of_products: list):
         """
@@ -13,13 +100,309 @@ class Store:
 
         Raises:
             TypeError: If list_of_products is not a list or if items are not valid Product instances.
+            ValueError: If the list contains the same product or product name twice.
         """
         if not isinstance(list_of_products, list):
             raise TypeError("list_of_products must be a list.")
         for item in list_of_products:
             if not hasattr(item, "buy"):
                 raise TypeError("All items must be product instances.")
-        self.list_of_products = list_of_products
+        self._products_by_id = {}
+        self._products_by_name = {}
+        self._active_products = {}
+        # Every product id in ascending order, so listings can resume after any id.
+        self._product_ids = []
+        # Set when a product is reactivated, which appends it out of store order.
+        self._active_order_stale = False
+        self._total_quantity = 0
+        # Guards the indexes and counters above against concurrent updates.
+        self._lock = threading.Lock()
+        self._journal = None
+        # Marks the threads applying a logged change, whose product edits the
+        # change's own record already covers.
+        self._journal_scope = threading.local()
+        self.pricing_cache = PricingCache()
+        self.reservations = ReservationBook()
+        self.cart_promotions = CartPromotionEngine()
+        self.events = EventBus()
+        # Built on the first search, then kept up to date like the indexes above.
+        self._search_index = None
+        # Built when first used, like the search index.
+        self._reorder_index = None
+        self._index_products(list_of_products)
+
+    @classmethod
+    def from_trusted(cls, products):
+        """
+        Build a store from products that a bulk loader has already validated.
+
+        The products are indexed in a single pass under one lock, as by
+        __init__ but without its per-item type check. Duplicate ids and names
+        are still rejected.
+
+        Args:
+            products (iterable): The products, consumed lazily, so a generator
+                can stream them in.
+
+        Returns:
+            Store: The new store.
+
+        Raises:
+            ValueError: If the same product or product name appears twice.
+        """
+        store = cls([])
+        store._index_products(products)
+        return store
+
+    @property
+    def list_of_products(self) -> ProductList:
+        """ProductList: A read-only snapshot of all products, in the order they were added."""
+        return ProductList(self._products_by_id.values())
+
+    def _index_product(self, product):
+        """
+        Register a product in the id and name indexes.
+
+        Args:
+            product (Product): The product instance to register.
+
+        Raises:
+            ValueError: If the product or its name is already in the store.
+        """
+        self._index_products((product,))
+
+    def _index_products(self, products):
+        """
+        Register products in the id and name indexes, under one lock.
+
+        Every way of adding products goes through here, so subclasses extend
+        this method to check or track them.
+
+        Args:
+            products (iterable): The product instances, consumed lazily.
+
+        Raises:
+            ValueError: If a product or its name is already in the store. The
+                products before it stay registered.
+        """
+        listener, guard = self._on_product_change, self._guard_edit
+        products_by_id = self._products_by_id
+        products_by_name = self._products_by_name
+        active_products = self._active_products
+        search_index, reorder_index = self._search_index, self._reorder_index
+        added_ids = []
+        added_quantity = 0
+        with self._lock:
+            try:
+                for product in products:
+                    product_id, name = product.product_id, product.name
+                    if product_id in products_by_id:
+                        raise ValueError("Product is already in the store.")
+                    if name in products_by_name:
+                        raise ValueError(f"A product named {name} is already in the store.")
+                    products_by_id[product_id] = product
+                    products_by_name[name] = product
+                    added_ids.append(product_id)
+                    added_quantity += product.quantity
+                    if product.active:
+                        active_products[product_id] = product
+                    if search_index is not None:
+                        search_index.add(product)
+                    if reorder_index is not None:
+                        reorder_index.add(product)
+                    product.add_listener(listener)
+                    product.add_guard(guard)
+            finally:
+                self._total_quantity += added_quantity
+                if len(added_ids) == 1:
+                    insort(self._product_ids, added_ids[0])
+                elif added_ids:
+                    # Sorting merges the new run into the ids in about linear time.
+                    self._product_ids.extend(added_ids)
+                    self._product_ids.sort()
+
+    def _unindex_product(self, product):
+        """
+        Drop a product from the id and name indexes.
+
+        Args:
+            product (Product): The product instance to drop.
+        """
+        product.remove_listener(self._on_product_change)
+        product.remove_guard(self._guard_edit)
+        with self._lock:
+            del self._products_by_id[product.product_id]
+            del self._products_by_name[product.name]
+            del self._product_ids[bisect_left(self._product_ids, product.product_id)]
+            self._active_products.pop(product.product_id, None)
+            self._total_quantity -= product.quantity
+            if self._search_index is not None:
+                self._search_index.remove(product)
+            if self._reorder_index is not None:
+                self._reorder_index.remove(product)
+
+    def _on_product_change(self, product, attribute, old_value, new_value):
+        """
+        Update the store's indexes and counters after a product attribute changes.
+
+        Args:
+            product (Product): The product that changed.
+            attribute (str): The name of the changed attribute.
+            old_value: The attribute's previous value.
+            new_value: The attribute's new value.
+        """
+        with self._lock:
+            if attribute == "quantity":
+                self._total_quantity += new_value - old_value
+            elif attribute == "active":
+                if new_value:
+                    self._active_products[product.product_id] = product
+                    self._active_order_stale = True
+                else:
+                    self._active_products.pop(product.product_id, None)
+            elif attribute == "name":
+                if self._products_by_name.get(old_value) is product:
+                    del self._products_by_name[old_value]
+                self._products_by_name[new_value] = product
+        if attribute in ("price", "promotion"):
+            self.pricing_cache.on_product_change(product, attribute, old_value, new_value)
+        if attribute in ("price", "name") and self._search_index is not None:
+            self._search_index.on_product_change(product, attribute, old_value, new_value)
+        if attribute == "quantity" and self._reorder_index is not None:
+            self._reorder_index.on_product_change(product, attribute, old_value, new_value)
+        if self.events:
+            self.events.on_product_change(product, attribute, old_value, new_value)
+        if self._journal is not None and not getattr(self._journal_scope, "depth", 0):
+            # Only buy() and update_trusted() calls made outside the store get
+            # here; setter edits are logged by _guard_edit() instead.
+            with self._journal.transaction():
+                self._journal.record_update(product, attribute, new_value)
+            self._after_journaled()
+
+    def _guard_edit(self, product, attribute, value, assign):
+        """
+        Apply and log an edit made through a product's setters as one change.
+
+        The edit is logged before the value is assigned, so a value the journal
+        cannot encode leaves the product untouched. Like an order, it runs in a
+        journal transaction with the product locked, so the two are logged in
+        the order they were applied.
+
+        Args:
+            product (Product): The product being edited.
+            attribute (str): The attribute being set.
+            value: The validated new value.
+            assign (callable): Stores the value.
+        """
+        if self._journal is None or getattr(self._journal_scope, "depth", 0):
+            assign(value)
+            return
+        with self._journaled(), product.lock:
+            self._journal.record_update(product, attribute, value)
+            assign(value)
+        self._after_journaled()
+
+    @property
+    def search_index(self) -> CatalogIndex:
+        """CatalogIndex: The name and price search index, built on first use."""
+        if self._search_index is None:
+            self.list_of_products  # Lets stores that load lazily load everything first.
+            with self._lock:
+                if self._search_index is None:
+                    self._search_index = CatalogIndex(self._products_by_id.values())
+        return self._search_index
+
+    @property
+    def reorder_index(self) -> ReorderIndex:
+        """ReorderIndex: Reorder thresholds and low-stock queries, built on first use."""
+        if self._reorder_index is None:
+            self.list_of_products  # Lets stores that load lazily load everything first.
+            with self._lock:
+                if self._reorder_index is None:
+                    self._reorder_index = ReorderIndex(self._products_by_id.values())
+        return self._reorder_index
+
+    def search_by_prefix(self, prefix: str, offset: int = 0, limit: int = 20,
+                         active_only: bool = True) -> Page:
+        """
+        Find products whose name starts with a prefix, ignoring case, in name order.
+
+        Args:
+            prefix (str): The start of the name.
+            offset (int): How many matches to skip, for the following pages.
+            limit (int): The most products to return.
+            active_only (bool): Leave out inactive products.
+
+        Returns:
+            Page: The matching products and the offset of the next page.
+        """
+        return self.search_index.by_prefix(prefix, offset, limit, active_only)
+
+    def search_by_substring(self, text: str, offset: int = 0, limit: int = 20,
+                            active_only: bool = True) -> Page:
+        """
+        Find products whose name contains a text, ignoring case, in name order.
+
+        Args:
+            text (str): The text to look for.
+            offset (int): How many matches to skip, for the following pages.
+            limit (int): The most products to return.
+            active_only (bool): Leave out inactive products.
+
+        Returns:
+            Page: The matching products and the offset of the next page.
+        """
+        return self.search_index.by_substring(text, offset, limit, active_only)
+
+    def search_by_price(self, low: float, high: float, offset: int = 0, limit: int = 20,
+                        active_only: bool = True) -> Page:
+        """
+        Find products priced between low and high inclusive, cheapest first.
+
+        Args:
+            low (float): The lowest price.
+            high (float): The highest price.
+            offset (int): How many matches to skip, for the following pages.
+            limit (int): The most products to return.
+            active_only (bool): Leave out inactive products.
+
+        Returns:
+            Page: The matching products and the offset of the next page.
+        """
+        return self.search_index.by_price(low, high, offset, limit, active_only)
+
+    def attach_journal(self, journal):
+        """
+        Log every later order, addition, removal, restock and product edit to a journal.
+
+        Args:
+            journal (OrderJournal or None): The journal to write to, or None to stop logging.
+        """
+        self._journal = journal
+
+    @contextmanager
+    def _journaled(self):
+        """
+        Run a logged change inside a journal transaction, if there is a journal.
+
+        The product edits the change makes meanwhile are not logged on their
+        own, since replaying the change's record repeats them.
+        """
+        if self._journal is None:
+            yield
+            return
+        scope = self._journal_scope
+        with self._journal.transaction():
+            scope.depth = getattr(scope, "depth", 0) + 1
+            try:
+                yield
+            finally:
+                scope.depth -= 1
+
+    def _after_journaled(self):
+        """Give the journal a chance to compact after a logged change."""
+        if self._journal is not None:
+            self._journal.maybe_compact(self)
 
     def add_product(self, product):
         """
@@ -29,13 +412,33 @@ class Store:
             product (Product): The product instance to add.
 
         Raises:
-            ValueError: If the product is None or falsy.
+            ValueError: If the product is None or falsy, or already in the store.
         """
         if not product:
             raise ValueError("Product should not be empty.")
-        self.list_of_products.append(product)
+        with self._journaled():
+            self._index_product(product)
+            if self._journal is not None:
+                try:
+                    self._journal.record_add(product)
+                except Exception:
+                    self._unindex_product(product)
+                    raise
+        self._after_journaled()
+        if self.events:
+            self.events.publish(ADDED, product)
         print(f"Added {product.show()} to the store.")
 
+    def _remove(self, product):
+        """Drop a product from the store and log the removal."""
+        with self._journaled():
+            self._unindex_product(product)
+            if self._journal is not None:
+                self._journal.record_remove(product)
+        self._after_journaled()
+        if self.events:
+            self.events.publish(REMOVED, product)
+
     def remove_product(self, product):
         """
         Remove a product from the store.
@@ -48,55 +451,545 @@ class Store:
         """
         if not product:
             raise ValueError("Product should not be empty.")
-        if product in self.list_of_products:
-            self.list_of_products.remove(product)
-        else:
+        if self._products_by_id.get(product.product_id) is not product:
             raise ValueError("Product not found in the store.")
+        self._remove(product)
+
+    def get_product(self, key):
+        """
+        Look up a product by its name or product id.
+
+        Args:
+            key (str or int): The product's name or its product id.
+
+        Returns:
+            Product: The matching product.
+
+        Raises:
+            ValueError: If no product in the store matches the key.
+        """
+        if isinstance(key, str):
+            product = self._products_by_name.get(key)
+        else:
+            product = self._products_by_id.get(key)
+        if product is None:
+            raise ValueError(f"Product {key} not found in the store.")
+        return product
+
+    def remove_by_key(self, key):
+        """
+        Remove a product identified by its name or product id.
+
+        Args:
+            key (str or int): The product's name or its product id.
+
+        Returns:
+            Product: The removed product.
+
+        Raises:
+            ValueError: If no product in the store matches the key.
+        """
+        product = self.get_product(key)
+        self._remove(product)
+        return product
 
     def get_total_quantity(self) -> int:
         """
-        Calculate the total quantity of all products in the store.
+        Return the total quantity of all products in the store.
+
+        The total is maintained incrementally as product quantities change.
 
         Returns:
             int: The sum of the quantities of all products.
         """
-        return sum(product.quantity for product in self.list_of_products)
+        return self._total_quantity
 
     def get_all_products(self) -> list:
         """
         Retrieve all active products from the store.
 
         Returns:
-            list: A list of active Product instances.
+            list: A list of active Product instances, in store order.
         """
-        return [product for product in self.list_of_products if product.active]
+        with self._lock:
+            if self._active_order_stale:
+                self._active_products = {
+                    product_id: product
+                    for product_id, product in self._products_by_id.items()
+                    if product.active
+                }
+                self._active_order_stale = False
+            return list(self._active_products.values())
 
-    def order(self, shopping_list: list) -> float:
+    def page_products(self, after: int = None, limit: int = 20,
+                      active_only: bool = True) -> ProductPage:
         """
-        Process an order based on the provided shopping list.
+        Return one page of the store's products in product id order.
+
+        The cursor is the id of the last product listed, so pages stay stable
+        while products are added, removed or sold out between requests: no
+        product is listed twice, and none present throughout is skipped. The
+        cursor is None once no listable product follows the page.
 
         Args:
-            shopping_list (list): A list of tuples, where each tuple contains a Product and the quantity to purchase.
+            after (int or None): The cursor returned with the previous page, or
+                None for the first page.
+            limit (int): The most products to return.
+            active_only (bool): Leave out inactive products.
 
         Returns:
-            float: The total price for the order.
+            ProductPage: The products and the cursor for the next page.
 
         Raises:
-            ValueError: If the shopping list is improperly formatted or if any product's quantity is insufficient.
+            ValueError: If limit is not positive.
+        """
+        if limit <= 0:
+            raise ValueError("limit must be positive.")
+        with self._lock:
+            product_ids = self._product_ids
+            products = self._products_by_id
+            position = 0 if after is None else bisect_right(product_ids, after)
+            items = []
+            while position < len(product_ids) and len(items) < limit:
+                product = products[product_ids[position]]
+                position += 1
+                if product.active or not active_only:
+                    items.append(product)
+            # Look past the page for a product the next page would list, so the
+            # last page has no cursor even when only inactive products follow it.
+            more = False
+            while position < len(product_ids):
+                product = products[product_ids[position]]
+                position += 1
+                if product.active or not active_only:
+                    more = True
+                    break
+        return ProductPage(items, items[-1].product_id if more else None)
+
+    def iter_products(self, page_size: int = 100, active_only: bool = True):
+        """
+        Yield the store's products in product id order, one page at a time.
+
+        Only one page is held at once and the store is not locked between
+        pages, so listing a large catalog starts at once and uses constant memory.
+
+        Args:
+            page_size (int): How many products to fetch per page.
+            active_only (bool): Leave out inactive products.
+
+        Yields:
+            Product: Each product in turn.
+        """
+        after = None
+        while True:
+            page = self.page_products(after, page_size, active_only)
+            yield from page.items
+            if page.next_cursor is None:
+                return
+            after = page.next_cursor
+
+    def _collect_demand(self, shopping_list: list) -> dict:
+        """
+        Check a shopping list's shape and total the quantity requested per product.
+
+        Args:
+            shopping_list (list): A list of (Product, quantity) tuples.
+
+        Returns:
+            dict: Product id -> (Product, total quantity requested).
+
+        Raises:
+            ValueError: If the list is improperly formatted or a quantity is not positive.
         """
         if not all(isinstance(item, tuple) and len(item) == 2 for item in shopping_list):
             raise ValueError("Shopping list must contain tuples of (Product, quantity).")
-        total_price = 0.0
-        # Validate each item before processing the order.
+        demand = {}
         for product, quantity in shopping_list:
             if quantity <= 0:
                 raise ValueError("Quantity must be positive.")
-            if quantity > product.quantity:
-                raise ValueError(
+            requested = demand.get(product.product_id, (product, 0))[1] + quantity
+            demand[product.product_id] = (product, requested)
+        return demand
+
+    @staticmethod
+    def _check_limits(shopping_list: list):
+        """
+        Check every line against its product's per-order maximum, if it has one.
+
+        Raises:
+            PurchaseLimitError: If a line exceeds its product's maximum.
+        """
+        for product, quantity in shopping_list:
+            maximum = getattr(product, "maximum", None)
+            if maximum is not None and quantity > maximum:
+                raise PurchaseLimitError(f"Quantity {quantity} exceeds the limit of {maximum}.")
+
+    def preview_order(self, shopping_list: list, cents: bool = False, cached: bool = False):
+        """
+        Price a shopping list as order() would, without buying anything.
+
+        Stock and per-order limits are checked against the current stock.
+
+        Args:
+            shopping_list (list): A list of (Product, quantity) tuples.
+            cents (bool): Return the total in exact integer cents instead of a float.
+            cached (bool): Take float promotional prices from the store's pricing
+                cache, which pays off when promotions are costly to evaluate.
+
+        Returns:
+            float or int: The total price the order would cost now.
+
+        Raises:
+            ValueError: If the list is improperly formatted or the order would fail.
+        """
+        demand = self._collect_demand(shopping_list)
+        self._validate_demand(demand)
+        if self.reservations:
+            self.reservations.check(demand)
+        self._check_limits(shopping_list)
+        if cents:
+            priced_lines = [(product, quantity, product.line_price(quantity, True))
+                            for product, quantity in shopping_list]
+            if self.cart_promotions:
+                return self.cart_promotions.price_lines(priced_lines, True).total
+            return sum(total for _, _, total in priced_lines)
+        price = self.pricing_cache.price if cached else line_price
+        if self.cart_promotions:
+            return self.cart_promotions.price(shopping_list, price).total
+        total_price = 0.0
+        for product, quantity in shopping_list:
+            total_price += price(product, quantity)
+        return total_price
+
+    def order(self, shopping_list: list, cents: bool = False):
+        """
+        Process an order based on the provided shopping list.
+
+        The order is all-or-nothing. The products involved are locked in
+        product-id order, so concurrent orders cannot deadlock and orders for
+        unrelated products never wait on each other. Stock is validated against
+        the combined demand per product while the locks are held, and if a
+        purchase still fails every product already bought is restored. Rules in
+        the store's cart_promotions engine are applied to the lines bought,
+        before the locks are released.
+
+        With cents=True the lines are priced and summed in exact integer cents
+        (see money.py), so large carts and long replays do not drift.
+
+        Args:
+            shopping_list (list): A list of tuples, where each tuple contains a Product and the quantity to purchase.
+            cents (bool): Return the total in exact integer cents instead of a float.
+
+        Returns:
+            float or int: The total price for the order.
+
+        Raises:
+            ValueError: If the shopping list is improperly formatted or if any product's quantity is insufficient.
+        """
+        demand = self._collect_demand(shopping_list)
+        # Locked inline rather than through _locked(): this is the hottest path.
+        locked = [demand[product_id][0] for product_id in sorted(demand)]
+        with self._journaled():
+            for product in locked:
+                product.lock.acquire()
+            try:
+                # Validate each item before processing the order.
+                self._validate_demand(demand)
+                if self.reservations:
+                    self.reservations.check(demand)
+                total_price = self._apply_order(shopping_list, locked, cents)
+                if self._journal is not None:
+                    self._journal.record_order(shopping_list)
+            finally:
+                for product in reversed(locked):
+                    product.lock.release()
+        self._after_journaled()
+        return total_price
+
+    def order_many(self, orders: list, atomic: bool = True, cents: bool = False) -> list:
+        """
+        Place many orders at once, validating and buying them in a single pass.
+
+        Demand is combined per product across the batch and every product
+        involved is locked once. Stock is then checked once and each product's
+        quantity is decremented once, however many orders mention it. Each
+        line is still priced as buy() would price it, before any stock is
+        taken, so an order whose pricing fails leaves the stock as it was.
+
+        Args:
+            orders (list): Shopping lists, each a list of (Product, quantity) tuples.
+            atomic (bool): If True, either every order is placed or none is and the
+                first error is raised. If False, orders are accepted in turn while
+                stock lasts and the others are reported as failed.
+            cents (bool): Return totals in exact integer cents instead of floats.
+
+        Returns:
+            list: One OrderOutcome per order, in order.
+
+        Raises:
+            ValueError: In atomic mode, if any order is malformed or cannot be filled.
+                In atomic mode an error pricing an order is raised too; otherwise
+                that order is reported as failed.
+        """
+        outcomes = [None] * len(orders)
+        parsed = []
+        for index, shopping_list in enumerate(orders):
+            try:
+                demand = self._collect_demand(shopping_list)
+                self._check_limits(shopping_list)
+            except ValueError as error:
+                if atomic:
+                    raise
+                outcomes[index] = OrderOutcome(None, error)
+                continue
+            parsed.append((index, shopping_list, demand))
+        combined = self._combine_demand(entry[2] for entry in parsed)
+
+        with self._journaled(), self._locked(combined):
+            if atomic:
+                self._validate_demand(combined)
+                if self.reservations:
+                    self.reservations.check(combined)
+                accepted = parsed
+            else:
+                accepted, combined = [], {}
+                for index, shopping_list, demand in parsed:
+                    # Check this order's products on top of the orders accepted before it.
+                    candidate = {product_id: (product, requested + combined.get(product_id,
+                                                                                (None, 0))[1])
+                                 for product_id, (product, requested) in demand.items()}
+                    try:
+                        self._validate_demand(candidate)
+                        if self.reservations:
+                            self.reservations.check(candidate)
+                    except ValueError as error:
+                        outcomes[index] = OrderOutcome(None, error)
+                        continue
+                    accepted.append((index, shopping_list, demand))
+                    combined.update(candidate)
+            cart_rules = bool(self.cart_promotions)
+            priced = []
+            for index, shopping_list, demand in accepted:
+                try:
+                    if cart_rules:
+                        total_price = self._cart_total(
+                            [(product, quantity, product.line_price(quantity, cents))
+                             for product, quantity in shopping_list], cents)
+                    else:
+                        total_price = 0 if cents else 0.0
+                        for product, quantity in shopping_list:
+                            total_price += product.line_price(quantity, cents)
+                except Exception as error:
+                    if atomic:
+                        raise
+                    outcomes[index] = OrderOutcome(None, error)
+                    continue
+                priced.append((index, shopping_list, demand, total_price))
+            if len(priced) < len(accepted):
+                combined = self._combine_demand(entry[2] for entry in priced)
+            for product, requested in combined.values():
+                if not isinstance(product, NonStockedProduct):
+                    product.update_trusted(quantity=product.quantity - requested)
+            for index, shopping_list, _, total_price in priced:
+                outcomes[index] = OrderOutcome(total_price, None)
+                if self._journal is not None:
+                    self._journal.record_order(shopping_list)
+        self._after_journaled()
+        return outcomes
+
+    @staticmethod
+    def _combine_demand(demands) -> dict:
+        """Add up several demand dictionaries (product id -> (Product, quantity))."""
+        combined = {}
+        for demand in demands:
+            for product_id, (product, requested) in demand.items():
+                previous = combined.get(product_id)
+                combined[product_id] = (product, requested if previous is None
+                                        else previous[1] + requested)
+        return combined
+
+    def _cart_total(self, priced_lines: list, cents: bool):
+        """Apply the cart rules to (product, quantity, line total) tuples, in cents if asked."""
+        return self.cart_promotions.price_lines(priced_lines, cents).total
+
+    @staticmethod
+    @contextmanager
+    def _locked(demand: dict):
+        """
+        Context manager holding the locks of the products in a demand, taken in product-id order.
+
+        Yields:
+            list: The distinct products, in the order they were locked.
+        """
+        locked = [demand[product_id][0] for product_id in sorted(demand)]
+        for product in locked:
+            product.lock.acquire()
+        try:
+            yield locked
+        finally:
+            for product in reversed(locked):
+                product.lock.release()
+
+    def restock(self, items: list, activate: bool = True):
+        """
+        Add stock to several products at once.
+
+        Args:
+            items (list): A list of (Product, quantity to add) tuples.
+            activate (bool): Reactivate the restocked products, including those
+                deactivated by selling out.
+
+        Raises:
+            TypeError: If a quantity is not an integer.
+            ValueError: If the list is improperly formatted, a quantity is not
+                positive, or a product is non-stocked or not in this store.
+        """
+        demand = self._collect_demand(items)
+        for product, quantity in items:
+            if not isinstance(quantity, int):
+                raise TypeError("Quantity must be an integer.")
+        for product_id, (product, _) in demand.items():
+            if self._products_by_id.get(product_id) is not product:
+                raise ValueError(f"Product {product.name} is not in this store.")
+            if isinstance(product, NonStockedProduct):
+                raise ValueError(f"Product {product.name} is not stocked.")
+        with self._journaled(), self._locked(demand):
+            for product, added in demand.values():
+                product.update_trusted(quantity=product.quantity + added,
+                                       active=True if activate else None)
+            if self._journal is not None:
+                self._journal.record_restock(items, activate)
+        self._after_journaled()
+
+    def get_available_quantity(self, product) -> int:
+        """
+        Return how many units of a product new orders and holds can take.
+
+        Args:
+            product (Product): The product to check.
+
+        Returns:
+            int: The product's quantity minus the units held by outstanding holds.
+        """
+        return product.quantity - self.reservations.held(product.product_id)
+
+    def reserve(self, shopping_list: list, ttl: float) -> int:
+        """
+        Hold stock for a shopping list without buying it.
+
+        The held units are unavailable to other orders and holds until the hold
+        is committed, released, or expires after ttl seconds.
+
+        Args:
+            shopping_list (list): A list of (Product, quantity) tuples.
+            ttl (float): Seconds the hold lasts if it is neither committed nor
+                released; math.inf for a hold that never expires.
+
+        Returns:
+            int: The hold id to pass to commit() or release().
+
+        Raises:
+            ValueError: If the list is improperly formatted, ttl is not positive,
+                or any product lacks unheld stock or exceeds its per-order limit.
+        """
+        if ttl <= 0:
+            raise ValueError("ttl must be positive.")
+        demand = self._collect_demand(shopping_list)
+        self._check_limits(shopping_list)
+        with self._locked(demand):
+            self._validate_demand(demand)
+            self.reservations.check(demand)
+            return self.reservations.add(shopping_list, demand, ttl).hold_id
+
+    def commit(self, hold_id: int, cents: bool = False):
+        """
+        Buy the stock held by a hold.
+
+        Args:
+            hold_id (int): The id returned by reserve().
+            cents (bool): Return the total in exact integer cents instead of a float.
+
+        Returns:
+            float or int: The total price for the order.
+
+        Raises:
+            ValueError: If the hold is unknown, already finished or expired, or the
+                purchase fails; the hold is then kept until it is released or expires.
+        """
+        hold = self.reservations.find(hold_id)
+        if hold is None:
+            raise ValueError(f"Hold {hold_id} is unknown, finished or expired.")
+        with self._journaled(), self._locked(hold.demand) as locked:
+            # Check again under the locks, which serialize commits of the same hold.
+            if self.reservations.find(hold_id) is None:
+                raise ValueError(f"Hold {hold_id} is unknown, finished or expired.")
+            total_price = self._apply_order(hold.shopping_list, locked, cents)
+            # Only a successful purchase uses up the hold; after a failure it stays outstanding.
+            self.reservations.pop(hold_id)
+            if self._journal is not None:
+                self._journal.record_order(hold.shopping_list)
+        self._after_journaled()
+        return total_price
+
+    def release(self, hold_id: int) -> bool:
+        """
+        Cancel a hold, making its stock available again.
+
+        Args:
+            hold_id (int): The id returned by reserve().
+
+        Returns:
+            bool: True if the hold was outstanding, False if it had already
+                been committed, released or had expired.
+        """
+        return self.reservations.pop(hold_id) is not None
+
+    @staticmethod
+    def _validate_demand(demand: dict):
+        """
+        Check that every product has enough stock for its combined demand.
+
+        Args:
+            demand (dict): Product id -> (Product, total quantity requested).
+
+        Raises:
+            InsufficientStockError: If a stocked product has too few units.
+        """
+        for product, requested in demand.values():
+            if not isinstance(product, NonStockedProduct) and requested > product.quantity:
+                raise InsufficientStockError(
                     f"Not enough quantity for product {product.name}. "
-                    f"Requested: {quantity}, Available: {product.quantity}"
+                    f"Requested: {requested}, Available: {product.quantity}"
                 )
-        # Process the order.
-        for product, quantity in shopping_list:
-            total_price += product.buy(quantity)
+
+    def _apply_order(self, shopping_list: list, products: list, cents: bool = False):
+        """
+        Buy every line of a validated order, undoing all of it if one purchase fails.
+
+        Args:
+            shopping_list (list): The (Product, quantity) tuples to buy.
+            products (list): The distinct products in the order, already locked.
+            cents (bool): Sum the lines in integer cents instead of floats.
+
+        Returns:
+            float or int: The total price for the order, after any cart rules.
+        """
+        saved = [(product, product.quantity, product.active) for product in products]
+        total_price = 0 if cents else 0.0
+        try:
+            if self.cart_promotions:
+                total_price = self._cart_total(
+                    [(product, quantity, product.buy(quantity, cents))
+                     for product, quantity in shopping_list], cents)
+            elif cents:
+                for product, quantity in shopping_list:
+                    total_price += product.buy(quantity, True)
+            else:
+                for product, quantity in shopping_list:
+                    total_price += product.buy(quantity)
+        except Exception:
+            for product, quantity, active in saved:
+                product.quantity = quantity
+                product.active = active
+            raise
         return total_price
\ No newline at end of file
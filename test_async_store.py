@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import unittest
+from async_store import AsyncStore
+from products import Product
+from store import Store
+
+
+class TestAsyncStore(unittest.TestCase):
+    """Test cases for the asyncio order front end."""
+
+    def setUp(self):
+        self.pixel = Product("Google Pixel 7", 500, 100)
+        self.store = Store([self.pixel])
+
+    def test_concurrent_orders_are_applied(self):
+        """Test that many concurrent order coroutines all go through with a tiny queue."""
+        async def scenario():
+            async with AsyncStore(self.store, max_pending=4, max_batch=3) as async_store:
+                return await asyncio.gather(
+                    *(async_store.order([(self.pixel, 2)]) for _ in range(50)))
+
+        totals = asyncio.run(scenario())
+        self.assertEqual(totals, [1000] * 50)
+        self.assertEqual(self.pixel.quantity, 0)
+
+    def test_rejected_order_raises(self):
+        """Test that an order Store.order rejects raises in the calling coroutine."""
+        async def scenario():
+            async with AsyncStore(self.store) as async_store:
+                await async_store.order([(self.pixel, 101)])
+
+        with self.assertRaises(ValueError):
+            asyncio.run(scenario())
+        self.assertEqual(self.pixel.quantity, 100)
+
+    def test_unexpected_error_fails_only_its_order(self):
+        """Test that an order raising something other than ValueError does not stop the worker."""
+        async def scenario():
+            async with AsyncStore(self.store) as async_store:
+                with self.assertRaises(AttributeError):
+                    await asyncio.wait_for(async_store.order([("foo", 1)]), 5)
+                return await asyncio.wait_for(async_store.order([(self.pixel, 1)]), 5)
+
+        self.assertEqual(asyncio.run(scenario()), 500)
+
+    def test_worker_failure_fails_waiting_orders(self):
+        """Test that if the worker dies, waiting and later orders fail instead of hanging."""
+        class BrokenExecutor:
+            def submit(self, *args):
+                raise RuntimeError("executor is shut down")
+
+        async def scenario():
+            async_store = AsyncStore(self.store, executor=BrokenExecutor())
+            await async_store.start()
+            results = await asyncio.wait_for(asyncio.gather(
+                *(async_store.order([(self.pixel, 1)]) for _ in range(3)),
+                return_exceptions=True), 5)
+            with self.assertRaises(RuntimeError):
+                await async_store.order([(self.pixel, 1)])
+            await asyncio.wait_for(async_store.close(), 5)
+            return results
+
+        results = asyncio.run(scenario())
+        self.assertEqual([str(result) for result in results], ["executor is shut down"] * 3)
+        self.assertEqual(self.pixel.quantity, 100)
+
+    def test_batches_run_off_the_loop_unless_inline(self):
+        """Test that batches run on an executor thread by default and inline on request."""
+        threads = []
+        order = self.store.order
+
+        def recording_order(shopping_list):
+            threads.append(threading.current_thread())
+            return order(shopping_list)
+
+        async def scenario(inline):
+            async with AsyncStore(self.store, inline=inline) as async_store:
+                await async_store.order([(self.pixel, 1)])
+
+        self.store.order = recording_order
+        asyncio.run(scenario(False))
+        asyncio.run(scenario(True))
+        self.assertIsNot(threads[0], threading.main_thread())
+        self.assertIs(threads[1], threading.main_thread())
+
+    def test_orders_queued_behind_close_are_applied(self):
+        """Test that orders still waiting for queue room when close() is called complete."""
+        async def scenario():
+            async_store = AsyncStore(self.store, max_pending=2, max_batch=4)
+            await async_store.start()
+            orders = [asyncio.ensure_future(async_store.order([(self.pixel, 1)]))
+                      for _ in range(6)]
+            await asyncio.sleep(0)
+            await asyncio.wait_for(async_store.close(), 5)
+            return await asyncio.wait_for(asyncio.gather(*orders), 5)
+
+        self.assertEqual(asyncio.run(scenario()), [500] * 6)
+        self.assertEqual(self.pixel.quantity, 94)
+
+    def test_order_requires_start(self):
+        """Test that ordering before start() raises an exception."""
+        with self.assertRaises(RuntimeError):
+            asyncio.run(AsyncStore(self.store).order([(self.pixel, 1)]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+from cart_promotions import (Bundle, Cart, CartLine, CartPercentDiscount, CartPromotionEngine,
+                             SpendAndSave)
+from products import Product
+from promotions import ThirdOneFree
+from store import Store
+
+
+class TestCartPromotionEngine(unittest.TestCase):
+    """Test cases for pricing carts against cart rules."""
+
+    def setUp(self):
+        self.laptop = Product("MacBook Air M2", 1000, 100)
+        self.mouse = Product("Magic Mouse", 50, 100)
+        self.cable = Product("USB-C Cable", 10, 100)
+        self.cable.promotion = ThirdOneFree()
+
+    def test_no_rules_matches_line_prices(self):
+        """Test that an empty engine prices lines as buy() does."""
+        price = CartPromotionEngine().price([(self.laptop, 1), (self.cable, 3)])
+        self.assertEqual((price.total, price.subtotal, price.discounts), (1020, 1020, ()))
+
+    def test_percent_rules_stack(self):
+        """Test that percentages stack on the product promotion and on each other."""
+        engine = CartPromotionEngine([CartPercentDiscount(10, [self.cable]),
+                                      CartPercentDiscount(50)])
+        price = engine.price([(self.cable, 3), (self.mouse, 1)])
+        self.assertAlmostEqual(price.total, 20 * 0.9 * 0.5 + 50 * 0.5)
+        self.assertEqual([name for name, _ in price.discounts], ["10% Off", "50% Off"])
+
+    def test_bundle_prices_complete_sets(self):
+        """Test that only complete sets get the bundle price."""
+        engine = CartPromotionEngine([Bundle([self.laptop, self.mouse, self.mouse], 1050)])
+        self.assertEqual(engine.price([(self.laptop, 2), (self.mouse, 3)]).total, 1050 + 1000 + 50)
+        self.assertEqual(engine.price([(self.laptop, 1), (self.mouse, 1)]).total, 1050)
+
+    def test_bundles_do_not_share_units(self):
+        """Test that overlapping and duplicate bundles each discount different units."""
+        a, b, c = Product("A", 100, 10), Product("B", 100, 10), Product("C", 100, 10)
+        duplicates = CartPromotionEngine([Bundle([a, b], 50), Bundle([a, b], 50)])
+        self.assertEqual(duplicates.price([(a, 1), (b, 1)]).total, 50)
+        self.assertEqual(duplicates.price([(a, 2), (b, 2)]).total, 100)
+        overlapping = CartPromotionEngine([Bundle([a, b], 50), Bundle([a, c], 50)])
+        price = overlapping.price([(a, 1), (b, 1), (c, 1)])
+        self.assertEqual((price.total, price.discounts), (150, (("Bundle", 150),)))
+        self.assertEqual(overlapping.price([(a, 2), (b, 1), (c, 1)]).total, 100)
+        store = Store([a, b])
+        store.cart_promotions.add_rule(Bundle([a, b], 50))
+        store.cart_promotions.add_rule(Bundle([a, b], 50))
+        self.assertEqual(store.order([(a, 1), (b, 1)]), 50)
+
+    def test_total_is_never_negative(self):
+        """Test that the cart total is clamped at 0 whatever the rules save."""
+        class Giveaway(SpendAndSave):
+            def apply_to_cart(self, cart):
+                return 10_000
+
+        price = CartPromotionEngine([Giveaway(0, 0)]).price([(self.mouse, 1)])
+        self.assertEqual((price.total, price.subtotal), (0, 50))
+
+    def test_spend_threshold_applies_after_other_rules(self):
+        """Test that the spend threshold sees the cart after percentages and bundles."""
+        engine = CartPromotionEngine([SpendAndSave(1000, 100), CartPercentDiscount(10)])
+        self.assertAlmostEqual(engine.price([(self.laptop, 1)]).total, 900)
+        self.assertAlmostEqual(engine.price([(self.laptop, 1), (self.mouse, 2)]).total, 990)
+
+    def test_only_applicable_rules_are_evaluated(self):
+        """Test that rules about products outside the cart are never considered."""
+        others = [Product(f"Other {i}", 1, 1) for i in range(100)]
+        engine = CartPromotionEngine([Bundle([other], 0) for other in others])
+        engine.add_rule(CartPercentDiscount(10, [self.mouse]))
+        cart = Cart()
+        cart.lines[self.mouse.product_id] = CartLine(self.mouse, 1, 50)
+        self.assertEqual(len(engine._applicable(cart)), 1)
+
+    def test_rules_can_be_added_and_removed(self):
+        """Test that the plan follows rule changes."""
+        rule = CartPercentDiscount(20, [self.laptop])
+        engine = CartPromotionEngine([rule])
+        self.assertEqual(engine.price([(self.laptop, 1)]).total, 800)
+        engine.remove_rule(rule)
+        self.assertEqual(engine.price([(self.laptop, 1)]).total, 1000)
+        with self.assertRaises(ValueError):
+            engine.remove_rule(rule)
+        with self.assertRaises(TypeError):
+            engine.add_rule(ThirdOneFree())
+
+    def test_store_orders_apply_cart_rules(self):
+        """Test that Store.order and preview_order charge the cart price."""
+        store = Store([self.laptop, self.mouse])
+        store.cart_promotions.add_rule(Bundle([self.laptop, self.mouse], 1000))
+        cart = [(self.laptop, 1), (self.mouse, 1)]
+        self.assertEqual(store.preview_order(cart), 1000)
+        self.assertEqual(store.order(cart), 1000)
+        self.assertEqual(self.mouse.quantity, 99)
+
+    def test_store_prices_each_line_once(self):
+        """Test that orders apply the cart rules to the totals the purchases returned."""
+        calls = []
+
+        class Counted(ThirdOneFree):
+            def apply_promotion(self, product, quantity):
+                calls.append(product.price)
+                total = super().apply_promotion(product, quantity)
+                if len(calls) == 1:
+                    product.price = 1  # A price change racing the order.
+                return total
+
+        self.cable.promotion = Counted()
+        store = Store([self.cable, self.mouse])
+        store.cart_promotions.add_rule(CartPercentDiscount(50, [self.mouse]))
+        self.assertEqual(store.order([(self.cable, 3), (self.mouse, 2)]), 20 + 50)
+        self.assertEqual(calls, [10])
+        self.assertEqual([outcome.total for outcome in
+                          store.order_many([[(self.cable, 3)], [(self.mouse, 1)]])], [2, 25])
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
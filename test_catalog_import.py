@@ -0,0 +1,148 @@
+import gc
+import io
+import os
+import tempfile
+import unittest
+from catalog_import import CatalogImportError, load_catalog, read_catalog
+from products import Product, NonStockedProduct, LimitedProduct
+from store import Store
+
+CATALOG_CSV = """name,price,quantity,kind,maximum
+MacBook Air M2,1450,100,,
+Unlimited Warranty,100,,non_stocked,
+Exclusive Sneakers,150.5,50,limited,2
+"""
+
+
+class TestCatalogImport(unittest.TestCase):
+    """Test cases for bulk catalog import."""
+
+    def test_csv_builds_every_kind(self):
+        """Test that a CSV catalog becomes a store with the right products, in order."""
+        store = read_catalog(io.StringIO(CATALOG_CSV))
+        products = store.list_of_products
+        self.assertEqual([type(p) for p in products],
+                         [Product, NonStockedProduct, LimitedProduct])
+        self.assertEqual([p.show() for p in products],
+                         ["MacBook Air M2, Price: 1450, Quantity: 100",
+                          "Unlimited Warranty, Price: 100, Non-stocked product",
+                          "Exclusive Sneakers, Price: 150.5, Quantity: 50, Limited to 2 per order."])
+        self.assertEqual(store.get_total_quantity(), 150)
+        whole = read_catalog(io.StringIO("name,price,quantity\nPixel,500,250\n"))
+        self.assertEqual(whole.get_product("Pixel").show(), "Pixel, Price: 500, Quantity: 250")
+        self.assertEqual(store.order([(products[0], 2), (products[2], 2)]), 2900 + 301)
+
+    def test_csv_prices_are_parsed_one_by_one(self):
+        """Test that a whole price stays an int next to floats, whatever the chunk size."""
+        catalog = "name,price,quantity\nA,1450,1\nB,150.5,1\nC,2.0,1\nD,1e3,1\n"
+        for chunk_size in (1, 2, 10):
+            store = read_catalog(io.StringIO(catalog), chunk_size=chunk_size)
+            prices = [product.price for product in store.list_of_products]
+            self.assertEqual(prices, [1450, 150.5, 2.0, 1000.0])
+            self.assertEqual([type(price) for price in prices], [int, float, float, float])
+
+    def test_json_formats(self):
+        """Test that JSON Lines and JSON array catalogs load like CSV."""
+        lines = ('{"name": "Pixel", "price": 500, "quantity": 250}\n\n'
+                 '{"name": "Sneakers", "price": 150, "quantity": 5, "kind": "limited", '
+                 '"maximum": 1}\n')
+        store = read_catalog(io.StringIO(lines), "jsonl")
+        self.assertEqual(store.get_product("Sneakers").maximum, 1)
+        store = read_catalog(io.StringIO('[{"name": "Pixel", "price": 9.5, "quantity": 2}]'),
+                             "json")
+        self.assertEqual(store.get_product("Pixel").price, 9.5)
+
+    def test_every_bad_row_is_reported(self):
+        """Test that all invalid rows are reported together and no store is built."""
+        catalog = ("name,price,quantity,kind,maximum\n"
+                   ",1,1,,\n"
+                   "A,-1,x,,\n"
+                   "B,1,1,limited,0\n"
+                   "C,1,1,gadget,\n"
+                   "A,nan,2,,\n"
+                   "D,1\n"
+                   "E,2,3,,\n")
+        with self.assertRaises(CatalogImportError) as context:
+            read_catalog(io.StringIO(catalog), chunk_size=2)
+        problems = [(error.row, error.field) for error in context.exception.errors]
+        self.assertEqual(problems, [(1, "name"), (2, "price"), (2, "quantity"), (3, "maximum"),
+                                    (4, "kind"), (5, "name"), (5, "price"), (6, None)])
+        self.assertIn("row 2, quantity: 'x' is not an integer.", str(context.exception))
+
+    def test_json_values_must_have_the_right_type(self):
+        """Test that JSON values are not coerced and undecodable lines are reported."""
+        lines = ('{"name": "A", "price": "1", "quantity": 1}\n'
+                 '{"name": "B", "price": 1, "quantity": 1.5}\n'
+                 'not json\n'
+                 '[1, 2]\n')
+        with self.assertRaises(CatalogImportError) as context:
+            read_catalog(io.StringIO(lines), "jsonl")
+        self.assertEqual([(error.row, error.field) for error in context.exception.errors],
+                         [(1, "price"), (2, "quantity"), (3, None), (4, None)])
+
+    def test_missing_columns_and_formats(self):
+        """Test that a header without required columns and unknown formats are rejected."""
+        with self.assertRaises(ValueError):
+            read_catalog(io.StringIO("name,price\nA,1\n"))
+        with self.assertRaises(ValueError):
+            read_catalog(io.StringIO(CATALOG_CSV), "xml")
+
+    def test_load_catalog_uses_the_extension(self):
+        """Test that load_catalog picks the format from the file name."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "catalog.csv")
+            with open(path, "w", encoding="utf-8", newline="") as file:
+                file.write(CATALOG_CSV)
+            self.assertEqual(len(load_catalog(path).list_of_products), 3)
+
+    def test_store_from_trusted_rejects_duplicates(self):
+        """Test that Store.from_trusted indexes products and still rejects duplicate names."""
+        store = Store.from_trusted(iter([Product("A", 1, 2), Product("B", 1, 3)]))
+        self.assertEqual(store.get_total_quantity(), 5)
+        store.get_product("A").buy(2)
+        self.assertEqual(store.get_total_quantity(), 3)
+        self.assertEqual(len(store.get_all_products()), 1)
+        with self.assertRaises(ValueError):
+            Store.from_trusted([Product("A", 1, 2), Product("A", 1, 3)])
+
+    def test_from_trusted_uses_subclass_indexing(self):
+        """Test that from_trusted indexes through _index_products, so subclasses see the products."""
+        class CountingStore(Store):
+            indexed = 0
+
+            def _index_products(self, products):
+                products = list(products)
+                type(self).indexed += len(products)
+                super()._index_products(products)
+
+        store = CountingStore.from_trusted(iter([Product("A", 1, 2), Product("B", 1, 3)]))
+        store.add_product(Product("C", 1, 4))
+        self.assertEqual(CountingStore.indexed, 3)
+        self.assertEqual(store.get_total_quantity(), 9)
+        self.assertEqual([product.name for product in store.page_products().items],
+                         ["A", "B", "C"])
+
+    def test_gc_pause_is_opt_in(self):
+        """Test that the garbage collector is only paused on request, and restored after."""
+        states = []
+        from_trusted = Store.__dict__["from_trusted"]
+
+        def recording(cls, products):
+            states.append(gc.isenabled())
+            return from_trusted.__func__(cls, products)
+
+        Store.from_trusted = classmethod(recording)
+        try:
+            read_catalog(io.StringIO(CATALOG_CSV))
+            read_catalog(io.StringIO(CATALOG_CSV), pause_gc=True)
+        finally:
+            Store.from_trusted = from_trusted
+        self.assertEqual(states, [True, False])
+        self.assertTrue(gc.isenabled())
+        self.assertEqual(gc.get_freeze_count(), 0)
+        with self.assertRaises(CatalogImportError):
+            read_catalog(io.StringIO("name,price,quantity\nA,-1,1\n"), pause_gc=True)
+        self.assertTrue(gc.isenabled())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+from catalog_snapshot import open_snapshot, write_snapshot
+from products import Product, NonStockedProduct, LimitedProduct
+from promotions import PercentDiscount
+from store import Store
+
+
+class TestCatalogSnapshot(unittest.TestCase):
+    """Test cases for writing and lazily reopening catalog snapshots."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "catalog.snap")
+        macbook = Product("MacBook Air M2", 1450, 100)
+        macbook.promotion = PercentDiscount(30)
+        sold_out = Product("Sold Out", 9.5, 1)
+        sold_out.buy(1)
+        self.original = Store([macbook, NonStockedProduct("Unlimited Warranty", 100),
+                               LimitedProduct("Exclusive Sneakers", 150, 50, 2), sold_out])
+        write_snapshot(self.original, self.path)
+        self.store = open_snapshot(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_totals_without_loading(self):
+        """Test that the total quantity is known before any product is loaded."""
+        self.assertEqual(self.store.get_total_quantity(), 150)
+        self.assertEqual(self.store._loaded, {})
+
+    def test_products_round_trip(self):
+        """Test that every product comes back with its kind, fields, id and promotion."""
+        restored = self.store.list_of_products
+        self.assertEqual([p.show() for p in restored],
+                         [p.show() for p in self.original.list_of_products])
+        self.assertEqual([type(p) for p in restored],
+                         [type(p) for p in self.original.list_of_products])
+        self.assertEqual([p.product_id for p in restored],
+                         [p.product_id for p in self.original.list_of_products])
+        self.assertEqual(len(self.store.get_all_products()), 3)
+
+    def test_lookup_loads_and_orders(self):
+        """Test that looked-up products load lazily and take part in orders."""
+        sneakers = self.store.get_product("Exclusive Sneakers")
+        self.assertEqual(len(self.store._loaded), 1)
+        self.assertIs(self.store.get_product(sneakers.product_id), sneakers)
+        macbook = self.store.get_product("MacBook Air M2")
+        self.assertEqual(self.store.order([(sneakers, 2), (macbook, 1)]), 300 + 1015)
+        self.assertEqual(self.store.get_total_quantity(), 147)
+
+    def test_pages_load_only_what_they_list(self):
+        """Test that paging loads records in id order, a page and one more at a time."""
+        ids = sorted(p.product_id for p in self.original.get_all_products())
+        first = self.store.page_products(limit=1)
+        self.assertEqual([p.product_id for p in first.items], ids[:1])
+        self.assertEqual(first.next_cursor, ids[0])
+        # Up to the next active product, past the sold-out one between them.
+        self.assertEqual(len(self.store._loaded), 3)
+        self.assertIsNone(self.store.page_products(first.next_cursor, limit=2).next_cursor)
+        added = Product("Added Later", 1, 1)
+        self.store.add_product(added)
+        listed = [p.product_id for p in self.store.iter_products(page_size=2)]
+        self.assertEqual(listed, ids + [added.product_id])
+
+    def test_removed_product_stays_removed(self):
+        """Test that removing a snapshot product hides it from later lookups."""
+        self.store.remove_by_key("MacBook Air M2")
+        with self.assertRaises(ValueError):
+            self.store.get_product("MacBook Air M2")
+        self.assertEqual(self.store.get_total_quantity(), 50)
+        with self.assertRaises(ValueError):
+            self.store.add_product(Product("Exclusive Sneakers", 1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
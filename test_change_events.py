@@ -0,0 +1,73 @@
+import threading
+import unittest
+from change_events import ADDED, CHANGED, REMOVED, EventBus
+from products import Product
+from store import Store
+
+
+class TestEventBus(unittest.TestCase):
+    """Test cases for the store's change feed."""
+
+    def setUp(self):
+        self.pixel = Product("Google Pixel 7", 500, 10)
+        self.store = Store([self.pixel])
+        self.store.events = EventBus(window=60)
+        self.batches = []
+        self.store.events.subscribe(self.batches.append)
+
+    def test_changes_are_coalesced_per_product(self):
+        """Test that several changes to a product arrive as one event with net values."""
+        self.store.order([(self.pixel, 3)])
+        self.store.order([(self.pixel, 2)])
+        self.pixel.price = 450
+        self.pixel.price = 500
+        self.assertEqual(self.batches, [])
+        self.assertEqual(self.store.events.flush(), 1)
+        (event,), = self.batches
+        self.assertEqual((event.kind, event.product), (CHANGED, self.pixel))
+        self.assertEqual(event.changes, {"quantity": (10, 5)})
+
+    def test_sold_out_and_added_products(self):
+        """Test that deactivation, additions and removals are delivered in one batch."""
+        self.store.order([(self.pixel, 10)])
+        mac = Product("MacBook Air M2", 1450, 100)
+        self.store.add_product(mac)
+        temporary = Product("Temporary", 1, 1)
+        self.store.add_product(temporary)
+        self.store.remove_product(temporary)
+        self.store.events.flush()
+        events = self.batches[0]
+        self.assertEqual([(event.kind, event.product) for event in events],
+                         [(CHANGED, self.pixel), (ADDED, mac)])
+        self.assertEqual(events[0].changes, {"quantity": (10, 0), "active": (True, False)})
+        self.store.remove_product(mac)
+        self.store.events.flush()
+        self.assertEqual([(event.kind, event.product) for event in self.batches[1]],
+                         [(REMOVED, mac)])
+
+    def test_window_delivers_on_a_timer(self):
+        """Test that pending changes are delivered once the window has passed."""
+        delivered = threading.Event()
+        bus = self.store.events = EventBus(window=0.01)
+        bus.subscribe(lambda events: delivered.set())
+        self.pixel.quantity = 7
+        self.assertTrue(delivered.wait(5))
+        self.assertEqual(bus.batches, 1)
+
+    def test_zero_window_and_unsubscribe(self):
+        """Test that a zero window delivers at once and unsubscribed callbacks stop."""
+        bus = self.store.events = EventBus(window=0)
+        received = []
+        bus.subscribe(received.append)
+        self.pixel.quantity = 7
+        self.assertEqual(len(received), 1)
+        bus.unsubscribe(received.append)
+        self.assertFalse(bus)
+        self.pixel.quantity = 6
+        self.assertEqual(len(received), 1)
+        with self.assertRaises(ValueError):
+            EventBus(window=-1)
+
+
+if __name__ == "__main__":
+    unittest.main()
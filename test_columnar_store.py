@@ -0,0 +1,101 @@
+import unittest
+from columnar_store import ColumnarStore, ProductView
+from products import Product, NonStockedProduct, LimitedProduct
+from promotions import SecondHalfPrice
+
+
+class TestColumnarStore(unittest.TestCase):
+    """Test cases for ColumnarStore and its product views."""
+
+    def setUp(self):
+        earbuds = Product("Bose QuietComfort Earbuds", 250, 500)
+        earbuds.promotion = SecondHalfPrice()
+        self.store = ColumnarStore([
+            Product("MacBook Air M2", 1450, 100),
+            earbuds,
+            NonStockedProduct("Unlimited Warranty", 100),
+            LimitedProduct("Exclusive Sneakers", 150, 50, 2),
+        ])
+
+    def test_views_match_products(self):
+        """Test that views expose the same details as the copied products."""
+        view = self.store.get_product("Exclusive Sneakers")
+        self.assertIsInstance(view, ProductView)
+        self.assertEqual(view.quantity, 50)
+        self.assertEqual(view.maximum, 2)
+        self.assertEqual(view.show(), "Exclusive Sneakers, Price: 150, Quantity: 50, "
+                                      "Limited to 2 per order.")
+        view.price = 149.5
+        self.assertEqual(view.show(), "Exclusive Sneakers, Price: 149.5, Quantity: 50, "
+                                      "Limited to 2 per order.")
+
+    def test_aggregates(self):
+        """Test the total quantity, active filtering and inventory value."""
+        self.assertEqual(self.store.get_total_quantity(), 650)
+        self.assertEqual(len(self.store.get_all_products()), 4)
+        self.assertEqual(self.store.get_inventory_value(), 1450 * 100 + 250 * 500 + 150 * 50)
+
+    def test_total_quantity_follows_every_write(self):
+        """Test that the running total matches the quantity column after each kind of write."""
+        def check():
+            self.assertEqual(self.store.get_total_quantity(), sum(self.store._quantities))
+
+        macbook = self.store.get_product("MacBook Air M2")
+        macbook.quantity = 40
+        check()
+        self.store.add_product(Product("Google Pixel 7", 500, 250))
+        check()
+        buy = self.store._buy
+
+        def failing_buy(row, quantity):
+            if row != macbook._row:
+                raise RuntimeError("purchase failed")
+            return buy(row, quantity)
+
+        self.store._buy = failing_buy
+        with self.assertRaises(RuntimeError):
+            self.store.order([(macbook, 40), (self.store.get_product("Google Pixel 7"), 1)])
+        del self.store._buy
+        self.assertTrue(macbook.active)
+        check()
+        self.store.remove_by_key("Google Pixel 7")
+        check()
+        self.assertEqual(self.store.get_total_quantity(), 590)
+
+    def test_order_follows_product_rules(self):
+        """Test that orders apply promotions, limits and deactivation."""
+        macbook = self.store.get_product("MacBook Air M2")
+        earbuds = self.store.get_product("Bose QuietComfort Earbuds")
+        warranty = self.store.get_product("Unlimited Warranty")
+        total = self.store.order([(macbook, 100), (earbuds, 2), (warranty, 3)])
+        self.assertEqual(total, 145000 + 375 + 300)
+        self.assertFalse(macbook.active)
+        self.assertEqual(self.store.get_total_quantity(), 548)
+        with self.assertRaises(ValueError):
+            self.store.get_product("Exclusive Sneakers").buy(3)
+
+    def test_failed_order_changes_nothing(self):
+        """Test that an order failing a limit or stock check leaves every row untouched."""
+        macbook = self.store.get_product("MacBook Air M2")
+        sneakers = self.store.get_product("Exclusive Sneakers")
+        with self.assertRaises(ValueError):
+            self.store.order([(macbook, 2), (sneakers, 3)])
+        self.assertEqual(macbook.quantity, 100)
+        with self.assertRaises(ValueError) as context:
+            self.store.order([(macbook, 60), (macbook, 60)])
+        self.assertIn("Requested: 120, Available: 100", str(context.exception))
+        self.assertEqual(macbook.quantity, 100)
+        self.assertEqual(self.store.order([(macbook, 50), (macbook, 50)]), 145000)
+        self.assertFalse(macbook.active)
+
+    def test_remove_by_key(self):
+        """Test that removed rows no longer count towards the totals."""
+        self.store.remove_by_key("MacBook Air M2")
+        self.assertEqual(self.store.get_total_quantity(), 550)
+        self.assertEqual(len(self.store), 3)
+        with self.assertRaises(ValueError):
+            self.store.get_product("MacBook Air M2")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+import main
+from products import Product, NonStockedProduct
+from store import Store
+
+
+class CountingOutput(io.StringIO):
+    """A StringIO that counts write calls."""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+class TestBatchMode(unittest.TestCase):
+    """Test cases for running scripted commands against a store."""
+
+    def setUp(self):
+        self.pixel = Product("Google Pixel 7", 500, 10)
+        self.pixel_pro = Product("Google Pixel 7 Pro", 900, 5)
+        self.warranty = NonStockedProduct("Unlimited Warranty", 100)
+        self.store = Store([self.pixel, self.pixel_pro, self.warranty])
+
+    def run_script(self, script, buffer_lines=1000):
+        output = CountingOutput()
+        stats = main.run_batch(self.store, io.StringIO(script), output, buffer_lines)
+        return output, stats
+
+    def test_commands_run_without_prompts(self):
+        """Test list, quantity and order commands, and that quit ends the script."""
+        script = ("# a comment\n"
+                  "quantity\n"
+                  "\n"
+                  "order 2 google pixel 7; 1 Unlimited\n"
+                  "order 6 Google Pixel 7 Pro\n"
+                  "list\n"
+                  "quit\n"
+                  "order 1 Unlimited\n")
+        output, stats = self.run_script(script)
+        self.assertEqual(output.getvalue().splitlines(), [
+            "The total quantity is 15",
+            "line 4: Order placed. Total price is 1100.0€",
+            "line 5: Order failed: Not enough quantity for product Google Pixel 7 Pro. "
+            "Requested: 6, Available: 5",
+            "------",
+            "1. Google Pixel 7, Price: 500, Quantity: 8",
+            "2. Google Pixel 7 Pro, Price: 900, Quantity: 5",
+            "3. Unlimited Warranty, Price: 100, Non-stocked product",
+            "-----"])
+        self.assertEqual((stats.commands, stats.orders, stats.succeeded, stats.failed),
+                         (4, 2, 1, 1))
+        self.assertEqual(stats.revenue, 1100)
+        self.assertTrue(stats.summary().startswith("4 commands, 2 orders (1 succeeded"))
+
+    def test_bad_lines_are_reported(self):
+        """Test that bad items, unmatched products and unknown commands do not stop the script."""
+        output, stats = self.run_script("order Pixel\norder 1 Google\nsell 1\norder 1 unl\n")
+        self.assertEqual(output.getvalue().splitlines(), [
+            "line 1: Order failed: Item 'Pixel' must start with a positive quantity.",
+            "line 2: Order failed: No single active product matches 'Google'.",
+            "line 3: Unknown command 'sell'.",
+            "line 4: Order placed. Total price is 100.0€"])
+        self.assertEqual((stats.orders, stats.failed), (3, 2))
+
+    def test_output_is_buffered(self):
+        """Test that output is written in blocks of lines, not line by line."""
+        output, stats = self.run_script("order 1 Unlimited\n" * 250, buffer_lines=100)
+        self.assertEqual(stats.succeeded, 250)
+        self.assertEqual(len(output.getvalue().splitlines()), 250)
+        self.assertEqual(output.writes, 3)
+
+    def test_main_batch_option(self):
+        """Test that main --batch runs a script file and prints the summary."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "script.txt")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write("order 1 Unlimited Warranty\nquit\n")
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                main.main(["--batch", path])
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0], "line 1: Order placed. Total price is 100.0€")
+        self.assertTrue(lines[1].startswith("1 commands, 1 orders (1 succeeded, 0 failed)"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import metrics
+from products import Product, LimitedProduct
+from promotions import SecondHalfPrice
+from store import Store
+
+
+class TestMetrics(unittest.TestCase):
+    """Test cases for the optional instrumentation layer."""
+
+    def setUp(self):
+        metrics.reset()
+        self.original_order = Store.order
+        metrics.enable()
+        self.earbuds = Product("Bose QuietComfort Earbuds", 250, 5)
+        self.earbuds.promotion = SecondHalfPrice()
+        self.sneakers = LimitedProduct("Exclusive Sneakers", 150, 50, 2)
+        self.store = Store([self.earbuds, self.sneakers])
+
+    def tearDown(self):
+        metrics.disable()
+        metrics.reset()
+
+    def counter(self, data, name, **labels):
+        return next(sample["value"] for sample in data[name] if sample["labels"] == labels)
+
+    def test_outcomes_are_counted(self):
+        """Test that orders and purchases are counted by outcome and product class."""
+        self.store.order([(self.earbuds, 2), (self.sneakers, 1)])
+        with self.assertRaises(ValueError):
+            self.store.order([(self.earbuds, 10)])
+        with self.assertRaises(ValueError):
+            self.store.order([(self.sneakers, 3)])
+        data = metrics.snapshot()
+        self.assertEqual(self.counter(data, "store_orders_total", result="ok"), 1)
+        self.assertEqual(self.counter(data, "store_orders_total", result="insufficient_stock"), 1)
+        self.assertEqual(self.counter(data, "store_orders_total", result="purchase_limit"), 1)
+        self.assertEqual(self.counter(data, "product_buys_total",
+                                      kind="LimitedProduct", result="ok"), 1)
+        self.assertEqual(self.counter(data, "product_buys_total",
+                                      kind="LimitedProduct", result="purchase_limit"), 1)
+        # The nested Product.buy call made by LimitedProduct.buy is not counted again.
+        self.assertEqual(self.counter(data, "product_buys_total", kind="Product", result="ok"), 1)
+        promotion = data["promotion_apply_seconds"][0]
+        self.assertEqual(promotion["labels"], {"promotion": "SecondHalfPrice"})
+        self.assertEqual(promotion["count"], 1)
+        self.assertEqual(data["store_order_seconds"][0]["count"], 3)
+
+    def test_prometheus_export(self):
+        """Test the Prometheus text rendering of counters and histograms."""
+        self.store.order([(self.earbuds, 1)])
+        text = metrics.to_prometheus()
+        self.assertIn("# TYPE store_orders_total counter", text)
+        self.assertIn('store_orders_total{result="ok"} 1', text)
+        self.assertIn('store_order_seconds_bucket{le="+Inf"} 1', text)
+        self.assertIn("store_order_seconds_count 1", text)
+
+    def test_disable_restores_methods(self):
+        """Test that disabling puts the uninstrumented methods back."""
+        metrics.disable()
+        self.assertIs(Store.order, self.original_order)
+        self.assertFalse(metrics.is_enabled())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from cart_promotions import Bundle, CartPercentDiscount, SpendAndSave
+from money import divide, format_cents, from_cents, to_cents
+from products import Product, NonStockedProduct, LimitedProduct
+from promotions import PercentDiscount, SecondHalfPrice, ThirdOneFree
+from store import Store
+
+
+class TestMoney(unittest.TestCase):
+    """Test cases for integer-cent conversions and rounding."""
+
+    def test_to_cents(self):
+        """Test that amounts convert to the cents they are written as."""
+        self.assertEqual(to_cents(19.99), 1999)
+        self.assertEqual(to_cents(0.1 + 0.2), 30)
+        self.assertEqual(to_cents(1450), 145_000)
+        self.assertEqual(to_cents(0.125), 12)
+        self.assertEqual(to_cents(0.135), 14)
+
+    def test_format_and_back(self):
+        """Test formatting and converting cents back to units."""
+        self.assertEqual(format_cents(1205), "12.05")
+        self.assertEqual(format_cents(-5), "-0.05")
+        self.assertEqual(from_cents(1999), 19.99)
+
+    def test_divide_rounds_half_to_even(self):
+        """Test that divide rounds ties to the even quotient."""
+        self.assertEqual([divide(n, 2) for n in (1, 3, 5, 7, -5)], [0, 2, 2, 4, -2])
+        self.assertEqual(divide(124_875, 1000), 125)
+        self.assertEqual(divide(124_500, 1000), 124)
+
+
+class TestCentsPricing(unittest.TestCase):
+    """Test cases for pricing purchases and orders in integer cents."""
+
+    def test_promotion_rounding(self):
+        """Test the defined rounding of each promotion."""
+        self.assertEqual(PercentDiscount(12.5).calculate_cents(999, 1), 874)
+        self.assertEqual(SecondHalfPrice().calculate_cents(999, 2), 1499)
+        self.assertEqual(SecondHalfPrice().calculate_cents(999, 5), 999 * 3 + 999)
+        self.assertEqual(ThirdOneFree().calculate_cents(999, 7), 999 * 5)
+
+    def test_buy_in_cents(self):
+        """Test that every product class can report a purchase in cents."""
+        earbuds = Product("Bose QuietComfort Earbuds", 249.99, 10)
+        earbuds.promotion = SecondHalfPrice()
+        self.assertEqual(earbuds.buy(2, cents=True), 37499)
+        self.assertEqual(earbuds.quantity, 8)
+        self.assertEqual(NonStockedProduct("Warranty", 0.1).buy(3, cents=True), 30)
+        self.assertEqual(LimitedProduct("Sneakers", 150, 5, 2).buy(2, cents=True), 30_000)
+
+    def test_price_change_updates_cents(self):
+        """Test that the cached cent price follows the price."""
+        product = Product("Cable", 9.99, 10)
+        self.assertEqual(product.price_cents, 999)
+        product.price = 10.05
+        self.assertEqual(product.price_cents, 1005)
+
+    def test_large_order_does_not_drift(self):
+        """Test that a cent total stays exact where the float total drifts."""
+        products = [Product(f"Sticker {i}", 0.1, 10) for i in range(1000)]
+        store = Store(products)
+        cart = [(product, 1) for product in products]
+        self.assertNotEqual(store.order(cart), 100.0)
+        self.assertEqual(store.order(cart, cents=True), 10_000)
+        self.assertEqual(store.preview_order(cart, cents=True), 10_000)
+
+    def test_cart_rules_in_cents(self):
+        """Test that cart discounts are computed and rounded in integer cents."""
+        cable, mouse = Product("Cable", 9.99, 100), Product("Mouse", 19.99, 100)
+        store = Store([cable, mouse])
+        store.cart_promotions.add_rule(CartPercentDiscount(12.5, [cable]))
+        store.cart_promotions.add_rule(Bundle([cable, mouse], 25))
+        store.cart_promotions.add_rule(SpendAndSave(30, 0.05))
+        cart = [(cable, 3), (mouse, 1)]
+        # 2997 - 375 (12.5%, rounded half to even) = 2622; one set saves 874 + 1999 - 2500.
+        price = store.cart_promotions.price_lines(
+            [(product, quantity, product.line_price(quantity, True))
+             for product, quantity in cart], cents=True)
+        self.assertEqual(price.discounts, (("12.5% Off", 375), ("Bundle", 373),
+                                           ("Spend 30 Save 0.05", 5)))
+        self.assertEqual((price.subtotal, price.total), (4996, 4243))
+        self.assertEqual(store.preview_order(cart, cents=True), 4243)
+        self.assertEqual(store.order(cart, cents=True), 4243)
+        self.assertEqual(store.order_many([cart], cents=True)[0].total, 4243)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import io
+import unittest
+from order_ingest import IngestStats, ingest_orders
+from products import Product, LimitedProduct
+from store import Store
+
+
+class TestIngestOrders(unittest.TestCase):
+    """Test cases for streaming JSONL orders into a store."""
+
+    def setUp(self):
+        self.pixel = Product("Google Pixel 7", 500, 10)
+        self.sneakers = LimitedProduct("Exclusive Sneakers", 150, 50, 2)
+        self.store = Store([self.pixel, self.sneakers])
+
+    def ingest(self, text, chunk_size=2):
+        stats = IngestStats()
+        results = list(ingest_orders(io.StringIO(text), self.store, chunk_size, stats))
+        return results, stats
+
+    def test_valid_orders_are_applied(self):
+        """Test both order shapes and lookups by name and product id."""
+        text = ('[["Google Pixel 7", 2]]\n'
+                '\n'
+                f'{{"order_id": "A-1", "items": [{{"product": {self.sneakers.product_id}, '
+                '"quantity": 2}]}\n')
+        results, stats = self.ingest(text)
+        self.assertEqual([(r.line_number, r.order_id, r.total) for r in results],
+                         [(1, None, 1000), (3, "A-1", 300)])
+        self.assertEqual(self.pixel.quantity, 8)
+        self.assertEqual((stats.orders, stats.succeeded, stats.failed), (2, 2, 0))
+
+    def test_bad_orders_yield_errors(self):
+        """Test that malformed, unknown and rejected orders produce error records."""
+        text = ('not json\n'
+                '[["Unknown", 1]]\n'
+                '[["Google Pixel 7", 0]]\n'
+                '[["Google Pixel 7", 11]]\n'
+                '[["Exclusive Sneakers", 3]]\n'
+                '[["Google Pixel 7", 1]]\n')
+        results, stats = self.ingest(text)
+        self.assertEqual([r.ok for r in results], [False] * 5 + [True])
+        self.assertEqual((stats.succeeded, stats.failed), (1, 5))
+        self.assertEqual(self.pixel.quantity, 9)
+        self.assertEqual(self.sneakers.quantity, 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
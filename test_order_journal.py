@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+from catalog_snapshot import write_snapshot
+from order_journal import OrderJournal, compact, read_journal, recover
+from products import Product, LimitedProduct
+from promotions import ThirdOneFree
+from store import Store
+
+
+class TestOrderJournal(unittest.TestCase):
+    """Test cases for journaling store changes and recovering from them."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.snapshot_path = os.path.join(self.directory.name, "catalog.snap")
+        self.journal_path = os.path.join(self.directory.name, "orders.journal")
+        self.pixel = Product("Google Pixel 7", 500, 250)
+        self.sneakers = LimitedProduct("Exclusive Sneakers", 150, 50, 2)
+        self.store = Store([self.pixel, self.sneakers])
+        write_snapshot(self.store, self.snapshot_path)
+        self.journal = OrderJournal(self.journal_path, group_size=4)
+        self.store.attach_journal(self.journal)
+
+    def tearDown(self):
+        self.journal.close()
+        self.directory.cleanup()
+
+    def make_changes(self):
+        earbuds = Product("Bose QuietComfort Earbuds", 250, 500)
+        earbuds.promotion = ThirdOneFree()
+        self.store.add_product(earbuds)
+        self.store.order([(self.pixel, 3), (earbuds, 10)])
+        self.store.order([(self.sneakers, 2)])
+        with self.assertRaises(ValueError):
+            self.store.order([(self.pixel, 1000)])  # Failed orders are not logged.
+        self.store.remove_product(self.sneakers)
+
+    def assertRecovered(self):
+        recovered = recover(self.snapshot_path, self.journal_path)
+        self.assertEqual([p.show() for p in recovered.list_of_products],
+                         [p.show() for p in self.store.list_of_products])
+        self.assertEqual(recovered.get_total_quantity(), self.store.get_total_quantity())
+        recovered.close()
+
+    def test_recover_replays_journal(self):
+        """Test that snapshot plus journal reproduces the store."""
+        self.make_changes()
+        self.journal.flush()
+        self.assertEqual([r["op"] for r in read_journal(self.journal_path)],
+                         ["add", "order", "order", "remove"])
+        self.assertRecovered()
+
+    def test_restock_is_replayed(self):
+        """Test that restocking is journaled, so recovered stock and active flags match."""
+        self.store.order([(self.pixel, 250)])
+        self.store.restock([(self.pixel, 40), (self.sneakers, 5)])
+        self.journal.flush()
+        self.assertEqual([r["op"] for r in read_journal(self.journal_path)], ["order", "restock"])
+        recovered = recover(self.snapshot_path, self.journal_path)
+        pixel = recovered.get_product(self.pixel.product_id)
+        self.assertEqual((pixel.quantity, pixel.active), (40, True))
+        self.assertEqual(recovered.get_total_quantity(), self.store.get_total_quantity())
+        recovered.close()
+
+    def test_setter_edits_are_replayed(self):
+        """Test that edits through product setters are journaled, but not those orders make."""
+        self.pixel.price = 450.5
+        self.pixel.promotion = ThirdOneFree()
+        self.sneakers.quantity = 0
+        self.store.order([(self.pixel, 3)])
+        self.journal.flush()
+        self.assertEqual([(r["op"], r.get("attribute")) for r in read_journal(self.journal_path)],
+                         [("update", "price"), ("update", "promotion"), ("update", "quantity"),
+                          ("order", None)])
+        self.assertRecovered()
+        recovered = recover(self.snapshot_path, self.journal_path)
+        pixel = recovered.get_product(self.pixel.product_id)
+        self.assertEqual((pixel.price, pixel.quantity), (450.5, 247))
+        self.assertIsInstance(pixel.promotion, ThirdOneFree)
+        self.assertFalse(recovered.get_product(self.sneakers.product_id).active)
+        recovered.close()
+
+    def test_unloggable_changes_are_not_applied(self):
+        """Test that a change the journal cannot encode leaves the store as it was."""
+        class HouseDeal(ThirdOneFree):
+            pass
+
+        with self.assertRaises(ValueError):
+            self.pixel.promotion = HouseDeal()
+        self.assertIsNone(self.pixel.promotion)
+        earbuds = Product("Bose QuietComfort Earbuds", 250, 500)
+        earbuds.promotion = HouseDeal()
+        with self.assertRaises(ValueError):
+            self.store.add_product(earbuds)
+        with self.assertRaises(ValueError):
+            self.store.get_product(earbuds.name)
+        self.assertEqual(self.store.get_total_quantity(), 300)
+        earbuds.promotion = None
+        self.store.add_product(earbuds)
+        self.journal.flush()
+        self.assertEqual([r["op"] for r in read_journal(self.journal_path)], ["add"])
+        self.assertRecovered()
+
+    def test_compaction_empties_journal(self):
+        """Test that compaction folds the journal into the snapshot."""
+        self.make_changes()
+        compact(self.store, self.snapshot_path, self.journal)
+        self.assertEqual(self.journal.records, 0)
+        self.store.order([(self.pixel, 1)])
+        self.journal.flush()
+        self.assertEqual(len(list(read_journal(self.journal_path))), 1)
+        self.assertRecovered()
+
+    def test_torn_last_record_is_ignored(self):
+        """Test that a record cut short by a crash does not break recovery."""
+        self.store.order([(self.pixel, 3)])
+        self.journal.flush()
+        with open(self.journal_path, "ab") as file:
+            file.write(b'{"op": "order", "items": [[')
+        self.assertRecovered()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+from pricing_cache import PricingCache
+from products import Product, LimitedProduct
+from promotions import PercentDiscount, SecondHalfPrice, ThirdOneFree
+from store import Store
+
+
+class TestPricingCache(unittest.TestCase):
+    """Test cases for the promotion pricing cache."""
+
+    def setUp(self):
+        self.cache = PricingCache(maxsize=4)
+        self.product = Product("MacBook Air M2", 100, 50)
+        self.product.promotion = PercentDiscount(10)
+
+    def test_repeated_lines_hit(self):
+        """Test that pricing the same line twice is served from the cache."""
+        self.assertAlmostEqual(self.cache.price(self.product, 2), 180)
+        self.assertAlmostEqual(self.cache.price(self.product, 2), 180)
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_shared_promotion_shares_entries(self):
+        """Test that products with the same promotion and price share cached results."""
+        other = Product("Other Laptop", 100, 50)
+        other.promotion = self.product.promotion
+        self.cache.price(self.product, 3)
+        self.cache.price(other, 3)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_products_without_promotion_are_not_cached(self):
+        """Test that plain lines are priced directly."""
+        plain = Product("Plain", 5, 10)
+        self.assertEqual(self.cache.price(plain, 3), 15)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_least_recently_used_is_evicted(self):
+        """Test that the cache stays bounded, dropping the least recently used entry."""
+        for quantity in range(1, 5):
+            self.cache.price(self.product, quantity)
+        self.cache.price(self.product, 1)
+        self.cache.price(self.product, 5)
+        self.assertEqual(len(self.cache), 4)
+        self.assertEqual(self.cache.evictions, 1)
+        self.cache.price(self.product, 1)
+        self.assertEqual(self.cache.hits, 2)
+
+    def test_promotion_parameter_change_misses(self):
+        """Test that changing a promotion's parameters stops serving its old prices."""
+        self.assertAlmostEqual(self.cache.price(self.product, 1), 90)
+        self.product.promotion.percent = 50
+        self.assertAlmostEqual(self.cache.price(self.product, 1), 50)
+        self.assertEqual(self.cache.hits, 0)
+
+    def test_invalid_maxsize(self):
+        """Test that a non-positive maxsize is rejected."""
+        with self.assertRaises(ValueError):
+            PricingCache(maxsize=0)
+
+
+class TestPreviewOrder(unittest.TestCase):
+    """Test cases for pricing carts through Store.preview_order."""
+
+    def setUp(self):
+        self.macbook = Product("MacBook Air M2", 100, 50)
+        self.macbook.promotion = SecondHalfPrice()
+        self.sneakers = LimitedProduct("Exclusive Sneakers", 150, 50, 2)
+        self.store = Store([self.macbook, self.sneakers])
+
+    def test_preview_matches_order_without_buying(self):
+        """Test that a preview prices the cart like order() but leaves the stock alone."""
+        cart = [(self.macbook, 2), (self.sneakers, 1)]
+        preview = self.store.preview_order(cart)
+        self.assertEqual(self.macbook.quantity, 50)
+        self.assertEqual(self.store.get_total_quantity(), 100)
+        self.assertEqual(preview, self.store.order(cart))
+
+    def test_price_change_invalidates(self):
+        """Test that reassigning the price drops stale cached prices."""
+        self.assertEqual(self.store.preview_order([(self.macbook, 2)], cached=True), 150)
+        self.macbook.price = 200
+        self.assertEqual(self.store.pricing_cache.invalidations, 1)
+        self.assertEqual(self.store.preview_order([(self.macbook, 2)], cached=True), 300)
+
+    def test_promotion_change_invalidates(self):
+        """Test that reassigning the promotion drops stale cached prices."""
+        self.assertEqual(self.store.preview_order([(self.macbook, 3)], cached=True), 250)
+        self.macbook.promotion = ThirdOneFree()
+        self.assertEqual(len(self.store.pricing_cache), 0)
+        self.assertEqual(self.store.preview_order([(self.macbook, 3)], cached=True), 200)
+
+    def test_preview_uses_the_cache_only_when_asked(self):
+        """Test that previews are priced directly unless cached=True, and follow promotion edits."""
+        discount = PercentDiscount(10)
+        self.macbook.promotion = discount
+        self.assertAlmostEqual(self.store.preview_order([(self.macbook, 1)]), 90)
+        self.assertEqual(len(self.store.pricing_cache), 0)
+        self.assertAlmostEqual(self.store.preview_order([(self.macbook, 1)], cached=True), 90)
+        discount.percent = 50
+        self.assertAlmostEqual(self.store.preview_order([(self.macbook, 1)], cached=True), 50)
+        self.assertAlmostEqual(self.store.preview_order([(self.macbook, 1)]), 50)
+
+    def test_preview_rejects_orders_that_would_fail(self):
+        """Test that a preview raises the errors the order would raise."""
+        with self.assertRaises(ValueError):
+            self.store.preview_order([(self.macbook, 51)])
+        with self.assertRaises(ValueError):
+            self.store.preview_order([(self.sneakers, 3)])
+        with self.assertRaises(ValueError):
+            self.store.preview_order([(self.macbook, 0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -122,5 +122,31 @@ class TestLimitedProduct(unittest.TestCase):
             p.buy(3)  # Exceeds limit of 2
 
 
+class TestTrustedPath(unittest.TestCase):
+    """Test cases for slotted products and the trusted construction path."""
+
+    def test_products_have_no_instance_dict(self):
+        """Test that every product class stores its attributes in slots."""
+        for product in (Product("A", 1, 1), NonStockedProduct("B", 1), LimitedProduct("C", 1, 1, 1)):
+            self.assertFalse(hasattr(product, "__dict__"))
+
+    def test_from_trusted_matches_constructor(self):
+        """Test that trusted construction yields the same product as the constructor."""
+        p = LimitedProduct.from_trusted("Special Edition", 200, 50, 2)
+        self.assertIsInstance(p, LimitedProduct)
+        self.assertEqual(p.show(), LimitedProduct("Special Edition", 200, 50, 2).show())
+        self.assertEqual(p.buy(2), 400)
+        self.assertEqual(NonStockedProduct.from_trusted("Warranty", 100).buy(5), 500)
+
+    def test_update_trusted_notifies_and_deactivates(self):
+        """Test that trusted updates still notify listeners and deactivate at zero."""
+        p = Product.from_trusted("Test Product", 100, 10)
+        changes = []
+        p.add_listener(lambda product, attribute, old, new: changes.append((attribute, old, new)))
+        p.update_trusted(quantity=0)
+        self.assertFalse(p.active)
+        self.assertEqual(changes, [("quantity", 10, 0), ("active", True, False)])
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,94 @@
+import contextlib
+import io
+import os
+import tempfile
+import time
+import unittest
+import order_ingest
+from products import Product, NonStockedProduct
+from profiling import ProfileSession
+from promotions import SecondHalfPrice
+from store import Store
+
+
+class TestProfileSession(unittest.TestCase):
+    """Test cases for profiling sessions over the order pipeline."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.warranty = NonStockedProduct("Unlimited Warranty", 100)
+        self.warranty.promotion = SecondHalfPrice()
+        self.pixel = Product("Google Pixel 7", 500, 10)
+        self.store = Store([self.warranty, self.pixel])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self, path, name):
+        with open(os.path.join(path, name), encoding="utf-8") as file:
+            return file.read()
+
+    def test_session_writes_every_report(self):
+        """Test that orders are profiled, sampled and traced, and the methods restored."""
+        original_order, original_buy = Store.order, Product.buy
+        with ProfileSession(self.directory.name) as session:
+            self.assertIsNot(Store.order, original_order)
+            deadline = time.monotonic() + 10
+            while session.samples < 5 and time.monotonic() < deadline:
+                self.store.order([(self.warranty, 3), (self.warranty, 2)])
+        self.assertIs(Store.order, original_order)
+        self.assertIs(Product.buy, original_buy)
+        self.assertEqual(os.path.dirname(session.path), self.directory.name)
+        self.assertEqual(sorted(os.listdir(session.path)),
+                         ["allocations.txt", "profile.pstats", "profile.txt",
+                          "stacks.collapsed"])
+        self.assertIn("(order)", self.read(session.path, "profile.txt"))
+        self.assertIn("Peak traced memory", self.read(session.path, "allocations.txt"))
+
+        lines = self.read(session.path, "stacks.collapsed").splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            self.assertTrue(stack.startswith("store.py:Store.order"), line)
+            self.assertNotIn("profiling.py", stack)
+            self.assertGreater(int(count), 0)
+        self.assertEqual(sum(int(line.rsplit(" ", 1)[1]) for line in lines), session.samples)
+
+    def test_empty_session(self):
+        """Test that a session without orders still writes its reports."""
+        with ProfileSession(self.directory.name, memory=False) as session:
+            pass
+        self.assertEqual(self.read(session.path, "profile.txt"), "No wrapped calls were made.\n")
+        self.assertEqual(self.read(session.path, "stacks.collapsed"), "")
+        self.assertFalse(os.path.exists(os.path.join(session.path, "allocations.txt")))
+
+    def test_invalid_use(self):
+        """Test that bad settings and starting a session twice are rejected."""
+        with self.assertRaises(ValueError):
+            ProfileSession(self.directory.name, interval=0)
+        with self.assertRaises(ValueError):
+            ProfileSession(self.directory.name, top=0)
+        session = ProfileSession(self.directory.name, memory=False)
+        session.start()
+        try:
+            with self.assertRaises(RuntimeError):
+                session.start()
+        finally:
+            session.stop()
+
+    def test_order_replay_profile_option(self):
+        """Test that order_ingest --profile profiles the replay."""
+        path = os.path.join(self.directory.name, "orders.jsonl")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write('[["Google Pixel 7", 1]]\n' * 3)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            order_ingest.main([path, "--quiet", "--profile", self.directory.name])
+        self.assertIn("Profile written to", output.getvalue())
+        self.assertIn("3 orders (3 succeeded, 0 failed)", output.getvalue())
+        session_path = output.getvalue().split("Profile written to ")[1].splitlines()[0]
+        self.assertIn("(order)", self.read(session_path, "profile.txt"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from products import Product
+from promotions import PercentDiscount, Promotion, SecondHalfPrice, ThirdOneFree, numpy
+from store import Store
+
+PRICES = [0, 1, 9.99, 100, 149.5, 1450, 0.1, 33.333]
+QUANTITIES = [1, 2, 3, 4, 5, 7, 10, 99]
+
+
+class TestApplyBatch(unittest.TestCase):
+    """Test that batch pricing matches the scalar promotion path exactly."""
+
+    promotions = [PercentDiscount(30), PercentDiscount(12.5), PercentDiscount(20),
+                  PercentDiscount(33.33), SecondHalfPrice(), ThirdOneFree()]
+
+    def pairs(self):
+        return [(price, quantity) for price in PRICES for quantity in QUANTITIES]
+
+    def expected(self, promotion, pairs):
+        return [promotion.apply_promotion(Product("Test Product", price, 100), quantity)
+                for price, quantity in pairs]
+
+    def test_batch_matches_scalar(self):
+        """Test that apply_batch over lists equals apply_promotion per pair."""
+        pairs = self.pairs()
+        prices = [price for price, _ in pairs]
+        quantities = [quantity for _, quantity in pairs]
+        for promotion in self.promotions:
+            with self.subTest(promotion=promotion.name):
+                self.assertEqual(list(promotion.apply_batch(prices, quantities)),
+                                 self.expected(promotion, pairs))
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_numpy_batch_matches_scalar(self):
+        """Test that apply_batch over NumPy arrays equals apply_promotion per pair."""
+        pairs = self.pairs()
+        prices = numpy.array([price for price, _ in pairs])
+        quantities = numpy.array([quantity for _, quantity in pairs])
+        for promotion in self.promotions:
+            with self.subTest(promotion=promotion.name):
+                self.assertEqual(promotion.apply_batch(prices, quantities).tolist(),
+                                 self.expected(promotion, pairs))
+
+    def test_batch_cents_matches_scalar(self):
+        """Test that apply_batch_cents equals calculate_cents per pair."""
+        prices = [0, 1, 999, 10_000, 14_950, 145_000, 3333]
+        quantities = [1, 2, 3, 4, 5, 7, 99]
+        for promotion in self.promotions:
+            with self.subTest(promotion=promotion.name):
+                expected = list(map(promotion.calculate_cents, prices, quantities))
+                self.assertEqual(list(promotion.apply_batch_cents(prices, quantities)), expected)
+                self.assertEqual(promotion.calculate_cents_many(prices, quantities), expected)
+
+    def test_mismatched_lengths(self):
+        """Test that prices and quantities of different lengths raise an exception."""
+        with self.assertRaises(ValueError):
+            ThirdOneFree().apply_batch([1.0, 2.0], [1])
+
+
+
+class BulkDiscount(Promotion):
+    """A promotion in the older style: it only overrides apply_promotion, with a branch."""
+
+    def __init__(self):
+        super().__init__("Bulk Discount")
+
+    def apply_promotion(self, product, quantity):
+        if quantity >= 10:
+            return product.price * quantity * 0.9
+        return product.price * quantity
+
+
+class TestLegacyPromotion(unittest.TestCase):
+    """Test that subclasses overriding only apply_promotion keep working."""
+
+    def test_legacy_subclass_prices_every_path(self):
+        """Test buying, batches and cents with a legacy subclass."""
+        promotion = BulkDiscount()
+        product = Product("Cable", 9.99, 100)
+        product.promotion = promotion
+        self.assertAlmostEqual(promotion.calculate_price(9.99, 10), 89.91)
+        self.assertEqual(list(promotion.apply_batch([9.99, 9.99], [1, 10])),
+                         [promotion.calculate_price(9.99, 1), promotion.calculate_price(9.99, 10)])
+        self.assertEqual(list(promotion.apply_batch_cents([999, 999], [1, 10])), [999, 8991])
+        self.assertEqual(product.buy(10, cents=True), 8991)
+        self.assertAlmostEqual(Store([product]).order([(product, 10)]), 89.91)
+        self.assertEqual(product.quantity, 80)
+
+    def test_promotion_without_a_formula_is_abstract(self):
+        """Test that a subclass overriding neither method still cannot be instantiated."""
+        class Nothing(Promotion):
+            pass
+
+        with self.assertRaises(TypeError):
+            Nothing("Nothing")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from products import Product, NonStockedProduct
+from reorder import LowStock, ReorderIndex
+from store import Store
+
+
+class TestReorderIndex(unittest.TestCase):
+    """Test cases for low-stock queries, alerts and restocking."""
+
+    def setUp(self):
+        self.pixel = Product("Google Pixel 7", 500, 30)
+        self.mac = Product("MacBook Air M2", 1450, 8)
+        self.earbuds = Product("Bose QuietComfort Earbuds", 250, 15)
+        self.warranty = NonStockedProduct("Unlimited Warranty", 100)
+        self.store = Store([self.pixel, self.mac, self.earbuds, self.warranty])
+        self.index = self.store.reorder_index
+
+    def test_lowest_follows_orders(self):
+        """Test that the lowest-stock query reflects every purchase."""
+        self.assertEqual(self.index.lowest(2), [self.mac, self.earbuds])
+        self.store.order([(self.pixel, 25)])
+        self.assertEqual(self.index.lowest(2), [self.pixel, self.mac])
+        self.pixel.buy(5)
+        self.assertEqual(self.index.lowest(1), [self.pixel])
+        self.assertEqual(len(self.index.lowest(10)), 3)  # Non-stocked products are not tracked.
+
+    def test_below_threshold_is_most_urgent_first(self):
+        """Test that products at or below their thresholds are listed by headroom."""
+        self.assertEqual(self.index.below_threshold(), [])
+        self.index.set_threshold(self.mac, 10)
+        self.index.set_threshold(self.earbuds, 15)
+        self.assertEqual(self.index.below_threshold(),
+                         [LowStock(self.mac, 8, 10), LowStock(self.earbuds, 15, 15)])
+        self.store.order([(self.earbuds, 14)])
+        self.assertEqual([low.product for low in self.index.below_threshold(limit=1)],
+                         [self.earbuds])
+        self.index.set_threshold(self.mac, None)
+        self.assertEqual([low.product for low in self.index.below_threshold()], [self.earbuds])
+        with self.assertRaises(ValueError):
+            self.index.set_threshold(self.mac, -1)
+
+    def test_alert_fires_when_threshold_is_crossed(self):
+        """Test that subscribers hear about a product once, when it reaches its threshold."""
+        alerts = []
+        self.index.subscribe(alerts.append)
+        self.index.set_threshold(self.pixel, 20)
+        self.store.order([(self.pixel, 5)])
+        self.assertEqual(alerts, [])
+        self.store.order([(self.pixel, 5)])
+        self.store.order([(self.pixel, 5)])
+        self.assertEqual(alerts, [LowStock(self.pixel, 20, 20)])
+
+    def test_removed_and_added_products(self):
+        """Test that the index follows products added to and removed from the store."""
+        self.store.remove_product(self.mac)
+        self.assertNotIn(self.mac, self.index.lowest(3))
+        cable = Product("USB Cable", 5, 1)
+        self.store.add_product(cable)
+        self.assertEqual(self.index.lowest(1), [cable])
+
+    def test_restock_reactivates_in_bulk(self):
+        """Test that restocking adds stock and reactivates sold-out products."""
+        self.store.order([(self.mac, 8), (self.earbuds, 15)])
+        self.assertEqual(self.index.below_threshold()[0].quantity, 0)
+        self.store.restock([(self.mac, 20), (self.earbuds, 5), (self.mac, 2)])
+        self.assertEqual((self.mac.quantity, self.mac.active), (22, True))
+        self.assertEqual((self.earbuds.quantity, self.earbuds.active), (5, True))
+        self.assertEqual(self.store.get_total_quantity(), 30 + 22 + 5)
+        self.assertEqual(len(self.store.get_all_products()), 4)
+        self.assertEqual(self.index.below_threshold(), [])
+        with self.assertRaises(ValueError):
+            self.store.restock([(self.warranty, 1)])
+        with self.assertRaises(ValueError):
+            self.store.restock([(Product("Elsewhere", 1, 1), 1)])
+        with self.assertRaises(TypeError):
+            self.store.restock([(self.mac, 1.5)])
+
+    def test_stale_entries_are_compacted(self):
+        """Test that the heaps stay bounded under many updates."""
+        index = ReorderIndex([self.pixel])
+        for quantity in range(1000):
+            self.pixel.quantity = quantity
+            index.on_product_change(self.pixel, "quantity", quantity + 1, quantity)
+        self.assertLess(len(index._stock), 100)
+        self.assertEqual(index.lowest(1), [self.pixel])
+
+
+if __name__ == "__main__":
+    unittest.main()
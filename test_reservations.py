@@ -0,0 +1,113 @@
+import math
+import unittest
+from products import Product, NonStockedProduct, LimitedProduct, InsufficientStockError, PurchaseLimitError
+from store import Store
+
+
+class FakeClock:
+    """A clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestReservations(unittest.TestCase):
+    """Test cases for holding stock with Store.reserve."""
+
+    def setUp(self):
+        self.macbook = Product("MacBook Air M2", 1450, 10)
+        self.warranty = NonStockedProduct("Unlimited Warranty", 100)
+        self.sneakers = LimitedProduct("Exclusive Sneakers", 150, 50, 2)
+        self.store = Store([self.macbook, self.warranty, self.sneakers])
+        self.clock = FakeClock()
+        self.store.reservations.clock = self.clock
+
+    def test_hold_reduces_available_quantity(self):
+        """Test that held units are unavailable but not yet bought."""
+        self.store.reserve([(self.macbook, 4), (self.warranty, 1)], ttl=60)
+        self.assertEqual(self.macbook.quantity, 10)
+        self.assertEqual(self.store.get_available_quantity(self.macbook), 6)
+        with self.assertRaises(InsufficientStockError):
+            self.store.order([(self.macbook, 7)])
+        with self.assertRaises(InsufficientStockError):
+            self.store.reserve([(self.macbook, 7)], ttl=60)
+        self.assertEqual(self.store.order([(self.macbook, 6)]), 6 * 1450)
+
+    def test_commit_buys_held_stock(self):
+        """Test that committing a hold buys its lines exactly once."""
+        hold_id = self.store.reserve([(self.macbook, 4), (self.warranty, 1)], ttl=60)
+        self.assertEqual(self.store.commit(hold_id), 4 * 1450 + 100)
+        self.assertEqual(self.macbook.quantity, 6)
+        self.assertEqual(self.store.get_available_quantity(self.macbook), 6)
+        with self.assertRaises(ValueError):
+            self.store.commit(hold_id)
+
+    def test_failed_commit_keeps_the_hold(self):
+        """Test that a commit whose purchase fails leaves the hold outstanding."""
+        product = Product("Pixel", 500, 5)
+        self.store.add_product(product)
+        hold_id = self.store.reserve([(product, 3)], ttl=60)
+        product.quantity = 1
+        with self.assertRaises(InsufficientStockError):
+            self.store.commit(hold_id)
+        self.assertIsNotNone(self.store.reservations.find(hold_id))
+        self.assertEqual(product.quantity, 1)
+        product.quantity = 5
+        self.assertEqual(self.store.commit(hold_id), 1500)
+        self.assertIsNone(self.store.reservations.find(hold_id))
+
+    def test_release_frees_stock(self):
+        """Test that a released hold gives its units back."""
+        hold_id = self.store.reserve([(self.macbook, 10)], ttl=60)
+        self.assertTrue(self.store.release(hold_id))
+        self.assertFalse(self.store.release(hold_id))
+        self.assertEqual(self.store.get_available_quantity(self.macbook), 10)
+        self.assertEqual(self.macbook.quantity, 10)
+
+    def test_holds_expire(self):
+        """Test that expired holds free their units and can no longer be committed."""
+        first = self.store.reserve([(self.macbook, 5)], ttl=10)
+        second = self.store.reserve([(self.macbook, 5)], ttl=30)
+        self.clock.now = 10
+        self.assertEqual(self.store.get_available_quantity(self.macbook), 5)
+        with self.assertRaises(ValueError):
+            self.store.commit(first)
+        self.assertEqual(self.store.commit(second), 5 * 1450)
+        self.assertEqual(self.store.reservations.expired, 1)
+        self.assertEqual(len(self.store.reservations), 0)
+
+    def test_unlimited_holds_never_expire(self):
+        """Test that a hold with an infinite ttl lasts until it is committed."""
+        hold_id = self.store.reserve([(self.macbook, 5)], ttl=math.inf)
+        self.clock.now = 10**9
+        self.assertEqual(self.store.reservations.expire(), 0)
+        self.assertEqual(self.store.commit(hold_id), 5 * 1450)
+        self.assertEqual(self.store.reservations._deadlines, [])
+
+    def test_many_holds_expire_together(self):
+        """Test that a large number of holds expire through the deadline heap."""
+        for index in range(1000):
+            self.store.reserve([(self.warranty, 1)], ttl=1 + index % 7)
+        self.assertEqual(len(self.store.reservations), 1000)
+        self.clock.now = 4
+        self.assertEqual(self.store.reservations.expire(), sum(1 for index in range(1000) if index % 7 < 4))
+        self.clock.now = 7
+        self.store.reservations.expire()
+        self.assertEqual(len(self.store.reservations), 0)
+
+    def test_invalid_holds_rejected(self):
+        """Test that limits, ttl and quantities are validated when reserving."""
+        with self.assertRaises(PurchaseLimitError):
+            self.store.reserve([(self.sneakers, 3)], ttl=60)
+        with self.assertRaises(ValueError):
+            self.store.reserve([(self.macbook, 1)], ttl=0)
+        with self.assertRaises(ValueError):
+            self.store.reserve([(self.macbook, 0)], ttl=60)
+        self.assertEqual(len(self.store.reservations), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
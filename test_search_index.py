@@ -0,0 +1,102 @@
+import unittest
+from products import Product
+from search_index import CatalogIndex
+from store import Store
+
+
+class TestCatalogIndex(unittest.TestCase):
+    """Test cases for the catalog search index."""
+
+    def setUp(self):
+        self.products = [
+            Product("MacBook Air M2", 1450, 100),
+            Product("MacBook Pro", 2200, 20),
+            Product("Magic Mouse", 80, 40),
+            Product("Bose QuietComfort Earbuds", 250, 500),
+            Product("Google Pixel 7", 500, 250),
+        ]
+        self.index = CatalogIndex(self.products)
+
+    def names(self, page):
+        return [product.name for product in page.items]
+
+    def test_prefix_ignores_case(self):
+        """Test that a prefix query matches names in any case, in name order."""
+        self.assertEqual(self.names(self.index.by_prefix("mac")), ["MacBook Air M2", "MacBook Pro"])
+        self.assertEqual(self.names(self.index.by_prefix("MA")),
+                         ["MacBook Air M2", "MacBook Pro", "Magic Mouse"])
+        self.assertEqual(self.index.by_prefix("Zune").items, [])
+
+    def test_substring(self):
+        """Test substring queries through the trigram index and for short texts."""
+        self.assertEqual(self.names(self.index.by_substring("BOOK")),
+                         ["MacBook Air M2", "MacBook Pro"])
+        self.assertEqual(self.names(self.index.by_substring("comfort")),
+                         ["Bose QuietComfort Earbuds"])
+        self.assertEqual(self.names(self.index.by_substring("o")),
+                         ["Bose QuietComfort Earbuds", "Google Pixel 7", "MacBook Air M2",
+                          "MacBook Pro", "Magic Mouse"])
+        self.assertEqual(self.index.by_substring("xyz").items, [])
+
+    def test_price_range_is_inclusive_and_sorted(self):
+        """Test that a price range includes both bounds and lists the cheapest first."""
+        self.assertEqual(self.names(self.index.by_price(250, 1450)),
+                         ["Bose QuietComfort Earbuds", "Google Pixel 7", "MacBook Air M2"])
+        self.assertEqual(self.index.by_price(3000, 4000).items, [])
+
+    def test_pagination(self):
+        """Test that pages follow on from each other and the last has no next offset."""
+        first = self.index.by_price(0, 10_000, limit=2)
+        self.assertEqual(self.names(first), ["Magic Mouse", "Bose QuietComfort Earbuds"])
+        self.assertEqual(first.next_offset, 2)
+        second = self.index.by_price(0, 10_000, offset=first.next_offset, limit=2)
+        self.assertEqual(self.names(second), ["Google Pixel 7", "MacBook Air M2"])
+        last = self.index.by_price(0, 10_000, offset=second.next_offset, limit=2)
+        self.assertEqual(self.names(last), ["MacBook Pro"])
+        self.assertIsNone(last.next_offset)
+        with self.assertRaises(ValueError):
+            self.index.by_prefix("Mac", limit=0)
+
+    def test_inactive_products_are_skipped(self):
+        """Test that inactive products are left out of results and do not count towards offsets."""
+        self.products[0].active = False
+        self.assertEqual(self.names(self.index.by_prefix("mac")), ["MacBook Pro"])
+        page = self.index.by_prefix("ma", offset=1, limit=1)
+        self.assertEqual(self.names(page), ["Magic Mouse"])
+        self.assertEqual(self.names(self.index.by_prefix("mac", active_only=False)),
+                         ["MacBook Air M2", "MacBook Pro"])
+        self.assertEqual(self.names(self.index.by_price(0, 1500, offset=2, active_only=False)),
+                         ["Google Pixel 7", "MacBook Air M2"])
+
+
+class TestStoreSearch(unittest.TestCase):
+    """Test cases for searching a store's catalog."""
+
+    def setUp(self):
+        self.mac = Product("MacBook Air M2", 1450, 100)
+        self.earbuds = Product("Bose QuietComfort Earbuds", 250, 500)
+        self.store = Store([self.mac, self.earbuds])
+
+    def test_index_follows_the_store(self):
+        """Test that the index is updated on add, remove, rename and price change."""
+        self.assertEqual(self.store.search_by_prefix("mac").items, [self.mac])
+        pixel = Product("Google Pixel 7", 500, 250)
+        self.store.add_product(pixel)
+        self.assertEqual(self.store.search_by_substring("pixel").items, [pixel])
+        self.store.remove_product(self.mac)
+        self.assertEqual(self.store.search_by_prefix("mac").items, [])
+        self.earbuds.name = "Sony Earbuds"
+        self.assertEqual(self.store.search_by_prefix("bose").items, [])
+        self.assertEqual(self.store.search_by_substring("earbuds").items, [self.earbuds])
+        self.earbuds.price = 600
+        self.assertEqual(self.store.search_by_price(400, 550).items, [pixel])
+        self.assertEqual(self.store.search_by_price(550, 650).items, [self.earbuds])
+
+    def test_sold_out_products_are_skipped(self):
+        """Test that a product deactivated by selling out no longer matches."""
+        self.store.order([(self.mac, 100)])
+        self.assertEqual(self.store.search_by_price(0, 2000).items, [self.earbuds])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import random
+import threading
+import unittest
+from products import Product, NonStockedProduct, LimitedProduct, InsufficientStockError, PurchaseLimitError
+from promotions import SecondHalfPrice
+from sharded_store import ShardedStore, shard_of
+
+
+class TestShardedStore(unittest.TestCase):
+    """Test cases for orders routed across shard worker processes."""
+
+    def setUp(self):
+        earbuds = Product("Bose QuietComfort Earbuds", 250, 500)
+        earbuds.promotion = SecondHalfPrice()
+        products = [Product(f"Product {i}", 10, 100) for i in range(8)]
+        products += [earbuds, NonStockedProduct("Unlimited Warranty", 100),
+                     LimitedProduct("Exclusive Sneakers", 150, 50, 2)]
+        self.store = ShardedStore(products, shards=3)
+        self.addCleanup(self.store.close)
+        self.plain = [self.store.get_product(f"Product {i}") for i in range(8)]
+
+    def cross_shard_pair(self):
+        """Return two products owned by different shards."""
+        first = self.plain[0]
+        second = next(view for view in self.plain if view.shard != first.shard)
+        return first, second
+
+    def test_products_are_partitioned_by_name(self):
+        """Test that each product lives on the shard its name hashes to."""
+        for view in self.store.list_of_products:
+            self.assertEqual(view.shard, shard_of(view.name, 3))
+        self.assertEqual(self.store.get_total_quantity(), 8 * 100 + 500 + 50)
+
+    def test_order_follows_product_rules(self):
+        """Test that promotions, non-stocked products and shared-memory stock all work."""
+        earbuds = self.store.get_product("Bose QuietComfort Earbuds")
+        warranty = self.store.get_product("Unlimited Warranty")
+        self.assertEqual(self.store.order([(earbuds, 2), (warranty, 3)]), 375 + 300)
+        self.assertEqual(earbuds.quantity, 498)
+        self.assertEqual(self.store.get_total_quantity(), 8 * 100 + 498 + 50)
+
+    def test_cross_shard_order_commits_everywhere(self):
+        """Test that an order spanning shards updates every shard."""
+        first, second = self.cross_shard_pair()
+        self.assertEqual(self.store.order([(first, 100), (second, 5)]), 1050)
+        self.assertEqual((first.quantity, second.quantity), (0, 95))
+        self.assertFalse(first.active)
+        self.assertNotIn(first, self.store.get_all_products())
+
+    def test_failed_cross_shard_order_aborts(self):
+        """Test that a refusal on one shard releases the holds of the others."""
+        first, second = self.cross_shard_pair()
+        with self.assertRaises(InsufficientStockError):
+            self.store.order([(first, 100), (second, 101)])
+        with self.assertRaises(InsufficientStockError):
+            self.store.order([(second, 101), (first, 100)])
+        self.assertEqual((first.quantity, second.quantity), (100, 100))
+        self.assertTrue(first.active)
+        self.assertEqual(self.store.get_total_quantity(), 8 * 100 + 500 + 50)
+
+    def test_prepare_takes_no_stock(self):
+        """Test that a prepared shard only holds its lines until every shard commits."""
+        first, second = self.cross_shard_pair()
+        worker = self.store._call
+        calls = []
+
+        def call(shard, operation, *arguments):
+            if operation == "commit" and not calls:
+                calls.append(shard)
+                self.assertEqual((first.quantity, second.quantity), (100, 100))
+            return worker(shard, operation, *arguments)
+
+        self.store._call = call
+        self.assertEqual(self.store.order([(first, 3), (second, 4)]), 70)
+        self.assertEqual((first.quantity, second.quantity), (97, 96))
+
+    def test_dead_worker_fails_the_order(self):
+        """Test that a worker that died fails the order and the other shards release their holds."""
+        first, second = sorted(self.cross_shard_pair(), key=lambda view: view.shard)
+        dead = self.store._processes[second.shard]
+        dead.terminate()
+        dead.join()
+        with self.assertRaises(RuntimeError):
+            self.store.order([(first, 100), (second, 1)])
+        self.assertEqual(self.store.order([(first, 100)]), 1000)
+        self.assertEqual(first.quantity, 0)
+
+    def test_worker_errors_keep_their_type(self):
+        """Test that errors raised in a worker are raised again with their type."""
+        sneakers = self.store.get_product("Exclusive Sneakers")
+        with self.assertRaises(PurchaseLimitError):
+            sneakers.buy(3)
+        with self.assertRaises(ValueError):
+            self.store.order([(Product("Stranger", 1, 1), 1)])
+
+    def test_concurrent_orders_never_oversell(self):
+        """Stress test: threads ordering across shards never oversell or leak stock."""
+        sold = {view.product_id: 0 for view in self.plain}
+        sold_lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            for _ in range(40):
+                cart = [(view, rng.randint(1, 5)) for view in rng.sample(self.plain, 3)]
+                try:
+                    self.store.order(cart)
+                except ValueError:
+                    continue
+                with sold_lock:
+                    for view, quantity in cart:
+                        sold[view.product_id] += quantity
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for view in self.plain:
+            self.assertEqual(view.quantity, 100 - sold[view.product_id])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,272 @@
+import random
+import threading
+import unittest
+from products import (Product, NonStockedProduct, LimitedProduct, InsufficientStockError,
+                      PurchaseLimitError)
+from promotions import SecondHalfPrice
+from store import Store
+
+
+class TestStoreIndex(unittest.TestCase):
+    """Test cases for looking up and removing products by key."""
+
+    def setUp(self):
+        self.macbook = Product("MacBook Air M2", 1450, 100)
+        self.sneakers = LimitedProduct("Exclusive Sneakers", 150, 50, 2)
+        self.store = Store([self.macbook, self.sneakers])
+
+    def test_get_product_by_name_and_id(self):
+        """Test that a product can be found by its name or its product id."""
+        self.assertIs(self.store.get_product("MacBook Air M2"), self.macbook)
+        self.assertIs(self.store.get_product(self.sneakers.product_id), self.sneakers)
+
+    def test_get_unknown_product(self):
+        """Test that looking up an unknown key raises an exception."""
+        with self.assertRaises(ValueError):
+            self.store.get_product("Unknown")
+
+    def test_remove_by_key(self):
+        """Test that removing by key drops the product from every index."""
+        removed = self.store.remove_by_key("MacBook Air M2")
+        self.assertIs(removed, self.macbook)
+        self.assertEqual(self.store.list_of_products, [self.sneakers])
+        with self.assertRaises(ValueError):
+            self.store.get_product(self.macbook.product_id)
+
+    def test_remove_product_keeps_order(self):
+        """Test that removing and re-adding products keeps insertion order."""
+        pixel = Product("Google Pixel 7", 500, 250)
+        self.store.add_product(pixel)
+        self.store.remove_product(self.sneakers)
+        self.assertEqual(self.store.list_of_products, [self.macbook, pixel])
+        with self.assertRaises(ValueError):
+            self.store.remove_product(self.sneakers)
+
+    def test_list_of_products_is_read_only(self):
+        """Test that editing list_of_products in place raises instead of being lost."""
+        pixel = Product("Google Pixel 7", 500, 250)
+        products = self.store.list_of_products
+        for edit in (lambda: products.append(pixel), lambda: products.remove(self.macbook),
+                     lambda: products.extend([pixel]), lambda: products.pop()):
+            with self.assertRaises(TypeError):
+                edit()
+        with self.assertRaises(TypeError):
+            products[0] = pixel
+        with self.assertRaises(TypeError):
+            del products[0]
+        self.assertEqual(products, [self.macbook, self.sneakers])
+        own = list(products)
+        own.append(pixel)
+        self.assertEqual(self.store.list_of_products, [self.macbook, self.sneakers])
+
+    def test_duplicate_name_rejected(self):
+        """Test that adding a second product with the same name raises an exception."""
+        with self.assertRaises(ValueError):
+            self.store.add_product(Product("MacBook Air M2", 1000, 1))
+
+
+class TestStoreCounters(unittest.TestCase):
+    """Test cases for the incrementally maintained total and active products."""
+
+    def setUp(self):
+        self.macbook = Product("MacBook Air M2", 1450, 100)
+        self.earbuds = Product("Bose QuietComfort Earbuds", 250, 500)
+        self.store = Store([self.macbook, self.earbuds])
+
+    def test_total_quantity_follows_purchases(self):
+        """Test that the total quantity tracks buys, edits and removals."""
+        self.store.order([(self.macbook, 10), (self.earbuds, 5)])
+        self.assertEqual(self.store.get_total_quantity(), 585)
+        self.earbuds.quantity = 20
+        self.assertEqual(self.store.get_total_quantity(), 110)
+        self.store.remove_product(self.macbook)
+        self.assertEqual(self.store.get_total_quantity(), 20)
+
+    def test_active_products_follow_stock(self):
+        """Test that sold-out products disappear and reactivated ones return in order."""
+        self.macbook.buy(100)
+        self.assertEqual(self.store.get_all_products(), [self.earbuds])
+        self.macbook.quantity = 5
+        self.macbook.active = True
+        self.assertEqual(self.store.get_all_products(), [self.macbook, self.earbuds])
+
+    def test_renamed_product_is_reindexed(self):
+        """Test that renaming a product updates the name index."""
+        self.macbook.name = "MacBook Air M3"
+        self.assertIs(self.store.get_product("MacBook Air M3"), self.macbook)
+        with self.assertRaises(ValueError):
+            self.store.get_product("MacBook Air M2")
+
+
+class TestStoreOrder(unittest.TestCase):
+    """Test cases for atomic and concurrent orders."""
+
+    def test_failed_order_rolls_back(self):
+        """Test that an order failing part-way leaves every product untouched."""
+        macbook = Product("MacBook Air M2", 1450, 100)
+        sneakers = LimitedProduct("Exclusive Sneakers", 150, 50, 2)
+        store = Store([macbook, sneakers])
+        with self.assertRaises(ValueError):
+            store.order([(macbook, 100), (sneakers, 3)])  # Exceeds the limit of 2.
+        self.assertEqual(macbook.quantity, 100)
+        self.assertTrue(macbook.active)
+        self.assertEqual(store.get_total_quantity(), 150)
+
+    def test_combined_demand_is_validated(self):
+        """Test that repeated lines for one product are checked against its stock together."""
+        pixel = Product("Google Pixel 7", 500, 5)
+        store = Store([pixel])
+        with self.assertRaises(ValueError):
+            store.order([(pixel, 3), (pixel, 3)])
+        self.assertEqual(pixel.quantity, 5)
+
+    def test_non_stocked_product_can_be_ordered(self):
+        """Test that a non-stocked product passes stock validation."""
+        warranty = NonStockedProduct("Unlimited Warranty", 100)
+        store = Store([warranty])
+        self.assertEqual(store.order([(warranty, 3)]), 300)
+
+    def test_concurrent_orders_never_oversell(self):
+        """Stress test: many threads ordering overlapping carts never oversell."""
+        products = [Product(f"Product {i}", 10, 200) for i in range(4)]
+        products += [LimitedProduct(f"Limited {i}", 20, 100, 2) for i in range(2)]
+        store = Store(products)
+        initial = {product.product_id: product.quantity for product in products}
+        sold = {product.product_id: 0 for product in products}
+        sold_lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            for _ in range(300):
+                cart = [(product, rng.randint(1, 3))
+                        for product in rng.sample(products, rng.randint(1, 4))]
+                try:
+                    store.order(cart)
+                except ValueError:
+                    continue
+                with sold_lock:
+                    for product, quantity in cart:
+                        sold[product.product_id] += quantity
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for product in products:
+            self.assertEqual(product.quantity,
+                             initial[product.product_id] - sold[product.product_id])
+            self.assertGreaterEqual(product.quantity, 0)
+        self.assertEqual(store.get_total_quantity(), sum(p.quantity for p in products))
+        self.assertEqual(store.get_all_products(), [p for p in products if p.active])
+
+
+class TestStoreOrderMany(unittest.TestCase):
+    """Test cases for placing batches of orders with Store.order_many."""
+
+    def setUp(self):
+        self.pixel = Product("Google Pixel 7", 500, 10)
+        self.warranty = NonStockedProduct("Unlimited Warranty", 100)
+        self.sneakers = LimitedProduct("Exclusive Sneakers", 150, 50, 2)
+        self.store = Store([self.pixel, self.warranty, self.sneakers])
+
+    def test_totals_match_single_orders(self):
+        """Test that batch totals equal what order() charges, with stock taken once."""
+        self.pixel.promotion = SecondHalfPrice()
+        orders = [[(self.pixel, 2), (self.warranty, 1)], [(self.sneakers, 2)], [(self.pixel, 3)]]
+        outcomes = self.store.order_many(orders)
+        self.assertTrue(all(outcome.ok for outcome in outcomes))
+        self.assertEqual([outcome.total for outcome in outcomes], [850, 300, 1250])
+        self.assertEqual(self.pixel.quantity, 5)
+        self.assertEqual(self.store.get_total_quantity(), 5 + 48)
+
+    def test_atomic_batch_is_all_or_nothing(self):
+        """Test that one unfillable order rejects the whole atomic batch."""
+        with self.assertRaises(InsufficientStockError):
+            self.store.order_many([[(self.pixel, 6)], [(self.pixel, 5)]])
+        with self.assertRaises(PurchaseLimitError):
+            self.store.order_many([[(self.pixel, 1)], [(self.sneakers, 3)]])
+        self.assertEqual(self.pixel.quantity, 10)
+
+    def test_best_effort_accepts_orders_while_stock_lasts(self):
+        """Test that best-effort batches report failures and place the rest."""
+        outcomes = self.store.order_many(
+            [[(self.pixel, 6)], [(self.pixel, 5)], [(self.sneakers, 3)], [(self.pixel, 4)],
+             [("not a tuple")]], atomic=False)
+        self.assertEqual([outcome.ok for outcome in outcomes], [True, False, False, True, False])
+        self.assertIsInstance(outcomes[1].error, InsufficientStockError)
+        self.assertIsInstance(outcomes[2].error, PurchaseLimitError)
+        self.assertEqual(self.pixel.quantity, 0)
+        self.assertFalse(self.pixel.active)
+
+    def test_pricing_error_takes_no_stock(self):
+        """Test that a promotion failing to price an order leaves the stock untouched."""
+        class Broken(SecondHalfPrice):
+            def calculate_price(self, price, quantity):
+                if quantity == 3:
+                    raise ArithmeticError("broken promotion")
+                return super().calculate_price(price, quantity)
+
+        self.sneakers.promotion = Broken()
+        self.pixel.promotion = Broken()
+        with self.assertRaises(ArithmeticError):
+            self.store.order_many([[(self.sneakers, 2)], [(self.pixel, 3)]])
+        self.assertEqual((self.pixel.quantity, self.sneakers.quantity), (10, 50))
+        outcomes = self.store.order_many([[(self.sneakers, 2)], [(self.pixel, 3)],
+                                          [(self.pixel, 2)]], atomic=False)
+        self.assertEqual([outcome.ok for outcome in outcomes], [True, False, True])
+        self.assertIsInstance(outcomes[1].error, ArithmeticError)
+        self.assertEqual((self.pixel.quantity, self.sneakers.quantity), (8, 48))
+        self.assertEqual(self.store.get_total_quantity(), 8 + 48)
+
+    def test_batch_in_cents(self):
+        """Test that batch totals can be returned in exact cents."""
+        outcomes = self.store.order_many([[(self.pixel, 1)]], cents=True)
+        self.assertEqual(outcomes[0].total, 50_000)
+
+
+class TestStoreListing(unittest.TestCase):
+    """Test cases for paged product listings."""
+
+    def setUp(self):
+        self.products = [Product(f"Product {number}", 10, 5) for number in range(7)]
+        self.store = Store(list(reversed(self.products)))
+
+    def test_pages_in_id_order(self):
+        """Test that pages follow product id order and the last page has no cursor."""
+        first = self.store.page_products(limit=3)
+        self.assertEqual(first.items, self.products[:3])
+        self.assertEqual(first.next_cursor, self.products[2].product_id)
+        second = self.store.page_products(first.next_cursor, limit=4)
+        self.assertEqual(second.items, self.products[3:])
+        self.assertIsNone(second.next_cursor)
+        with self.assertRaises(ValueError):
+            self.store.page_products(limit=0)
+
+    def test_no_cursor_when_only_inactive_products_follow(self):
+        """Test that the last page of active products has no cursor, whatever follows it."""
+        for product in self.products[4:]:
+            product.buy(5)
+        page = self.store.page_products(limit=4)
+        self.assertEqual(page.items, self.products[:4])
+        self.assertIsNone(page.next_cursor)
+        page = self.store.page_products(limit=4, active_only=False)
+        self.assertEqual(page.next_cursor, self.products[3].product_id)
+
+    def test_iteration_survives_changes(self):
+        """Test that changes between pages neither repeat nor skip other products."""
+        listed = []
+        for product in self.store.iter_products(page_size=2):
+            listed.append(product)
+            if len(listed) == 2:
+                self.store.remove_product(self.products[3])
+                self.products[4].buy(5)
+                added = Product("Added Later", 1, 1)
+                self.store.add_product(added)
+        self.assertEqual(listed, self.products[:3] + self.products[5:] + [added])
+        self.assertEqual(len(list(self.store.iter_products(active_only=False))), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()